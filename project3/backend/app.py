@@ -1,39 +1,4 @@
-from flask import Flask
-from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-db = SQLAlchemy()
-migrate = Migrate()
-jwt = JWTManager()
-
-def create_app():
-    app = Flask(__name__)
-    
-    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///worktohome.db')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
-    
-    db.init_app(app)
-    migrate.init_app(app, db)
-    jwt.init_app(app)
-    CORS(app)
-    
-    from app.routes.auth import auth_bp
-    from app.routes.housing import housing_bp
-    from app.routes.commute import commute_bp
-    
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(housing_bp, url_prefix='/api/housing')
-    app.register_blueprint(commute_bp, url_prefix='/api/commute')
-    
-    return app
+from app import create_app, db
 
 if __name__ == '__main__':
     app = create_app()
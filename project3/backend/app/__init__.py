@@ -1 +1,99 @@
-# App package initialization
+from flask import Flask
+from flask_cors import CORS
+from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
+from flask_jwt_extended import JWTManager
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+db = SQLAlchemy()
+migrate = Migrate()
+jwt = JWTManager()
+
+def create_app(config=None):
+    app = Flask(__name__)
+    
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///worktohome.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', os.getenv('GUNICORN_THREADS', '4')))  # Per worker process
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', '2'))
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', '10'))
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    app.config['ROUTING_PROVIDER'] = os.getenv('ROUTING_PROVIDER', 'estimate')  # estimate, graph or osrm
+    app.config['ROAD_GRAPH_PATH'] = os.getenv('ROAD_GRAPH_PATH')  # .npz from `flask build-road-graph`
+    app.config['OSRM_URL'] = os.getenv('OSRM_URL', 'http://localhost:5001')
+    app.config['USER_PROFILE_SOURCE'] = os.getenv('USER_PROFILE_SOURCE', 'db')  # db, claims or cache (single process only)
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')  # or e.g. scrypt:32768:8:1
+    app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'simple')  # simple, redis or null
+    app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    app.config['METRICS_RESPONSE_HEADERS'] = os.getenv('FLASK_ENV', 'production') != 'production'  # X-Query-Count / Server-Timing
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')  # When set, /metrics requires it as a bearer token
+    app.config['LISTING_FEEDS'] = os.getenv('LISTING_FEEDS', '')  # source=path,... re-ingested by celery beat
+    app.config['LISTING_MAX_AGE_DAYS'] = int(os.getenv('LISTING_MAX_AGE_DAYS', '14'))  # 0 keeps listings forever
+    app.config['LISTING_SNAPSHOT'] = os.getenv('LISTING_SNAPSHOT', 'false').lower() == 'true'  # Filter search/nearby in memory
+    app.config['LISTING_SNAPSHOT_MAX_LAG'] = float(os.getenv('LISTING_SNAPSHOT_MAX_LAG', '5'))  # Seconds before re-checking the table
+    app.config['LISTING_SNAPSHOT_PATH'] = os.getenv('LISTING_SNAPSHOT_PATH')  # Directory of snapshot files shared by workers
+    app.config['CELERY'] = {
+        'broker_url': os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/1'),
+        'result_backend': os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/1'),
+        'task_ignore_result': False,
+        'task_always_eager': os.getenv('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'  # Run jobs in-process
+    }
+    app.config['COMMUTE_MATRIX_MAX_AGE_DAYS'] = int(os.getenv('COMMUTE_MATRIX_MAX_AGE_DAYS', '30'))  # Shared estimates are recomputed after this
+    app.config['JOB_STALE_MINUTES'] = int(os.getenv('JOB_STALE_MINUTES', '30'))  # Queued/running longer frees the job's key
+    app.config['JOB_HEARTBEAT_SECONDS'] = float(os.getenv('JOB_HEARTBEAT_SECONDS', '60'))  # Keep well under JOB_STALE_MINUTES
+    
+    # Overrides (e.g. from tests) must be applied before the engine is created
+    if config:
+        app.config.update(config)
+    
+    from app.utils.db import engine_options
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    
+    db.init_app(app)
+    migrate.init_app(app, db)
+    jwt.init_app(app)
+    CORS(app)
+    
+    from app.utils.json_provider import init_json
+    init_json(app)
+    
+    from app.services.passwords import init_password_hashing
+    init_password_hashing(app)
+    
+    from app.services.profiles import profiles
+    profiles.init_app(app)
+    
+    from app.services.routing import routing
+    routing.init_app(app)
+    
+    from app.services.cache import cache
+    cache.init_app(app)
+    
+    from app.services.metrics import metrics
+    metrics.init_app(app)
+    
+    from app.services.listing_snapshot import listing_snapshot
+    listing_snapshot.init_app(app)
+    
+    from app.tasks import celery_init_app
+    celery_init_app(app)
+    
+    from app.cli import register_commands
+    register_commands(app)
+    
+    from app.routes.auth import auth_bp
+    from app.routes.housing import housing_bp
+    from app.routes.commute import commute_bp
+    from app.routes.jobs import jobs_bp
+    
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(housing_bp, url_prefix='/api/housing')
+    app.register_blueprint(commute_bp, url_prefix='/api/commute')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    
+    return app
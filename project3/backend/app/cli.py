@@ -0,0 +1,62 @@
+from app.services.fulltext import rebuild_search_index
+from app.services.ingest import DEFAULT_CHUNK_SIZE, ingest_listings
+from app.services.listing_snapshot import listing_snapshot
+from app.services.routing.graph import RoadGraph
+from flask import current_app
+import click
+
+def register_commands(app):
+    app.cli.add_command(ingest_listings_command)
+    app.cli.add_command(build_road_graph_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(publish_listing_snapshot_command)
+
+@click.command('ingest-listings')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--source', required=True, help='Feed name stored in Housing.source, e.g. zillow')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default=None,
+              help='Feed format; inferred from the file extension by default')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True)
+@click.option('--async', 'run_async', is_flag=True, help='Queue the ingestion on the Celery worker')
+def ingest_listings_command(path, source, fmt, chunk_size, run_async):
+    """Stream an NDJSON/CSV listing feed into the housing table"""
+    if run_async:
+        from app.tasks.ingest import ingest_listings_task
+        
+        result = ingest_listings_task.delay(path, source, fmt=fmt, chunk_size=chunk_size)
+        click.echo(f'Queued ingestion task {result.id}')
+        return
+    
+    stats = ingest_listings(path, source, fmt=fmt, chunk_size=chunk_size)
+    click.echo(
+        f"Read {stats['read']} rows ({stats['upserted']} upserted, {stats['skipped']} skipped) "
+        f"in {stats['seconds']}s - {stats['rows_per_second']} rows/sec"
+    )
+
+@click.command('build-road-graph')
+@click.argument('nodes', type=click.Path(exists=True, dir_okay=False))
+@click.argument('edges', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.option('--landmarks', default=8, show_default=True, help='ALT landmarks per travel mode')
+def build_road_graph_command(nodes, edges, output, landmarks):
+    """Compile an OSM-derived node/edge CSV pair into a RoadGraph .npz for ROAD_GRAPH_PATH"""
+    graph = RoadGraph.from_csv(nodes, edges)
+    if landmarks:
+        graph.build_landmarks(landmarks)
+    graph.save(output)
+    click.echo(f'Wrote {graph.node_count} nodes and {len(graph.indices)} directed edges to {output}')
+
+@click.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Repopulate the SQLite full-text index (needed after VACUUM; PostgreSQL keeps its own)"""
+    rebuild_search_index()
+    click.echo('Search index rebuilt')
+
+@click.command('publish-listing-snapshot')
+def publish_listing_snapshot_command():
+    """Load every listing into a new shared snapshot file under LISTING_SNAPSHOT_PATH, e.g. before starting workers"""
+    if not current_app.config['LISTING_SNAPSHOT_PATH']:
+        raise click.ClickException('LISTING_SNAPSHOT_PATH is not set')
+    
+    snapshot = listing_snapshot.refresh(full=True)
+    click.echo(f"Published {len(snapshot)} listings to {current_app.config['LISTING_SNAPSHOT_PATH']}")
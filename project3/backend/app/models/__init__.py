@@ -2,5 +2,7 @@ from .user import User
 from .housing import Housing
 from .commute import Commute
 from .favorite import Favorite
+from .commute_matrix import CommuteMatrix
+from .job import Job
 
-__all__ = ['User', 'Housing', 'Commute', 'Favorite']
+__all__ = ['User', 'Housing', 'Commute', 'Favorite', 'CommuteMatrix', 'Job']
@@ -4,6 +4,10 @@ import uuid
 
 class Commute(db.Model):
     __tablename__ = 'commutes'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'housing_id', 'route_type', name='uq_commutes_user_housing_route'),
+        db.Index('ix_commutes_user_calculated_at', 'user_id', 'calculated_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -32,6 +36,14 @@ class Commute(db.Model):
     calculated_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_favorite = db.Column(db.Boolean, default=False)
     
+    # Keys produced by to_dict(), valid for row serialization
+    SERIALIZED_FIELDS = (
+        'id', 'user_id', 'housing_id', 'distance_miles', 'duration_minutes',
+        'traffic_duration_minutes', 'route_type', 'departure_time', 'arrival_time',
+        'route_summary', 'route_polyline', 'waypoints', 'fuel_cost', 'transit_cost',
+        'parking_cost', 'total_commute_cost', 'calculated_at', 'is_favorite'
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -0,0 +1,34 @@
+from app import db
+from datetime import datetime
+import uuid
+
+class CommuteMatrix(db.Model):
+    """Commute estimates shared by every user whose work location rounds to the same cell"""
+    __tablename__ = 'commute_matrix'
+    __table_args__ = (
+        db.UniqueConstraint('work_lat', 'work_lng', 'housing_id', 'route_type', name='uq_commute_matrix_cell'),
+    )
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    work_lat = db.Column(db.Float, nullable=False)  # Rounded work location
+    work_lng = db.Column(db.Float, nullable=False)
+    housing_id = db.Column(db.String(36), db.ForeignKey('housing.id', ondelete='CASCADE'), nullable=False)
+    route_type = db.Column(db.String(20), nullable=False)
+    
+    distance_miles = db.Column(db.Float, nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False)
+    fuel_cost = db.Column(db.Float, nullable=True)
+    total_commute_cost = db.Column(db.Float, nullable=True)
+    calculated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    model_version = db.Column(db.Integer, nullable=False, server_default='1')  # ESTIMATE_MODEL_VERSION it was computed with
+    
+    def to_estimate(self):
+        return {
+            'distance_miles': self.distance_miles,
+            'duration_minutes': self.duration_minutes,
+            'fuel_cost': self.fuel_cost,
+            'total_commute_cost': self.total_commute_cost
+        }
+    
+    def __repr__(self):
+        return f'<CommuteMatrix {self.work_lat},{self.work_lng} {self.housing_id}>'
@@ -1,9 +1,22 @@
 from app import db
+from app.models.commute_matrix import CommuteMatrix
+from app.utils.geo import geohash_encode
+from app.utils.text import normalize_location
 from datetime import datetime
 import uuid
 
 class Housing(db.Model):
     __tablename__ = 'housing'
+    __table_args__ = (
+        db.UniqueConstraint('source', 'source_id', name='uq_housing_source'),
+        # search_housing filters: equality column first, then the price range
+        db.Index('ix_housing_price', 'price'),
+        db.Index('ix_housing_property_type_price', 'property_type', 'price'),
+        db.Index('ix_housing_bedrooms_price', 'bedrooms', 'price'),
+        db.Index('ix_housing_bathrooms_price', 'bathrooms', 'price'),
+        # Incremental listing snapshot refreshes and expiry scan by last write
+        db.Index('ix_housing_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(255), nullable=False)
@@ -11,9 +24,12 @@ class Housing(db.Model):
     address = db.Column(db.String(255), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     state = db.Column(db.String(50), nullable=False)
-    zip_code = db.Column(db.String(20), nullable=False)
+    zip_code = db.Column(db.String(20), nullable=False, index=True)
+    city_key = db.Column(db.String(100), nullable=True, index=True)  # normalize_location(city)
+    state_key = db.Column(db.String(50), nullable=True, index=True)  # normalize_location(state)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # Maintained on write for spatial lookups
     price = db.Column(db.Integer, nullable=False)  # Monthly rent/mortgage
     bedrooms = db.Column(db.Integer, nullable=True)
     bathrooms = db.Column(db.Float, nullable=True)
@@ -34,6 +50,14 @@ class Housing(db.Model):
     favorites = db.relationship('Favorite', backref='housing', lazy=True, cascade='all, delete-orphan')
     commutes = db.relationship('Commute', backref='housing', lazy=True, cascade='all, delete-orphan')
     
+    # Keys produced by to_dict(), valid for field projection
+    SERIALIZED_FIELDS = (
+        'id', 'title', 'description', 'address', 'city', 'state', 'zip_code',
+        'latitude', 'longitude', 'price', 'bedrooms', 'bathrooms', 'square_feet',
+        'property_type', 'available_date', 'images', 'amenities', 'pet_friendly',
+        'parking_available', 'furnished', 'source', 'created_at', 'updated_at'
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -63,3 +87,20 @@ class Housing(db.Model):
     
     def __repr__(self):
         return f'<Housing {self.title}>'
+
+@db.event.listens_for(Housing, 'before_insert')
+@db.event.listens_for(Housing, 'before_update')
+def _sync_derived_columns(mapper, connection, target):
+    """Keep the spatial and location lookup columns in step with their sources"""
+    if target.latitude is not None and target.longitude is not None:
+        target.geohash = geohash_encode(target.latitude, target.longitude)
+    target.city_key = normalize_location(target.city)
+    target.state_key = normalize_location(target.state)
+
+@db.event.listens_for(Housing, 'before_update')
+def _forget_moved_commutes(mapper, connection, target):
+    """Drop shared commute estimates computed for the listing's old coordinates"""
+    attrs = db.inspect(target).attrs
+    if attrs.latitude.history.has_changes() or attrs.longitude.history.has_changes():
+        matrix = CommuteMatrix.__table__
+        connection.execute(matrix.delete().where(matrix.c.housing_id == target.id))
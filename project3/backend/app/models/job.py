@@ -0,0 +1,38 @@
+from app import db
+from datetime import datetime
+import uuid
+
+class Job(db.Model):
+    """A background task run, recorded so clients can poll it and duplicate requests collapse"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))  # Also the Celery task id
+    name = db.Column(db.String(100), nullable=False)  # Celery task name, e.g. commute.recompute_favorites
+    key = db.Column(db.String(255), nullable=True, index=True)  # Idempotency key
+    active_key = db.Column(db.String(255), nullable=True, unique=True)  # key while queued/running, NULL once finished
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    params = db.Column(db.JSON, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Refreshed while running; a lapse means the worker died
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'key': self.key,
+            'status': self.status,
+            'params': self.params,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.name} {self.status}>'
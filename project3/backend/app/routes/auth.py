@@ -1,8 +1,12 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User
-from werkzeug.security import generate_password_hash
+from app.services.commute_matrix import schedule_precompute
+from app.services.jobs import enqueue
+from app.services.passwords import PasswordHasherBusy
+from app.services.profiles import profiles
+from app.tasks.commute import recompute_favorites
 import re
 
 auth_bp = Blueprint('auth', __name__)
@@ -37,14 +41,17 @@ def register():
         first_name=data.get('first_name'),
         last_name=data.get('last_name')
     )
-    user.set_password(data['password'])
+    try:
+        user.set_password(data['password'])
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Too many requests, try again shortly'}), 503
     
     try:
         db.session.add(user)
         db.session.commit()
         
         # Create access token
-        access_token = create_access_token(identity=user.id)
+        access_token = profiles.access_token(user)
         
         return jsonify({
             'message': 'User registered successfully',
@@ -66,11 +73,19 @@ def login():
     
     user = User.query.filter_by(email=data['email']).first()
     
-    if not user or not user.check_password(data['password']):
-        return jsonify({'error': 'Invalid email or password'}), 401
+    try:
+        if not user or not user.check_password(data['password']):
+            return jsonify({'error': 'Invalid email or password'}), 401
+        
+        # Upgrade hashes made with an older scheme or work factor
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Too many requests, try again shortly'}), 503
     
     # Create access token
-    access_token = create_access_token(identity=user.id)
+    access_token = profiles.access_token(user)
     
     return jsonify({
         'message': 'Login successful',
@@ -82,13 +97,12 @@ def login():
 @jwt_required()
 def get_profile():
     """Get current user profile"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    profile = profiles.get_profile(get_jwt_identity())
     
-    if not user:
+    if not profile:
         return jsonify({'error': 'User not found'}), 404
     
-    return jsonify(user.to_dict()), 200
+    return jsonify(profile), 200
 
 @auth_bp.route('/profile', methods=['PUT'])
 @jwt_required()
@@ -108,16 +122,34 @@ def update_profile():
         'max_commute_time', 'budget_min', 'budget_max', 'preferred_areas'
     ]
     
+    previous_location = (user.work_lat, user.work_lng)
+    
     for field in allowed_fields:
         if field in data:
             setattr(user, field, data[field])
     
     try:
         db.session.commit()
-        return jsonify({
+        
+        response = {
             'message': 'Profile updated successfully',
             'user': user.to_dict()
-        }), 200
+        }
+        
+        # Warm the commute matrix for a new work location and refresh saved commutes from it
+        work_location = (user.work_lat, user.work_lng)
+        if work_location != previous_location and None not in work_location:
+            schedule_precompute(user.work_lat, user.work_lng, user.max_commute_time)
+            job, _ = enqueue(
+                recompute_favorites, {'user_id': user.id},
+                key=f'commute.recompute_favorites:{user.id}', user_id=user.id
+            )
+            response['job'] = job.to_dict()
+        
+        # Tokens carrying preference claims are stale now; hand out a fresh one
+        if current_app.config['USER_PROFILE_SOURCE'] == 'claims':
+            response['access_token'] = profiles.access_token(user)
+        return jsonify(response), 200
         
     except Exception as e:
         db.session.rollback()
@@ -161,7 +193,7 @@ def google_oauth():
             return jsonify({'error': 'OAuth registration failed'}), 500
     
     # Create access token
-    access_token = create_access_token(identity=user.id)
+    access_token = profiles.access_token(user)
     
     return jsonify({
         'message': 'OAuth login successful',
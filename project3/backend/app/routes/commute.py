@@ -3,29 +3,31 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.commute import Commute
 from app.models.housing import Housing
-from app.models.user import User
-import math
+from app.services.commute import ROUTE_TYPES, apply_route, upsert_commutes
+from app.services.commute_matrix import PRECOMPUTE_RADIUS_MILES, get_commute_estimates, work_cell
+from app.services.jobs import enqueue
+from app.services.profiles import profiles
+from app.services.routing import routing
+from app.services.search import apply_search_filters, parse_search_filters
+from app.tasks.commute import precompute_location
+from app.utils.pagination import cursor_pagination, keyset_paginate
+from app.utils.serialization import rows_to_dicts, select_fields
 
-commute_bp = Blueprint('commute', __name__)
+MAX_BATCH_SIZE = 500
 
-def calculate_distance(lat1, lng1, lat2, lng2):
-    """Calculate distance between two points"""
-    R = 3959  # Earth's radius in miles
-    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    return R * c
+commute_bp = Blueprint('commute', __name__)
 
 @commute_bp.route('/calculate', methods=['POST'])
 @jwt_required()
 def calculate_commute():
     """Calculate commute time for a housing listing"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = profiles.get_preferences(user_id)
     data = request.get_json()
     
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
     if not data.get('housing_id'):
         return jsonify({'error': 'Housing ID is required'}), 400
     
@@ -36,32 +38,21 @@ def calculate_commute():
     if not housing:
         return jsonify({'error': 'Housing not found'}), 404
     
-    # Calculate distance and estimated time
-    distance_miles = calculate_distance(
-        user.work_lat, user.work_lng,
-        housing.latitude, housing.longitude
-    )
-    
     route_type = data.get('route_type', 'driving')
-    duration_minutes = int(distance_miles * 2)  # Rough estimate
-    
-    # Calculate costs
-    fuel_cost = (distance_miles / 25) * 3.50 if route_type == 'driving' else None
-    total_commute_cost = fuel_cost + 10 if fuel_cost else None  # Add parking
-    
-    # Create commute record
-    commute = Commute(
-        user_id=user_id,
-        housing_id=data['housing_id'],
-        distance_miles=distance_miles,
-        duration_minutes=duration_minutes,
-        route_type=route_type,
-        fuel_cost=fuel_cost,
-        total_commute_cost=total_commute_cost
-    )
+    if route_type not in ROUTE_TYPES:
+        return jsonify({'error': f"Unsupported route_type. Use one of: {', '.join(ROUTE_TYPES)}"}), 400
+    
+    # Reuse the shared matrix entry for this work location when there is one
+    estimates = get_commute_estimates(user.work_lat, user.work_lng, [housing], route_type)
+    
+    # Refine with the routing provider: road distance, traffic and the route geometry
+    route = routing.route((user.work_lat, user.work_lng), (housing.latitude, housing.longitude), route_type)
+    estimates[housing.id] = apply_route(estimates[housing.id], route, route_type)
+    
+    # Refresh the existing commute record rather than duplicating it
+    commute = upsert_commutes(user_id, route_type, estimates)[0]
     
     try:
-        db.session.add(commute)
         db.session.commit()
         
         return jsonify({
@@ -73,16 +64,156 @@ def calculate_commute():
         db.session.rollback()
         return jsonify({'error': 'Failed to calculate commute'}), 500
 
+@commute_bp.route('/calculate-batch', methods=['POST'])
+@jwt_required()
+def calculate_commute_batch():
+    """Calculate commutes for many housing listings in one request"""
+    user_id = get_jwt_identity()
+    user = profiles.get_preferences(user_id)
+    data = request.get_json()
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    housing_ids = data.get('housing_ids')
+    filters = data.get('filters')
+    
+    if not housing_ids and filters is None:
+        return jsonify({'error': 'housing_ids or filters is required'}), 400
+    
+    if housing_ids is not None and not (
+        isinstance(housing_ids, list) and all(isinstance(housing_id, str) for housing_id in housing_ids)
+    ):
+        return jsonify({'error': 'housing_ids must be a list of strings'}), 400
+    
+    if filters is not None and not isinstance(filters, dict):
+        return jsonify({'error': 'filters must be an object'}), 400
+    
+    if housing_ids and len(housing_ids) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} housing IDs per batch'}), 400
+    
+    route_type = data.get('route_type', 'driving')
+    if route_type not in ROUTE_TYPES:
+        return jsonify({'error': f"Unsupported route_type. Use one of: {', '.join(ROUTE_TYPES)}"}), 400
+    
+    if not user.work_lat or not user.work_lng:
+        return jsonify({'error': 'Work location not set'}), 400
+    
+    # Load only the coordinates, in one query
+    if housing_ids:
+        query = Housing.query.filter(Housing.id.in_(housing_ids))
+    else:
+        query = apply_search_filters(Housing.query, parse_search_filters(filters), user)
+    
+    # One extra row tells us the filters match more than a batch
+    rows = query.with_entities(
+        Housing.id, Housing.latitude, Housing.longitude
+    ).order_by(Housing.id).limit(MAX_BATCH_SIZE + 1).all()
+    
+    if len(rows) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'filters match more than {MAX_BATCH_SIZE} listings; narrow them'}), 400
+    
+    # Matrix hits are reused; the rest are computed in one vectorized pass
+    estimates = get_commute_estimates(user.work_lat, user.work_lng, rows, route_type)
+    
+    # Provider lookups run concurrently and identical trips share one call
+    routes = routing.route_many(
+        (user.work_lat, user.work_lng), [(row.id, row.latitude, row.longitude) for row in rows], route_type
+    )
+    commutes = upsert_commutes(user_id, route_type, {
+        row.id: apply_route(estimates[row.id], routes[row.id], route_type) for row in rows
+    })
+    
+    found_ids = {row.id for row in rows}
+    not_found = [housing_id for housing_id in housing_ids if housing_id not in found_ids] if housing_ids else []
+    
+    try:
+        # Single transaction; the unit of work batches the INSERTs
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Commutes calculated successfully',
+            'commutes': [commute.to_dict() for commute in commutes],
+            'not_found': not_found
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to calculate commutes'}), 500
+
+@commute_bp.route('/precompute', methods=['POST'])
+@jwt_required()
+def precompute_commutes():
+    """Queue commute estimates for every listing around the user's work location"""
+    user = profiles.get_preferences(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if not user.work_lat or not user.work_lng:
+        return jsonify({'error': 'Work location not set'}), 400
+    
+    radius_miles = data.get('radius_miles', PRECOMPUTE_RADIUS_MILES)
+    if not isinstance(radius_miles, (int, float)) or not 0 < radius_miles <= PRECOMPUTE_RADIUS_MILES:
+        return jsonify({'error': f'radius_miles must be between 0 and {PRECOMPUTE_RADIUS_MILES}'}), 400
+    
+    # The matrix is shared per work cell, so colleagues queueing the same cell get one job
+    cell_lat, cell_lng = work_cell(user.work_lat, user.work_lng)
+    job, created = enqueue(
+        precompute_location,
+        {'work_lat': cell_lat, 'work_lng': cell_lng, 'radius_miles': radius_miles},
+        key=f'commute.precompute_location:{cell_lat}:{cell_lng}:{round(radius_miles, 1)}'
+    )
+    
+    return jsonify({
+        'message': 'Precompute queued' if created else 'Precompute already queued',
+        'job': job.to_dict()
+    }), 202
+
 @commute_bp.route('/history', methods=['GET'])
 @jwt_required()
 def get_commute_history():
     """Get user's commute history"""
     user_id = get_jwt_identity()
+    cursor = request.args.get('cursor')  # Opt-in keyset mode; empty for the first page
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+    
+    if per_page < 1:
+        return jsonify({'error': 'per_page must be at least 1'}), 400
+    
+    query = Commute.query.filter_by(user_id=user_id)
+    
+    if cursor is not None:
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        try:
+            commutes, next_cursor = keyset_paginate(
+                select_fields(query, Commute), [Commute.calculated_at, Commute.id], cursor, per_page, descending=True
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        total = query.count() if include_total else None
+        
+        return jsonify({
+            'commutes': rows_to_dicts(commutes, Commute),
+            'pagination': cursor_pagination(per_page, next_cursor, total)
+        }), 200
     
-    commutes = Commute.query.filter_by(user_id=user_id).order_by(
-        Commute.calculated_at.desc()
-    ).all()
+    pagination = select_fields(query, Commute).order_by(
+        Commute.calculated_at.desc(), Commute.id.desc()
+    ).paginate(page=page, per_page=per_page, error_out=False)
     
-    commute_list = [commute.to_dict() for commute in commutes]
+    commute_list = rows_to_dicts(pagination.items, Commute)
     
-    return jsonify({'commutes': commute_list}), 200
+    return jsonify({
+        'commutes': commute_list,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': pagination.total,
+            'pages': pagination.pages,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev
+        }
+    }), 200
@@ -3,69 +3,192 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.housing import Housing
 from app.models.favorite import Favorite
-from app.models.user import User
-from sqlalchemy import and_, or_
-import math
+from app.services.cache import cache
+from app.services.facets import facet_counts, parse_facets
+from app.services.favorites import MAX_FAVORITES_BATCH, add_favorites, remove_favorites, update_favorites
+from app.services.fulltext import text_search
+from app.services.isochrone import ISOCHRONE_MODES, reachable_listings
+from app.services.listing_snapshot import listing_snapshot
+from app.services.location_index import MAX_SUGGESTIONS, city_index
+from app.services.profiles import profiles
+from app.services.search import SORT_OPTIONS, apply_search_filters, parse_search_filters, rank_by_commute, rank_by_relevance
+from app.services.spatial_index import find_nearby
+from app.utils.pagination import cursor_pagination, keyset_paginate, paginate_list, paginate_list_after
+from app.utils.serialization import parse_fields, rows_to_dicts, select_fields
 
 housing_bp = Blueprint('housing', __name__)
 
+def _load_housing(housing_ids, fields=None):
+    """Fetch serialized rows for one page of ranked ids, keyed by id"""
+    if not housing_ids:
+        return {}
+    rows = select_fields(Housing.query.filter(Housing.id.in_(housing_ids)), Housing, fields, extra=('id',)).all()
+    return {row.id: data for row, data in zip(rows, rows_to_dicts(rows, Housing, fields))}
+
 @housing_bp.route('/search', methods=['GET'])
 @jwt_required()
 def search_housing():
     """Search for housing listings with filters"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
+    user = profiles.get_preferences(get_jwt_identity())
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    # Responses depend on the filters and on the user's saved preferences
+    cache_key = cache.search_key(request.args.to_dict(), (
+        user.budget_min, user.budget_max, user.work_lat, user.work_lng, user.max_commute_time
+    ))
+    cached = cache.get_search(cache_key)
+    if cached is not None:
+        return jsonify(cached), 200
+    
+    body, status = _search(user)
+    if status == 200:
+        cache.set_search(cache_key, body)
+    
+    return jsonify(body), status
+
+def _search(user):
+    """Run a search for the current request, returning (body, status)"""
     # Get query parameters
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
-    min_price = request.args.get('min_price', type=int)
-    max_price = request.args.get('max_price', type=int)
-    bedrooms = request.args.get('bedrooms', type=int)
-    bathrooms = request.args.get('bathrooms', type=float)
-    property_type = request.args.get('property_type')
-    city = request.args.get('city')
-    state = request.args.get('state')
-    pet_friendly = request.args.get('pet_friendly', type=bool)
-    parking_available = request.args.get('parking_available', type=bool)
-    
-    # Build query
-    query = Housing.query
-    
-    # Apply filters
-    if min_price:
-        query = query.filter(Housing.price >= min_price)
-    if max_price:
-        query = query.filter(Housing.price <= max_price)
-    if bedrooms:
-        query = query.filter(Housing.bedrooms >= bedrooms)
-    if bathrooms:
-        query = query.filter(Housing.bathrooms >= bathrooms)
-    if property_type:
-        query = query.filter(Housing.property_type == property_type)
-    if city:
-        query = query.filter(Housing.city.ilike(f'%{city}%'))
-    if state:
-        query = query.filter(Housing.state.ilike(f'%{state}%'))
-    if pet_friendly is not None:
-        query = query.filter(Housing.pet_friendly == pet_friendly)
-    if parking_available is not None:
-        query = query.filter(Housing.parking_available == parking_available)
-    
-    # Apply user preferences if available
-    if user.budget_min:
-        query = query.filter(Housing.price >= user.budget_min)
-    if user.budget_max:
-        query = query.filter(Housing.price <= user.budget_max)
+    filters = parse_search_filters(request.args)
+    max_commute = request.args.get('max_commute', type=int)
+    sort = request.args.get('sort')
+    q = request.args.get('q', '').strip()  # Free text over title, description and amenities
+    cursor = request.args.get('cursor')  # Opt-in keyset mode; empty for the first page
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    try:
+        fields = parse_fields(request.args.get('fields'), Housing)  # e.g. fields=id,title,price
+        facets = parse_facets(request.args.get('facets'))  # e.g. facets=property_type,bedrooms,price_band
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    if per_page < 1:
+        return {'error': 'per_page must be at least 1'}, 400
+    
+    if sort is not None and sort not in SORT_OPTIONS:
+        return {'error': f'sort must be one of: {", ".join(SORT_OPTIONS)}'}, 400
+    
+    if sort == 'relevance' and not q:
+        return {'error': 'sort=relevance requires q'}, 400
+    
+    # Text searches rank by relevance unless asked otherwise
+    if q and sort is None:
+        sort = 'relevance'
+    
+    has_work_location = user.work_lat is not None and user.work_lng is not None
+    if (max_commute is not None or sort in ('commute', 'score')) and not has_work_location:
+        return {'error': 'Work location not set'}, 400
+    
+    # Fall back to the user's saved commute limit
+    if max_commute is None and has_work_location:
+        max_commute = user.max_commute_time
+    
+    # Build query with filters and user preferences
+    query = apply_search_filters(Housing.query, filters, user)
+    
+    # Full-text matches come from the inverted index, combined with the filters above
+    relevance = None
+    if q:
+        try:
+            query, relevance = text_search(query, q)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+    
+    # Facet counts cover the same matches as the results; with a commute limit
+    # they are counted over the ranked listings below
+    extra = {'facets': facet_counts(query, facets)} if facets and max_commute is None else {}
+    
+    # Filter in memory when the snapshot is on and fresh; text matches need the database's index
+    snapshot = listing_snapshot.current() if not q else None
+    
+    if max_commute is not None or sort in ('commute', 'score', 'relevance'):
+        # Rank every candidate first, then paginate the ranking
+        if not has_work_location:
+            ranked = rank_by_relevance(query, relevance)
+        elif snapshot is not None:
+            ranked = snapshot.rank_by_commute(filters, user, max_commute=max_commute, sort=sort or 'score')
+        else:
+            ranked = rank_by_commute(
+                query, user.work_lat, user.work_lng,
+                max_commute=max_commute, sort=sort or 'score', relevance=relevance
+            )
+        if facets and max_commute is not None:
+            extra = {'facets': facet_counts(query, facets, ids=[match.id for match in ranked])}
+        
+        if cursor is not None:
+            try:
+                page_matches, next_cursor = paginate_list_after(
+                    ranked, lambda match: match.sort_key, cursor, per_page
+                )
+            except ValueError:
+                return {'error': 'Invalid cursor'}, 400
+            pagination = cursor_pagination(per_page, next_cursor, len(ranked) if include_total else None)
+        else:
+            page_matches, pagination = paginate_list(ranked, page, per_page)
+        
+        housing_by_id = _load_housing([match.id for match in page_matches], fields)
+        
+        housing_list = []
+        for match in page_matches:
+            housing_data = housing_by_id.get(match.id)
+            if housing_data is None:
+                continue  # Deleted since the snapshot was taken
+            if match.distance_miles is not None:
+                housing_data['distance_miles'] = round(match.distance_miles, 2)
+                housing_data['estimated_commute_minutes'] = match.duration_minutes
+                housing_data['score'] = round(match.score, 3)
+            if match.relevance is not None:
+                housing_data['relevance'] = match.relevance
+            housing_list.append(housing_data)
+        
+        return {'housing': housing_list, 'pagination': pagination, **extra}, 200
+    
+    if snapshot is not None:
+        rows = snapshot.select(filters, user)
+        try:
+            if cursor is not None:
+                housing_ids, pagination = snapshot.page_after(rows, cursor, per_page, include_total)
+            else:
+                housing_ids, pagination = snapshot.page(rows, page, per_page, by_price=sort == 'price')
+        except ValueError:
+            return {'error': 'Invalid cursor'}, 400
+        
+        housing_by_id = _load_housing(housing_ids, fields)
+        return {
+            'housing': [housing_by_id[housing_id] for housing_id in housing_ids if housing_id in housing_by_id],
+            'pagination': pagination,
+            **extra
+        }, 200
+    
+    if cursor is not None:
+        # Seek on (price, id) instead of COUNT(*) + OFFSET
+        try:
+            items, next_cursor = keyset_paginate(
+                select_fields(query, Housing, fields, extra=('price', 'id')), [Housing.price, Housing.id], cursor, per_page
+            )
+        except ValueError:
+            return {'error': 'Invalid cursor'}, 400
+        total = query.count() if include_total else None
+        
+        return {
+            'housing': rows_to_dicts(items, Housing, fields),
+            'pagination': cursor_pagination(per_page, next_cursor, total),
+            **extra
+        }, 200
+    
+    if sort == 'price':
+        query = query.order_by(Housing.price, Housing.id)
     
     # Pagination
-    pagination = query.paginate(
+    pagination = select_fields(query, Housing, fields).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    housing_list = [housing.to_dict() for housing in pagination.items]
+    housing_list = rows_to_dicts(pagination.items, Housing, fields)
     
-    return jsonify({
+    return {
         'housing': housing_list,
         'pagination': {
             'page': page,
@@ -74,26 +197,50 @@ def search_housing():
             'pages': pagination.pages,
             'has_next': pagination.has_next,
             'has_prev': pagination.has_prev
-        }
-    }), 200
+        },
+        **extra
+    }, 200
 
 @housing_bp.route('/<housing_id>', methods=['GET'])
 @jwt_required()
 def get_housing(housing_id):
     """Get housing details by ID"""
+    cached = cache.get_detail(housing_id)
+    if cached is not None:
+        return jsonify(cached), 200
+    
     housing = Housing.query.get(housing_id)
     
     if not housing:
         return jsonify({'error': 'Housing not found'}), 404
     
-    return jsonify(housing.to_dict()), 200
+    housing_data = housing.to_dict()
+    cache.set_detail(housing_id, housing_data)
+    
+    return jsonify(housing_data), 200
+
+@housing_bp.route('/cities/autocomplete', methods=['GET'])
+@jwt_required()
+def autocomplete_cities():
+    """Suggest city names for a typed prefix, most listings first"""
+    prefix = request.args.get('q', '')
+    limit = min(request.args.get('limit', MAX_SUGGESTIONS, type=int), MAX_SUGGESTIONS)
+    
+    return jsonify({'cities': city_index.search(prefix, limit)}), 200
+
+@housing_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Get response cache hit/miss counts"""
+    return jsonify(cache.stats()), 200
 
 @housing_bp.route('/nearby', methods=['GET'])
 @jwt_required()
 def get_nearby_housing():
     """Get housing listings near user's work location"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = profiles.get_preferences(get_jwt_identity())
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
     
     if not user.work_lat or not user.work_lng:
         return jsonify({'error': 'Work location not set'}), 400
@@ -102,48 +249,109 @@ def get_nearby_housing():
     radius_miles = request.args.get('radius', 10, type=float)  # Default 10 miles
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    
+    if per_page < 1:
+        return jsonify({'error': 'per_page must be at least 1'}), 400
+    
+    snapshot = listing_snapshot.current()
+    if snapshot is not None:
+        matches = snapshot.find_nearby(user.work_lat, user.work_lng, radius_miles, user=user)
+    else:
+        # Apply user preferences
+        query = apply_search_filters(Housing.query, {}, user)
+        
+        # Candidate cells come from the geohash index, refined by exact distance
+        matches = find_nearby(user.work_lat, user.work_lng, radius_miles, query=query)
     
-    # Calculate bounding box for efficient querying
-    lat_degree = radius_miles / 69.0  # Approximate miles per degree latitude
-    lng_degree = radius_miles / (69.0 * math.cos(math.radians(user.work_lat)))
-    
-    min_lat = user.work_lat - lat_degree
-    max_lat = user.work_lat + lat_degree
-    min_lng = user.work_lng - lng_degree
-    max_lng = user.work_lng + lng_degree
-    
-    # Query housing within bounding box
-    query = Housing.query.filter(
-        and_(
-            Housing.latitude >= min_lat,
-            Housing.latitude <= max_lat,
-            Housing.longitude >= min_lng,
-            Housing.longitude <= max_lng
-        )
-    )
+    # Pagination over the distance-ordered matches
+    if cursor is not None:
+        try:
+            page_matches, next_cursor = paginate_list_after(
+                matches, lambda match: (match[1], match[0]), cursor, per_page
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        pagination = cursor_pagination(per_page, next_cursor, len(matches) if include_total else None)
+    else:
+        page_matches, pagination = paginate_list(matches, page, per_page)
+    
+    housing_by_id = _load_housing([housing_id for housing_id, _ in page_matches])
+    
+    housing_list = []
+    for housing_id, distance in page_matches:
+        housing_data = housing_by_id.get(housing_id)
+        if housing_data is None:
+            continue  # Deleted since the snapshot was taken
+        housing_data['distance_miles'] = round(distance, 2)
+        housing_list.append(housing_data)
+    
+    return jsonify({'housing': housing_list, 'pagination': pagination}), 200
+
+@housing_bp.route('/reachable', methods=['GET'])
+@jwt_required()
+def get_reachable_housing():
+    """Get housing listings reachable from user's work location within a commute time"""
+    user = profiles.get_preferences(get_jwt_identity())
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if not user.work_lat or not user.work_lng:
+        return jsonify({'error': 'Work location not set'}), 400
+    
+    # Get query parameters
+    minutes = request.args.get('minutes', user.max_commute_time or 60, type=int)
+    mode = request.args.get('mode', 'driving')
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    
+    if mode not in ISOCHRONE_MODES:
+        return jsonify({'error': f"Unsupported mode. Use one of: {', '.join(ISOCHRONE_MODES)}"}), 400
+    if minutes <= 0:
+        return jsonify({'error': 'minutes must be positive'}), 400
+    if per_page < 1:
+        return jsonify({'error': 'per_page must be at least 1'}), 400
     
     # Apply user preferences
-    if user.budget_min:
-        query = query.filter(Housing.price >= user.budget_min)
-    if user.budget_max:
-        query = query.filter(Housing.price <= user.budget_max)
+    query = apply_search_filters(Housing.query, {}, user)
     
-    # Pagination
-    pagination = query.paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # The cached isochrone narrows candidates to index ranges, then exact times filter them
+    isochrone, matches = reachable_listings(query, user.work_lat, user.work_lng, minutes, mode)
     
-    housing_list = [housing.to_dict() for housing in pagination.items]
+    # Pagination over the commute-ordered matches
+    if cursor is not None:
+        try:
+            page_matches, next_cursor = paginate_list_after(
+                matches, lambda match: (match[1], match[0]), cursor, per_page
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        pagination = cursor_pagination(per_page, next_cursor, len(matches) if include_total else None)
+    else:
+        page_matches, pagination = paginate_list(matches, page, per_page)
+    
+    housing_by_id = _load_housing([housing_id for housing_id, _, _ in page_matches])
+    
+    housing_list = []
+    for housing_id, duration, distance in page_matches:
+        housing_data = housing_by_id.get(housing_id)
+        if housing_data is None:
+            continue  # Deleted since it was matched
+        housing_data['estimated_commute_minutes'] = duration
+        housing_data['distance_miles'] = round(distance, 2)
+        housing_list.append(housing_data)
     
     return jsonify({
         'housing': housing_list,
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
+        'pagination': pagination,
+        'isochrone': {
+            'minutes': minutes,
+            'mode': mode,
+            'source': isochrone.source,
+            'cell_ranges': len(isochrone.ranges)
         }
     }), 200
 
@@ -153,12 +361,21 @@ def get_favorites():
     """Get user's favorite housing listings"""
     user_id = get_jwt_identity()
     
-    favorites = Favorite.query.filter_by(user_id=user_id).all()
+    # Optional projection, e.g. fields=id,title,price for list views
+    try:
+        fields = parse_fields(request.args.get('fields'), Housing)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Favorites and the selected housing columns in a single joined query
+    query = Favorite.query.filter_by(user_id=user_id).join(Favorite.housing)
+    rows = select_fields(query, Housing, fields).add_columns(
+        Favorite.id.label('favorite_id'), Favorite.notes, Favorite.priority, Favorite.visit_date
+    ).all()
     
     favorite_housing = []
-    for favorite in favorites:
-        housing_data = favorite.housing.to_dict()
-        housing_data['favorite_id'] = favorite.id
+    for favorite, housing_data in zip(rows, rows_to_dicts(rows, Housing, fields)):
+        housing_data['favorite_id'] = favorite.favorite_id
         housing_data['notes'] = favorite.notes
         housing_data['priority'] = favorite.priority
         housing_data['visit_date'] = favorite.visit_date.isoformat() if favorite.visit_date else None
@@ -210,6 +427,73 @@ def add_favorite():
         db.session.rollback()
         return jsonify({'error': 'Failed to add to favorites'}), 500
 
+def _batch_items(key):
+    """The list under key in the request body, or an error message"""
+    data = request.get_json(silent=True) or {}
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return None, f'{key} must be a list'
+    if len(items) > MAX_FAVORITES_BATCH:
+        return None, f'At most {MAX_FAVORITES_BATCH} {key} per batch'
+    return items, None
+
+@housing_bp.route('/favorites/batch', methods=['POST'])
+@jwt_required()
+def add_favorites_batch():
+    """Add many listings to favorites in one transaction"""
+    user_id = get_jwt_identity()
+    items, error = _batch_items('favorites')
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        results = add_favorites(user_id, items)
+        db.session.commit()
+        
+        return jsonify({'results': results}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to add to favorites'}), 500
+
+@housing_bp.route('/favorites/batch', methods=['PATCH'])
+@jwt_required()
+def update_favorites_batch():
+    """Update notes, priority and visit date of many favorites in one transaction"""
+    user_id = get_jwt_identity()
+    items, error = _batch_items('favorites')
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        results = update_favorites(user_id, items)
+        db.session.commit()
+        
+        return jsonify({'results': results}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update favorites'}), 500
+
+@housing_bp.route('/favorites/batch', methods=['DELETE'])
+@jwt_required()
+def remove_favorites_batch():
+    """Remove many favorites by id in one transaction"""
+    user_id = get_jwt_identity()
+    favorite_ids, error = _batch_items('ids')
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        results = remove_favorites(user_id, favorite_ids)
+        db.session.commit()
+        
+        return jsonify({'results': results}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to remove from favorites'}), 500
+
 @housing_bp.route('/favorites/<favorite_id>', methods=['DELETE'])
 @jwt_required()
 def remove_favorite(favorite_id):
@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.job import Job
+from sqlalchemy import or_
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('', methods=['GET'])
+@jwt_required()
+def list_jobs():
+    """Get the user's most recent background jobs"""
+    user_id = get_jwt_identity()
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    
+    if limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
+    
+    jobs = Job.query.filter_by(user_id=user_id).order_by(Job.created_at.desc()).limit(limit).all()
+    
+    return jsonify({'jobs': [job.to_dict() for job in jobs]}), 200
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Get a background job's status and result"""
+    user_id = get_jwt_identity()
+    
+    # Shared jobs (e.g. a work cell's precompute) have no owner
+    job = Job.query.filter(Job.id == job_id, or_(Job.user_id == user_id, Job.user_id.is_(None))).first()
+    
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job.to_dict()), 200
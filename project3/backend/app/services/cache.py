@@ -0,0 +1,244 @@
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class NullCache:
+    """Backend that never stores anything; used to switch caching off"""
+    
+    name = 'null'
+    
+    def get(self, key):
+        return None
+    
+    def set(self, key, value, timeout=None):
+        pass
+    
+    def delete(self, key):
+        pass
+    
+    def get_counter(self, key):
+        return 0
+    
+    def incr(self, key):
+        return 0
+
+class LocalCache:
+    """In-process LRU cache with per-entry TTL"""
+    
+    name = 'simple'
+    
+    def __init__(self, max_entries=1000, default_timeout=300):
+        self.max_entries = max_entries
+        self.default_timeout = default_timeout
+        self._entries = OrderedDict()
+        self._counters = {}  # Kept apart so LRU eviction never resets them
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+    
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+class RedisCache:
+    """Redis-backed cache shared by every worker; values are stored as JSON.
+    
+    Redis errors are logged and treated as misses, so an outage costs cache
+    hits rather than failing requests.
+    """
+    
+    name = 'redis'
+    
+    def __init__(self, url, default_timeout=300, key_prefix='worktohome:'):
+        import redis
+        
+        self.client = redis.Redis.from_url(url)
+        self.errors = redis.RedisError
+        self.default_timeout = default_timeout
+        self.key_prefix = key_prefix
+    
+    def get(self, key):
+        try:
+            value = self.client.get(self.key_prefix + key)
+        except self.errors as e:
+            logger.warning('Redis cache get failed: %s', e)
+            return None
+        return json.loads(value) if value is not None else None
+    
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        try:
+            self.client.set(self.key_prefix + key, json.dumps(value), ex=timeout or None)
+        except self.errors as e:
+            logger.warning('Redis cache set failed: %s', e)
+    
+    def delete(self, key):
+        try:
+            self.client.delete(self.key_prefix + key)
+        except self.errors as e:
+            logger.warning('Redis cache delete failed: %s', e)
+    
+    def get_counter(self, key):
+        try:
+            return int(self.client.get(self.key_prefix + key) or 0)
+        except self.errors as e:
+            logger.warning('Redis cache counter read failed: %s', e)
+            return 0
+    
+    def incr(self, key):
+        try:
+            return self.client.incr(self.key_prefix + key)
+        except self.errors as e:
+            logger.warning('Redis cache increment failed: %s', e)
+            return 0
+
+class ResponseCache:
+    """Caches serialized housing responses, invalidated by Housing writes.
+    
+    Entries are keyed on a listings version that every committed Housing
+    insert, update or delete bumps (and bulk writers bump explicitly), so a
+    write makes all cached responses unreachable at once; they then age out
+    through the backend's TTL/LRU.
+    """
+    
+    VERSION_KEY = 'housing:version'
+    
+    def init_app(self, app):
+        app.config.setdefault('CACHE_TYPE', 'simple')
+        app.config.setdefault('CACHE_DEFAULT_TIMEOUT', 300)
+        app.config.setdefault('CACHE_THRESHOLD', 1000)
+        app.config.setdefault('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+        
+        cache_type = app.config['CACHE_TYPE']
+        timeout = app.config['CACHE_DEFAULT_TIMEOUT']
+        if cache_type == 'redis':
+            backend = RedisCache(app.config['CACHE_REDIS_URL'], default_timeout=timeout)
+        elif cache_type == 'simple':
+            backend = LocalCache(max_entries=app.config['CACHE_THRESHOLD'], default_timeout=timeout)
+        elif cache_type == 'null':
+            backend = NullCache()
+        else:
+            raise ValueError(f'Unknown CACHE_TYPE: {cache_type}')
+        
+        app.extensions['response_cache'] = {
+            'backend': backend,
+            'stats': {},
+            'lock': threading.Lock()
+        }
+    
+    @property
+    def _state(self):
+        return current_app.extensions['response_cache']
+    
+    def _record(self, namespace, outcome):
+        state = self._state
+        with state['lock']:
+            counts = state['stats'].setdefault(namespace, {'hits': 0, 'misses': 0})
+            counts[outcome] += 1
+    
+    def _get(self, namespace, key):
+        value = self._state['backend'].get(key)
+        self._record(namespace, 'misses' if value is None else 'hits')
+        return value
+    
+    def version(self):
+        """Current listings version; changes whenever housing data is written"""
+        return self._state['backend'].get_counter(self.VERSION_KEY)
+    
+    def search_key(self, params, context=()):
+        """Key for a search response from its normalized parameters and user context"""
+        normalized = sorted((name, value) for name, value in params.items() if value not in (None, ''))
+        digest = hashlib.sha1(json.dumps([normalized, list(context)], default=str).encode()).hexdigest()
+        return f'housing:search:{self.version()}:{digest}'
+    
+    def get_search(self, key):
+        return self._get('search', key)
+    
+    def set_search(self, key, value):
+        self._state['backend'].set(key, value)
+    
+    def get_detail(self, housing_id):
+        return self._get('detail', f'housing:detail:{self.version()}:{housing_id}')
+    
+    def set_detail(self, housing_id, value):
+        self._state['backend'].set(f'housing:detail:{self.version()}:{housing_id}', value)
+    
+    def get_isochrone(self, key):
+        return self._get('isochrone', key)
+    
+    def set_isochrone(self, key, value):
+        # Reachable areas do not depend on listings, so they skip the version
+        self._state['backend'].set(key, value)
+    
+    def invalidate_housing(self):
+        """Make every cached housing response unreachable"""
+        self._state['backend'].incr(self.VERSION_KEY)
+    
+    def stats(self):
+        state = self._state
+        with state['lock']:
+            namespaces = {name: dict(counts) for name, counts in state['stats'].items()}
+        
+        for counts in namespaces.values():
+            lookups = counts['hits'] + counts['misses']
+            counts['hit_ratio'] = round(counts['hits'] / lookups, 4) if lookups else 0.0
+        
+        return {'backend': state['backend'].name, 'namespaces': namespaces}
+
+cache = ResponseCache()
+
+@event.listens_for(Session, 'after_flush')
+def _collect_housing_changes(session, flush_context):
+    from app.models.housing import Housing
+    
+    for instance in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Housing):
+            session.info['housing_changed'] = True
+            break
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    changed = session.info.pop('housing_changed', False)
+    if changed and has_app_context() and 'response_cache' in current_app.extensions:
+        cache.invalidate_housing()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_housing_changes(session):
+    session.info.pop('housing_changed', None)
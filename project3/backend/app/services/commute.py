@@ -0,0 +1,138 @@
+from app import db
+from app.models.commute import Commute
+from app.services.routing.providers import EstimateProvider
+from app.utils.db import dialect_insert
+from datetime import datetime
+import math
+import numpy as np
+import uuid
+
+# Estimates use the offline routing provider's model, so a commute reads the
+# same minutes whether it came from search, reachable or /calculate
+ROUTE_TYPES = tuple(EstimateProvider.SPEED_MPH)
+ESTIMATE_MODEL_VERSION = 2  # Bump when the estimate changes; older matrix rows are then recomputed
+MILES_PER_GALLON = 25
+FUEL_PRICE_PER_GALLON = 3.50
+PARKING_COST = 10
+
+# Columns an estimate (or apply_route result) sets; absent ones are cleared
+COMMUTE_FIELDS = (
+    'distance_miles', 'duration_minutes', 'traffic_duration_minutes', 'fuel_cost',
+    'total_commute_cost', 'route_summary', 'route_polyline', 'waypoints'
+)
+
+def commute_costs(road_miles, route_type):
+    """Fuel and total cost of a trip of road_miles; both None for modes without fuel cost"""
+    fuel_cost = (road_miles / MILES_PER_GALLON) * FUEL_PRICE_PER_GALLON if route_type == 'driving' else None
+    total_commute_cost = fuel_cost + PARKING_COST if fuel_cost else None
+    return fuel_cost, total_commute_cost
+
+def estimate_commute(distance_miles, route_type):
+    """Estimate road distance, duration and costs for a single straight-line distance"""
+    road_miles = distance_miles * EstimateProvider.CIRCUITY[route_type]
+    duration_minutes = int(math.ceil(road_miles / EstimateProvider.SPEED_MPH[route_type] * 60))
+    fuel_cost, total_commute_cost = commute_costs(road_miles, route_type)
+    
+    return {
+        'distance_miles': road_miles,
+        'duration_minutes': duration_minutes,
+        'fuel_cost': fuel_cost,
+        'total_commute_cost': total_commute_cost
+    }
+
+def apply_route(estimate, route, route_type):
+    """Replace a straight-line estimate with a routing provider's result, if there is one"""
+    if route is None:
+        return estimate
+    
+    fuel_cost, total_commute_cost = commute_costs(route.distance_miles, route_type)
+    return dict(
+        distance_miles=route.distance_miles,
+        duration_minutes=route.duration_minutes,
+        fuel_cost=fuel_cost,
+        total_commute_cost=total_commute_cost,
+        traffic_duration_minutes=route.traffic_duration_minutes,
+        route_summary=route.summary,
+        route_polyline=route.polyline,
+        waypoints=route.waypoints
+    )
+
+def max_distance_for_commute(max_commute_minutes, route_type='driving'):
+    """Farthest straight-line distance whose estimated duration fits within max_commute_minutes"""
+    return max_commute_minutes / 60 * EstimateProvider.SPEED_MPH[route_type] / EstimateProvider.CIRCUITY[route_type]
+
+def estimate_commutes(distances, route_type):
+    """Vectorized estimate_commute over an array of distances.
+    
+    Returns a dict of arrays; cost arrays are None when the mode has no fuel cost.
+    """
+    road_miles = np.asarray(distances, dtype=np.float64) * EstimateProvider.CIRCUITY[route_type]
+    duration_minutes = np.ceil(road_miles / EstimateProvider.SPEED_MPH[route_type] * 60).astype(np.int64)
+    
+    fuel_cost = None
+    total_commute_cost = None
+    if route_type == 'driving':
+        fuel_cost = road_miles / MILES_PER_GALLON * FUEL_PRICE_PER_GALLON
+        # Zero-distance trips carry no parking charge, matching estimate_commute
+        total_commute_cost = np.where(fuel_cost > 0, fuel_cost + PARKING_COST, np.nan)
+    
+    return {
+        'distance_miles': road_miles,
+        'duration_minutes': duration_minutes,
+        'fuel_cost': fuel_cost,
+        'total_commute_cost': total_commute_cost
+    }
+
+def commute_records(estimates):
+    """Unpack estimate_commutes() arrays into per-listing dicts of Python scalars"""
+    count = len(estimates['distance_miles'])
+    columns = {}
+    for name, values in estimates.items():
+        if values is None:
+            columns[name] = [None] * count
+        else:
+            columns[name] = [None if value != value else value for value in values.tolist()]  # NaN -> None
+    
+    return [
+        {name: columns[name][i] for name in columns}
+        for i in range(count)
+    ]
+
+def upsert_commutes(user_id, route_type, estimates):
+    """Create or refresh the user's Commute rows from {housing_id: estimate}.
+    
+    One INSERT ... ON CONFLICT updates existing rows for the same (user,
+    housing, route type) in place, so concurrent calculations cannot collide
+    on the unique constraint. Returns the Commute objects in estimates order;
+    the caller commits.
+    """
+    if not estimates:
+        return []
+    
+    calculated_at = datetime.utcnow()
+    statement = dialect_insert(Commute.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'housing_id', 'route_type'],
+        set_=dict(
+            {field: statement.excluded[field] for field in COMMUTE_FIELDS},
+            calculated_at=statement.excluded.calculated_at
+        )
+    )
+    db.session.execute(statement, [
+        dict(
+            {field: estimate.get(field) for field in COMMUTE_FIELDS},
+            id=str(uuid.uuid4()), user_id=user_id, housing_id=housing_id,
+            route_type=route_type, calculated_at=calculated_at, is_favorite=False
+        )
+        for housing_id, estimate in estimates.items()
+    ])
+    
+    commutes = {
+        commute.housing_id: commute
+        for commute in Commute.query.filter(
+            Commute.user_id == user_id,
+            Commute.route_type == route_type,
+            Commute.housing_id.in_(list(estimates))
+        ).populate_existing()
+    }
+    return [commutes[housing_id] for housing_id in estimates]
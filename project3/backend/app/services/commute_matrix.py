@@ -0,0 +1,187 @@
+from app import db
+from app.models.commute import Commute
+from app.models.commute_matrix import CommuteMatrix
+from app.models.favorite import Favorite
+from app.models.housing import Housing
+from app.models.user import User
+from app.services.commute import (
+    ESTIMATE_MODEL_VERSION, apply_route, commute_records, estimate_commutes, max_distance_for_commute, upsert_commutes
+)
+from app.services.routing import routing
+from app.services.spatial_index import candidate_filter
+from app.utils.db import dialect_insert
+from app.utils.geo import calculate_distances
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_
+import logging
+
+logger = logging.getLogger(__name__)
+
+WORK_LOCATION_PRECISION = 3  # Decimal places; ~100m, so colleagues share a cell
+PRECOMPUTE_RADIUS_MILES = 30
+PRECOMPUTE_ROUTE_TYPES = ('driving',)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='commute-precompute')
+
+def work_cell(work_lat, work_lng):
+    """Round a work location to the cell commute results are shared under"""
+    return round(work_lat, WORK_LOCATION_PRECISION), round(work_lng, WORK_LOCATION_PRECISION)
+
+def get_commute_estimates(work_lat, work_lng, housing_rows, route_type):
+    """Return {housing_id: estimate} for rows with id/latitude/longitude.
+    
+    Estimates already in the matrix for this work cell are reused; the rest are
+    computed in one vectorized pass and stored for the next user in the cell.
+    Rows from an older estimate model or past COMMUTE_MATRIX_MAX_AGE_DAYS are
+    recomputed and replaced.
+    """
+    cell_lat, cell_lng = work_cell(work_lat, work_lng)
+    housing_rows = list(housing_rows)
+    if not housing_rows:
+        return {}
+    
+    cached = CommuteMatrix.query.filter(
+        CommuteMatrix.work_lat == cell_lat,
+        CommuteMatrix.work_lng == cell_lng,
+        CommuteMatrix.route_type == route_type,
+        CommuteMatrix.housing_id.in_([row.id for row in housing_rows]),
+        CommuteMatrix.model_version == ESTIMATE_MODEL_VERSION,
+        CommuteMatrix.calculated_at >= _expiry_cutoff()
+    ).all()
+    estimates = {entry.housing_id: entry.to_estimate() for entry in cached}
+    
+    missing = [row for row in housing_rows if row.id not in estimates]
+    if missing:
+        estimates.update(_compute_and_store(cell_lat, cell_lng, missing, route_type))
+    
+    return estimates
+
+def precompute_for_location(work_lat, work_lng, radius_miles=PRECOMPUTE_RADIUS_MILES,
+                            route_types=PRECOMPUTE_ROUTE_TYPES):
+    """Fill the matrix for every listing within radius_miles of a work location"""
+    cell_lat, cell_lng = work_cell(work_lat, work_lng)
+    rows = Housing.query.filter(
+        candidate_filter(cell_lat, cell_lng, radius_miles)
+    ).with_entities(Housing.id, Housing.latitude, Housing.longitude).all()
+    
+    stored = 0
+    for route_type in route_types:
+        stored += len(get_commute_estimates(cell_lat, cell_lng, rows, route_type))
+    db.session.commit()
+    return stored
+
+def recompute_favorite_commutes(user_id):
+    """Refresh the user's commutes to every favorite from their current work location.
+    
+    Each route type the user has calculated before is refreshed (driving when
+    there are none yet); the work location is read when the job runs, so a
+    queued job always uses the latest one.
+    """
+    user = User.query.get(user_id)
+    if user is None or user.work_lat is None or user.work_lng is None:
+        return {'favorites': 0, 'commutes': 0}
+    
+    rows = Housing.query.join(Favorite, Favorite.housing_id == Housing.id).filter(
+        Favorite.user_id == user_id
+    ).with_entities(Housing.id, Housing.latitude, Housing.longitude).all()
+    if not rows:
+        return {'favorites': 0, 'commutes': 0}
+    
+    route_types = [
+        route_type for (route_type,) in
+        Commute.query.filter_by(user_id=user_id).with_entities(Commute.route_type).distinct()
+    ] or ['driving']
+    
+    origin = (user.work_lat, user.work_lng)
+    destinations = [(row.id, row.latitude, row.longitude) for row in rows]
+    commutes = 0
+    for route_type in route_types:
+        estimates = get_commute_estimates(user.work_lat, user.work_lng, rows, route_type)
+        routes = routing.route_many(origin, destinations, route_type)
+        commutes += len(upsert_commutes(user_id, route_type, {
+            row.id: apply_route(estimates[row.id], routes[row.id], route_type) for row in rows
+        }))
+    db.session.commit()
+    
+    return {'favorites': len(rows), 'commutes': commutes}
+
+def schedule_precompute(work_lat, work_lng, max_commute_time=None):
+    """Precompute a new work location's matrix without blocking the request.
+    
+    COMMUTE_PRECOMPUTE_MODE selects 'thread' (default), 'job' (a Celery job
+    shared by everyone in the work cell), 'sync' or 'off'. Returns the Job
+    in 'job' mode.
+    """
+    mode = current_app.config.get('COMMUTE_PRECOMPUTE_MODE', 'thread')
+    if mode == 'off':
+        return None
+    
+    radius = PRECOMPUTE_RADIUS_MILES
+    if max_commute_time:
+        radius = max_distance_for_commute(max_commute_time)
+    
+    if mode == 'sync':
+        precompute_for_location(work_lat, work_lng, radius)
+        return None
+    
+    if mode == 'job':
+        from app.services.jobs import enqueue
+        from app.tasks.commute import precompute_location
+        
+        cell_lat, cell_lng = work_cell(work_lat, work_lng)
+        job, _ = enqueue(
+            precompute_location,
+            {'work_lat': cell_lat, 'work_lng': cell_lng, 'radius_miles': radius},
+            key=f'commute.precompute_location:{cell_lat}:{cell_lng}:{round(radius, 1)}'
+        )
+        return job
+    
+    app = current_app._get_current_object()
+    
+    def run():
+        with app.app_context():
+            try:
+                precompute_for_location(work_lat, work_lng, radius)
+            except Exception:
+                db.session.rollback()
+                logger.exception('Commute precompute failed for %s,%s', work_lat, work_lng)
+    
+    _executor.submit(run)
+    return None
+
+def _expiry_cutoff():
+    max_age = current_app.config.get('COMMUTE_MATRIX_MAX_AGE_DAYS', 30)
+    return datetime.utcnow() - timedelta(days=max_age)
+
+def _compute_and_store(cell_lat, cell_lng, rows, route_type):
+    distances = calculate_distances(
+        cell_lat, cell_lng,
+        [row.latitude for row in rows], [row.longitude for row in rows]
+    )
+    records = commute_records(estimate_commutes(distances, route_type))
+    calculated_at = datetime.utcnow()
+    
+    # Another request may fill the same cell concurrently; first writer wins,
+    # but a stale row (older model or expired) is overwritten
+    table = CommuteMatrix.__table__
+    statement = dialect_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=['work_lat', 'work_lng', 'housing_id', 'route_type'],
+        set_={
+            column: statement.excluded[column]
+            for column in ('distance_miles', 'duration_minutes', 'fuel_cost', 'total_commute_cost',
+                           'calculated_at', 'model_version')
+        },
+        where=or_(table.c.model_version != ESTIMATE_MODEL_VERSION, table.c.calculated_at < _expiry_cutoff())
+    )
+    db.session.execute(statement, [
+        dict(
+            record, work_lat=cell_lat, work_lng=cell_lng, housing_id=row.id,
+            route_type=route_type, calculated_at=calculated_at, model_version=ESTIMATE_MODEL_VERSION
+        )
+        for row, record in zip(rows, records)
+    ])
+    
+    return {row.id: record for row, record in zip(rows, records)}
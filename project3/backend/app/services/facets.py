@@ -0,0 +1,82 @@
+from app.models.housing import Housing
+from sqlalchemy import case, func
+
+# Monthly price band lower bounds; the last band is open-ended
+PRICE_BANDS = (0, 1000, 1500, 2000, 2500, 3000, 4000)
+MAX_BEDROOM_BUCKET = 4  # 4+ bedrooms share a bucket
+ID_CHUNK_SIZE = 500  # Listing ids per IN list when counts are limited to given ids
+
+def _price_band_labels():
+    bounds = PRICE_BANDS + (None,)
+    return [f'{low}-{high - 1}' if high else f'{low}+' for low, high in zip(bounds, bounds[1:])]
+
+PRICE_BAND_LABELS = _price_band_labels()
+
+def _bedrooms_bucket():
+    return case((Housing.bedrooms >= MAX_BEDROOM_BUCKET, MAX_BEDROOM_BUCKET), else_=Housing.bedrooms)
+
+def _price_band():
+    return case(
+        *[(Housing.price >= low, index) for index, low in reversed(list(enumerate(PRICE_BANDS)))],
+        else_=0
+    )
+
+# Facet name -> (grouping expression builder, label for a grouped value)
+FACETS = {
+    'property_type': (lambda: Housing.property_type, lambda value: value),
+    'bedrooms': (_bedrooms_bucket, lambda value: f'{value}+' if value == MAX_BEDROOM_BUCKET else str(value)),
+    'price_band': (_price_band, lambda value: PRICE_BAND_LABELS[value]),
+    'pet_friendly': (lambda: Housing.pet_friendly, bool),
+    'parking_available': (lambda: Housing.parking_available, bool)
+}
+
+def parse_facets(value):
+    """Split a comma-separated facets= argument; raises ValueError naming unknown facets"""
+    if not value:
+        return []
+    
+    names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = set(names) - set(FACETS)
+    if unknown:
+        raise ValueError(f'Unknown facets: {", ".join(sorted(unknown))}')
+    return names
+
+def facet_counts(query, names, ids=None):
+    """Count a Housing query's matches per value of each named facet.
+    
+    One GROUP BY over every requested facet at once returns a row per
+    combination of values, which are summed per facet here; the number of
+    combinations is bounded by the buckets, not the listing count. With ids
+    (e.g. the listings left after a commute limit), only those matches are
+    counted, one grouped query per ID_CHUNK_SIZE ids. Listings with no value
+    for a facet are left out of its counts. Returns
+    {name: [{'value': ..., 'count': n}, ...]}, most common first for
+    property_type and in bucket order otherwise.
+    """
+    expressions = [FACETS[name][0]().label(name) for name in names]
+    grouped = query.order_by(None).with_entities(*expressions, func.count()).group_by(*expressions)
+    if ids is None:
+        rows = grouped.all()
+    else:
+        rows = [
+            row
+            for start in range(0, len(ids), ID_CHUNK_SIZE)
+            for row in grouped.filter(Housing.id.in_(ids[start:start + ID_CHUNK_SIZE])).all()
+        ]
+    
+    counts = {name: {} for name in names}
+    for row in rows:
+        *values, count = row
+        for name, value in zip(names, values):
+            if value is not None:
+                counts[name][value] = counts[name].get(value, 0) + count
+    
+    result = {}
+    for name in names:
+        label = FACETS[name][1]
+        if name == 'property_type':
+            ordered = sorted(counts[name].items(), key=lambda item: (-item[1], item[0]))
+        else:
+            ordered = sorted(counts[name].items())
+        result[name] = [{'value': label(value), 'count': count} for value, count in ordered]
+    return result
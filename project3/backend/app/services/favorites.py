@@ -0,0 +1,170 @@
+from app import db
+from app.models.favorite import Favorite
+from app.models.housing import Housing
+from app.utils.db import dialect_insert
+from datetime import datetime
+from sqlalchemy import case, delete, literal, update
+import uuid
+
+MAX_FAVORITES_BATCH = 100
+UPDATABLE_FIELDS = ('notes', 'priority', 'visit_date')
+
+def add_favorites(user_id, items):
+    """Favorite many listings at once, returning a result per item in request order.
+    
+    Housing ids are checked with one IN query and written with one INSERT
+    ... ON CONFLICT DO NOTHING on (user_id, housing_id), so listings that
+    were already favorited, even by a concurrent request, come back as
+    'exists'. The caller commits.
+    """
+    results = [None] * len(items)
+    wanted = {}  # housing_id -> index of the item asking for it
+    for index, item in enumerate(items):
+        housing_id = item.get('housing_id') if isinstance(item, dict) else None
+        _, error = _parse_changes(item, ('notes', 'priority'))
+        if error:
+            pass
+        elif not housing_id or not isinstance(housing_id, str):
+            error = 'Housing ID is required'
+        elif housing_id in wanted:
+            error = 'Duplicate housing ID'
+        if error:
+            results[index] = {'housing_id': housing_id, 'status': 'invalid', 'error': error}
+        else:
+            wanted[housing_id] = index
+    
+    found = set()
+    if wanted:
+        found = {housing_id for housing_id, in db.session.query(Housing.id).filter(Housing.id.in_(wanted))}
+    
+    rows = [
+        {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'housing_id': housing_id,
+            'notes': items[index].get('notes'),
+            'priority': items[index].get('priority', 1),
+            'created_at': datetime.utcnow()
+        }
+        for housing_id, index in wanted.items() if housing_id in found
+    ]
+    if rows:
+        statement = dialect_insert(Favorite.__table__).on_conflict_do_nothing(index_elements=['user_id', 'housing_id'])
+        db.session.execute(statement, rows)
+        
+        # Rows that kept the id generated here are the ones this insert created
+        created = {row['id'] for row in rows}
+        favorites = Favorite.query.filter(Favorite.user_id == user_id, Favorite.housing_id.in_(found))
+        for favorite in favorites:
+            results[wanted[favorite.housing_id]] = {
+                'housing_id': favorite.housing_id,
+                'status': 'created' if favorite.id in created else 'exists',
+                'favorite': favorite.to_dict()
+            }
+    
+    for housing_id, index in wanted.items():
+        if housing_id not in found:
+            results[index] = {'housing_id': housing_id, 'status': 'not_found', 'error': 'Housing not found'}
+    return results
+
+def update_favorites(user_id, items):
+    """Apply notes/priority/visit_date changes to many favorites with one UPDATE, returning a result per item.
+    
+    Each column is set through a CASE on the favorite id, so favorites
+    changing different fields to different values still share the
+    statement. The caller commits.
+    """
+    results = [None] * len(items)
+    wanted = {}  # favorite id -> (index, changes)
+    for index, item in enumerate(items):
+        favorite_id = item.get('id') if isinstance(item, dict) else None
+        changes, error = _parse_changes(item, UPDATABLE_FIELDS)
+        if error:
+            pass
+        elif not favorite_id or not isinstance(favorite_id, str):
+            error = 'Favorite ID is required'
+        elif favorite_id in wanted:
+            error = 'Duplicate favorite ID'
+        elif not changes:
+            error = f'Nothing to update; send any of: {", ".join(UPDATABLE_FIELDS)}'
+        if error:
+            results[index] = {'id': favorite_id, 'status': 'invalid', 'error': error}
+        else:
+            wanted[favorite_id] = (index, changes)
+    
+    favorites = {}
+    if wanted:
+        favorites = {
+            favorite.id: favorite
+            for favorite in Favorite.query.filter(Favorite.user_id == user_id, Favorite.id.in_(wanted))
+        }
+    
+    if favorites:
+        values = {}
+        for field in UPDATABLE_FIELDS:
+            column = getattr(Favorite, field)
+            whens = {
+                favorite_id: literal(changes[field], column.type)
+                for favorite_id, (_, changes) in wanted.items()
+                if favorite_id in favorites and field in changes
+            }
+            if whens:
+                values[field] = case(whens, value=Favorite.id, else_=column)
+        db.session.execute(
+            update(Favorite).where(Favorite.user_id == user_id, Favorite.id.in_(favorites)).values(values)
+            .execution_options(synchronize_session=False)
+        )
+    
+    for favorite_id, (index, changes) in wanted.items():
+        favorite = favorites.get(favorite_id)
+        if favorite is None:
+            results[index] = {'id': favorite_id, 'status': 'not_found', 'error': 'Favorite not found'}
+            continue
+        data = favorite.to_dict()
+        data.update(changes)
+        if changes.get('visit_date'):
+            data['visit_date'] = changes['visit_date'].isoformat()
+        results[index] = {'id': favorite_id, 'status': 'updated', 'favorite': data}
+    return results
+
+def remove_favorites(user_id, favorite_ids):
+    """Delete many of the user's favorites with one DELETE, returning a result per id. The caller commits."""
+    wanted = {favorite_id for favorite_id in favorite_ids if isinstance(favorite_id, str)}
+    found = set()
+    if wanted:
+        found = {
+            favorite_id for favorite_id, in db.session.query(Favorite.id).filter(
+                Favorite.user_id == user_id, Favorite.id.in_(wanted)
+            )
+        }
+    if found:
+        db.session.execute(
+            delete(Favorite).where(Favorite.id.in_(found)).execution_options(synchronize_session=False)
+        )
+    
+    results = []
+    for favorite_id in favorite_ids:
+        if not isinstance(favorite_id, str):
+            results.append({'id': favorite_id, 'status': 'invalid', 'error': 'Favorite ID is required'})
+        elif favorite_id in found:
+            results.append({'id': favorite_id, 'status': 'deleted'})
+        else:
+            results.append({'id': favorite_id, 'status': 'not_found', 'error': 'Favorite not found'})
+    return results
+
+def _parse_changes(item, fields):
+    """Pick and check the favorite fields an item sets, returning (changes, error)"""
+    if not isinstance(item, dict):
+        return {}, 'Each item must be an object'
+    
+    changes = {field: item[field] for field in fields if field in item}
+    if 'priority' in changes:
+        priority = changes['priority']
+        if isinstance(priority, bool) or not isinstance(priority, int) or not 1 <= priority <= 5:
+            return changes, 'Priority must be an integer from 1 to 5'
+    if changes.get('visit_date') is not None:
+        try:
+            changes['visit_date'] = datetime.strptime(changes['visit_date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return changes, 'Invalid date format'
+    return changes, None
@@ -0,0 +1,86 @@
+from app import db
+from app.models.housing import Housing
+from sqlalchemy import DDL, and_, column, event, func, literal_column, or_, table, text
+import re
+
+# SQLite: an external-content FTS5 index over the housing rows, keyed on their
+# rowid and kept in sync by triggers, so ORM writes and the ingest's bulk
+# upserts are both covered. Porter stemming lets "balconies" match "balcony".
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS housing_fts USING fts5("
+    "title, description, amenities, content='housing', content_rowid='rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS housing_fts_insert AFTER INSERT ON housing BEGIN "
+    "INSERT INTO housing_fts(rowid, title, description, amenities) "
+    "VALUES (new.rowid, new.title, new.description, new.amenities); END",
+    "CREATE TRIGGER IF NOT EXISTS housing_fts_delete AFTER DELETE ON housing BEGIN "
+    "INSERT INTO housing_fts(housing_fts, rowid, title, description, amenities) "
+    "VALUES ('delete', old.rowid, old.title, old.description, old.amenities); END",
+    "CREATE TRIGGER IF NOT EXISTS housing_fts_update AFTER UPDATE OF title, description, amenities ON housing BEGIN "
+    "INSERT INTO housing_fts(housing_fts, rowid, title, description, amenities) "
+    "VALUES ('delete', old.rowid, old.title, old.description, old.amenities); "
+    "INSERT INTO housing_fts(rowid, title, description, amenities) "
+    "VALUES (new.rowid, new.title, new.description, new.amenities); END"
+)
+
+# PostgreSQL: a generated tsvector (title > description > amenities) under a GIN index
+POSTGRESQL_DDL = (
+    "ALTER TABLE housing ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(amenities::text, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_housing_search_vector ON housing USING gin (search_vector)"
+)
+
+# bm25 column weights for title, description and amenities
+SQLITE_WEIGHTS = (10.0, 3.0, 5.0)
+
+for statement in SQLITE_DDL:
+    event.listen(Housing.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRESQL_DDL:
+    event.listen(Housing.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+event.listen(Housing.__table__, 'after_drop', DDL('DROP TABLE IF EXISTS housing_fts').execute_if(dialect='sqlite'))
+
+housing_fts = table('housing_fts', column('rowid'))
+
+def search_terms(q):
+    """Words of a free-text query, lowercased; punctuation such as 'in-unit' splits words"""
+    return re.findall(r'\w+', (q or '').lower())
+
+def text_search(query, q):
+    """Restrict a Housing query to listings matching every word of q.
+    
+    Returns (query, relevance) where relevance is a column expression, higher
+    for better matches, that can be selected or ordered by alongside the
+    query's other filters. Raises ValueError when q has no words.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise ValueError('q must contain at least one word')
+    
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        match = ' '.join(f'"{term}"' for term in terms)
+        query = query.join(housing_fts, housing_fts.c.rowid == literal_column('housing.rowid')).filter(
+            literal_column('housing_fts').op('MATCH')(match)
+        )
+        # bm25 is lower for better matches
+        return query, -func.bm25(literal_column('housing_fts'), *SQLITE_WEIGHTS)
+    
+    if dialect == 'postgresql':
+        vector = literal_column('housing.search_vector')
+        tsquery = func.websearch_to_tsquery('english', ' '.join(terms))
+        return query.filter(vector.op('@@')(tsquery)), func.ts_rank_cd(vector, tsquery)
+    
+    # No inverted index elsewhere: unranked substring matching
+    return query.filter(and_(*[
+        or_(Housing.title.ilike(f'%{term}%'), Housing.description.ilike(f'%{term}%')) for term in terms
+    ])), literal_column('0')
+
+def rebuild_search_index():
+    """Create and repopulate the SQLite FTS index, e.g. for a database made before it existed or after VACUUM renumbered rowids"""
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return  # The PostgreSQL vector is a generated column
+    for statement in SQLITE_DDL:
+        db.session.execute(text(statement))
+    db.session.execute(text("INSERT INTO housing_fts(housing_fts) VALUES ('rebuild')"))
+    db.session.commit()
@@ -0,0 +1,217 @@
+from app import db
+from app.models.commute import Commute
+from app.models.commute_matrix import CommuteMatrix
+from app.models.favorite import Favorite
+from app.models.housing import Housing
+from app.services.cache import cache
+from app.services.location_index import city_index
+from app.utils.db import dialect_insert
+from app.utils.geo import geohash_encode
+from app.utils.text import normalize_location
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import tuple_
+import csv
+import itertools
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+REQUIRED_FIELDS = ('source_id', 'title', 'address', 'city', 'state', 'zip_code', 'latitude', 'longitude', 'price')
+OPTIONAL_FIELDS = {
+    'description': str,
+    'bedrooms': int,
+    'bathrooms': float,
+    'square_feet': int,
+    'property_type': str,
+    'available_date': date.fromisoformat,
+    'images': list,
+    'amenities': list,
+    'pet_friendly': bool,
+    'parking_available': bool,
+    'furnished': bool
+}
+
+# Columns a re-ingested listing overwrites; id and created_at are kept
+UPDATE_COLUMNS = (
+    'title', 'address', 'city', 'state', 'zip_code', 'city_key', 'state_key',
+    'latitude', 'longitude', 'geohash', 'price'
+) + tuple(OPTIONAL_FIELDS)
+
+def read_records(path, fmt=None):
+    """Stream raw records from an NDJSON or CSV feed without loading the whole file"""
+    fmt = fmt or ('csv' if path.endswith('.csv') else 'ndjson')
+    
+    with open(path, newline='', encoding='utf-8') as feed:
+        if fmt == 'csv':
+            yield from csv.DictReader(feed)
+        elif fmt == 'ndjson':
+            for line in feed:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f'Unsupported feed format: {fmt}')
+
+def normalize_record(raw, source):
+    """Map a raw feed record to housing table values, or None if it is unusable"""
+    if any(raw.get(field) in (None, '') for field in REQUIRED_FIELDS):
+        return None
+    
+    try:
+        record = {
+            'source': source,
+            'source_id': str(raw['source_id']),
+            'title': str(raw['title']),
+            'address': str(raw['address']),
+            'city': str(raw['city']),
+            'state': str(raw['state']),
+            'zip_code': str(raw['zip_code']),
+            'latitude': float(raw['latitude']),
+            'longitude': float(raw['longitude']),
+            'price': int(float(raw['price']))
+        }
+        
+        for field, cast in OPTIONAL_FIELDS.items():
+            value = raw.get(field)
+            if value in (None, ''):
+                record[field] = False if cast is bool else None
+            elif cast is bool:
+                record[field] = value if isinstance(value, bool) else str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+            elif cast is list:
+                record[field] = value if isinstance(value, list) else _parse_list(value)
+            else:
+                record[field] = cast(value)
+    except (TypeError, ValueError):
+        return None
+    
+    # Core inserts bypass the ORM hooks, so derived columns are filled here
+    record['geohash'] = geohash_encode(record['latitude'], record['longitude'])
+    record['city_key'] = normalize_location(record['city'])
+    record['state_key'] = normalize_location(record['state'])
+    return record
+
+def upsert_listings(records):
+    """Insert or update a chunk of normalized records on (source, source_id)"""
+    # A key may only appear once per statement for ON CONFLICT DO UPDATE
+    deduped = {(record['source'], record['source_id']): record for record in records}
+    if not deduped:
+        return 0
+    
+    _forget_moved_commutes(deduped)
+    
+    statement = dialect_insert(Housing.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=['source', 'source_id'],
+        set_=dict(
+            {column: statement.excluded[column] for column in UPDATE_COLUMNS},
+            updated_at=datetime.utcnow()
+        )
+    )
+    db.session.execute(statement, list(deduped.values()))
+    return len(deduped)
+
+def _forget_moved_commutes(deduped):
+    """Drop shared commute estimates for listings the feed moved; Core upserts skip the ORM hook"""
+    existing = Housing.query.filter(
+        tuple_(Housing.source, Housing.source_id).in_(list(deduped))
+    ).with_entities(Housing.id, Housing.source, Housing.source_id, Housing.latitude, Housing.longitude)
+    
+    moved = [
+        row.id for row in existing
+        if (row.latitude, row.longitude) != (deduped[row.source, row.source_id]['latitude'],
+                                            deduped[row.source, row.source_id]['longitude'])
+    ]
+    if moved:
+        db.session.execute(CommuteMatrix.__table__.delete().where(CommuteMatrix.housing_id.in_(moved)))
+
+def ingest_listings(path, source, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream a feed into the housing table chunk by chunk, committing each chunk.
+    
+    Returns counts and throughput for the run.
+    """
+    started = time.perf_counter()
+    stats = {'read': 0, 'upserted': 0, 'skipped': 0}
+    
+    records = read_records(path, fmt)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+        
+        normalized = [normalize_record(raw, source) for raw in chunk]
+        valid = [record for record in normalized if record is not None]
+        
+        stats['read'] += len(chunk)
+        stats['skipped'] += len(chunk) - len(valid)
+        stats['upserted'] += upsert_listings(valid)
+        db.session.commit()
+        
+        logger.info('Ingested %d rows from %s', stats['read'], path)
+    
+    # Bulk writes skip the ORM events, so invalidate cached responses here
+    if stats['upserted']:
+        if 'response_cache' in current_app.extensions:
+            cache.invalidate_housing()
+        city_index.rebuild()
+    
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    stats['rows_per_second'] = round(stats['read'] / stats['seconds']) if stats['seconds'] else stats['read']
+    return stats
+
+def configured_feeds():
+    """LISTING_FEEDS as [(source, path)]; the env form is 'zillow=/feeds/zillow.ndjson,realtor=/feeds/realtor.csv'"""
+    feeds = current_app.config.get('LISTING_FEEDS') or []
+    if isinstance(feeds, str):
+        feeds = [entry.split('=', 1) for entry in feeds.split(',') if '=' in entry]
+    return [(source.strip(), path.strip()) for source, path in feeds]
+
+def expire_listings(max_age_days, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Delete feed listings no ingest has refreshed within max_age_days; returns how many.
+    
+    Listings entered by hand (no source) and listings someone has favorited
+    are kept.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    favorited = Favorite.query.with_entities(Favorite.housing_id)
+    stale_ids = [
+        housing_id for (housing_id,) in Housing.query.filter(
+            Housing.source.isnot(None),
+            Housing.updated_at < cutoff,
+            Housing.id.notin_(favorited)
+        ).with_entities(Housing.id)
+    ]
+    
+    for start in range(0, len(stale_ids), chunk_size):
+        chunk = stale_ids[start:start + chunk_size]
+        # Bulk deletes skip ORM cascades (and SQLite skips ON DELETE), so dependents go first
+        Commute.query.filter(Commute.housing_id.in_(chunk)).delete(synchronize_session=False)
+        CommuteMatrix.query.filter(CommuteMatrix.housing_id.in_(chunk)).delete(synchronize_session=False)
+        Housing.query.filter(Housing.id.in_(chunk)).delete(synchronize_session=False)
+        db.session.commit()
+    
+    if stale_ids:
+        if 'response_cache' in current_app.extensions:
+            cache.invalidate_housing()
+        city_index.rebuild()
+    return len(stale_ids)
+
+def refresh_listings():
+    """Re-ingest every configured feed, then expire listings older than LISTING_MAX_AGE_DAYS"""
+    stats = {'feeds': {}, 'expired': 0}
+    for source, path in configured_feeds():
+        stats['feeds'][source] = ingest_listings(path, source)
+    
+    max_age_days = current_app.config.get('LISTING_MAX_AGE_DAYS')
+    if max_age_days:
+        stats['expired'] = expire_listings(max_age_days)
+    return stats
+
+def _parse_list(value):
+    value = str(value).strip()
+    if value.startswith('['):
+        return json.loads(value)
+    return [item.strip() for item in value.split('|') if item.strip()]
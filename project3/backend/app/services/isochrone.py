@@ -0,0 +1,136 @@
+from app.models.housing import Housing
+from app.services.cache import cache
+from app.services.commute import estimate_commutes, max_distance_for_commute
+from app.services.commute_matrix import work_cell
+from app.services.routing.graph import MODES as GRAPH_MODES, road_graph
+from app.utils.geo import MILES_PER_DEGREE_LAT, calculate_distances, geohash_cell_size, geohash_encode, merge_cell_ranges
+from collections import namedtuple
+from sqlalchemy import and_, or_
+import math
+import numpy as np
+
+ISOCHRONE_MODES = ('driving', 'transit', 'biking', 'walking')
+MINUTES_BUCKET = 5  # Isochrones are cached per 5 minutes of budget, rounded up
+ISOCHRONE_PRECISION = 6  # ~0.75 x 0.4 mile cells
+MAX_CELL_RANGES = 64  # Coarsen cells until the SQL filter stays this small
+
+Isochrone = namedtuple('Isochrone', ['source', 'minutes', 'precision', 'ranges'])
+
+def minutes_bucket(minutes):
+    return int(math.ceil(minutes / MINUTES_BUCKET) * MINUTES_BUCKET)
+
+def get_isochrone(work_lat, work_lng, minutes, mode):
+    """The geohash cell ranges reachable from work within `minutes`, cached per bucket.
+    
+    The cached area is built for the bucket's upper bound, so it is a superset
+    of the area for any budget within the bucket; callers check exact
+    commute times on the listings inside it.
+    """
+    graph = road_graph() if mode in GRAPH_MODES else None
+    source = 'graph' if graph is not None else 'estimate'
+    bucket = minutes_bucket(minutes)
+    cell_lat, cell_lng = work_cell(work_lat, work_lng)
+    
+    key = f'isochrone:{source}:{mode}:{cell_lat}:{cell_lng}:{bucket}'
+    cached = cache.get_isochrone(key)
+    if cached is not None:
+        return Isochrone(source, bucket, cached['precision'], [tuple(cell_range) for cell_range in cached['ranges']])
+    
+    if graph is not None:
+        nodes, _ = graph.reachable((work_lat, work_lng), mode, bucket)
+        cells = _cells_around(graph.lats[nodes], graph.lngs[nodes], ISOCHRONE_PRECISION)
+    else:
+        cells = _cells_in_circle(work_lat, work_lng, max_distance_for_commute(bucket, mode), ISOCHRONE_PRECISION)
+    
+    precision, ranges = _compact(cells, ISOCHRONE_PRECISION)
+    cache.set_isochrone(key, {'precision': precision, 'ranges': [list(cell_range) for cell_range in ranges]})
+    return Isochrone(source, bucket, precision, ranges)
+
+def isochrone_filter(isochrone):
+    """Filter selecting listings in the isochrone's cells via the Housing.geohash index"""
+    if not isochrone.ranges:
+        return Housing.id.is_(None)
+    return or_(*[and_(Housing.geohash >= low, Housing.geohash < high) for low, high in isochrone.ranges])
+
+def reachable_listings(query, work_lat, work_lng, minutes, mode):
+    """Return (isochrone, [(housing_id, minutes, miles)]) for listings within `minutes`, fastest first"""
+    isochrone = get_isochrone(work_lat, work_lng, minutes, mode)
+    rows = query.filter(isochrone_filter(isochrone)).with_entities(
+        Housing.id, Housing.latitude, Housing.longitude
+    ).all()
+    if not rows:
+        return isochrone, []
+    
+    ids = np.array([row.id for row in rows])
+    lats = [row.latitude for row in rows]
+    lngs = [row.longitude for row in rows]
+    
+    if isochrone.source == 'graph':
+        durations, distances = road_graph().one_to_many((work_lat, work_lng), lats, lngs, mode, cutoff_minutes=minutes)
+        keep = np.isfinite(durations)
+        durations = np.ceil(np.where(keep, durations, 0)).astype(np.int64)
+    else:
+        distances = calculate_distances(work_lat, work_lng, lats, lngs)
+        durations = estimate_commutes(distances, mode)['duration_minutes']
+        keep = durations <= minutes
+    
+    ids, durations, distances = ids[keep], durations[keep], distances[keep]
+    order = np.lexsort((ids, durations))
+    return isochrone, [(ids[i].item(), durations[i].item(), distances[i].item()) for i in order]
+
+def _cell_indices(lats, lngs, precision):
+    cell_lat, cell_lng = geohash_cell_size(precision)
+    rows = np.floor((np.asarray(lats, dtype=np.float64) + 90.0) / cell_lat).astype(np.int64)
+    cols = np.floor((np.asarray(lngs, dtype=np.float64) + 180.0) / cell_lng).astype(np.int64)
+    return rows, cols
+
+def _encode_cells(rows, cols, precision):
+    cell_lat, cell_lng = geohash_cell_size(precision)
+    rows = np.clip(rows, 0, int(round(180.0 / cell_lat)) - 1)
+    cols = np.mod(cols, int(round(360.0 / cell_lng)))
+    return {
+        geohash_encode(-90.0 + (row + 0.5) * cell_lat, -180.0 + (col + 0.5) * cell_lng, precision)
+        for row, col in set(zip(rows.tolist(), cols.tolist()))
+    }
+
+def _cells_around(lats, lngs, precision):
+    """Cells containing the given points plus one ring of neighbours.
+    
+    The ring covers listings that snap to a reachable node from a nearby
+    cell; listings further off the network than that are left out.
+    """
+    rows, cols = _cell_indices(lats, lngs, precision)
+    pairs = np.unique(np.stack([rows, cols], axis=1), axis=0)
+    offsets = np.array([(drow, dcol) for drow in (-1, 0, 1) for dcol in (-1, 0, 1)])
+    dilated = (pairs[:, None, :] + offsets[None, :, :]).reshape(-1, 2)
+    return _encode_cells(dilated[:, 0], dilated[:, 1], precision)
+
+def _cells_in_circle(lat, lng, radius_miles, precision):
+    """Cells with any part inside the circle"""
+    cell_lat, cell_lng = geohash_cell_size(precision)
+    lat_span = radius_miles / MILES_PER_DEGREE_LAT
+    lng_span = radius_miles / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    
+    (min_row, max_row), (min_col, max_col) = _cell_indices(
+        [lat - lat_span, lat + lat_span], [lng - lng_span, lng + lng_span], precision
+    )
+    rows, cols = np.meshgrid(np.arange(min_row, max_row + 1), np.arange(min_col, max_col + 1), indexing='ij')
+    rows, cols = rows.ravel(), cols.ravel()
+    
+    # A cell touches the circle if its center is within the radius plus half its diagonal
+    center_lats = -90.0 + (rows + 0.5) * cell_lat
+    center_lngs = -180.0 + (cols + 0.5) * cell_lng
+    half_diagonal = math.hypot(
+        cell_lat * MILES_PER_DEGREE_LAT, cell_lng * MILES_PER_DEGREE_LAT * math.cos(math.radians(lat))
+    ) / 2
+    inside = calculate_distances(lat, lng, center_lats, center_lngs) <= radius_miles + half_diagonal
+    return _encode_cells(rows[inside], cols[inside], precision)
+
+def _compact(cells, precision):
+    """Merge cells into prefix ranges, coarsening until there are at most MAX_CELL_RANGES"""
+    ranges = merge_cell_ranges(cells)
+    while len(ranges) > MAX_CELL_RANGES and precision > 1:
+        precision -= 1
+        cells = {cell[:precision] for cell in cells}
+        ranges = merge_cell_ranges(cells)
+    return precision, ranges
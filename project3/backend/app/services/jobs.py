@@ -0,0 +1,126 @@
+from app import db
+from app.models.job import Job
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def enqueue(task, params=None, key=None, user_id=None):
+    """Queue a job_task as a tracked Job; returns (job, created).
+    
+    While a job with the same key is queued or running, that job is returned
+    instead of queueing a duplicate; once it finishes the key can run again.
+    A job queued, or running without a heartbeat, for more than
+    JOB_STALE_MINUTES is presumed lost with its worker, marked failed, and no
+    longer holds the key. With task_always_eager the job has already run when
+    this returns.
+    """
+    params = params or {}
+    if key is not None:
+        existing = Job.query.filter_by(active_key=key).first()
+        if existing is not None:
+            if not _is_stale(existing):
+                return existing, False
+            logger.warning('Releasing stale job %s (%s)', existing.id, existing.status)
+            _finish(existing, 'failed', error=f'Abandoned while {existing.status}')
+            db.session.commit()
+    
+    job = Job(name=task.name, key=key, active_key=key, user_id=user_id, params=params)
+    try:
+        db.session.add(job)
+        db.session.commit()
+    except IntegrityError:
+        # Lost the race to a concurrent enqueue of the same key
+        db.session.rollback()
+        return Job.query.filter_by(active_key=key).one(), False
+    
+    try:
+        task.apply_async(args=[job.id], kwargs=params, task_id=job.id)
+    except Exception as e:
+        logger.exception('Failed to queue job %s', job.name)
+        _finish(job, 'failed', error=f'Could not queue job: {e}')
+        db.session.commit()
+        return job, True
+    
+    # An eager run committed through its own session
+    if task.app.conf.task_always_eager:
+        db.session.refresh(job)
+    return job, True
+
+def run_job(job_id, name, fn, params):
+    """Run fn(**params) for a Job, recording its status and result.
+    
+    A finished job is not run again when the broker redelivers it, including
+    one released as abandoned whose key may already belong to a newer job.
+    Runs started by the beat scheduler have no Job row yet and get one. While
+    fn runs, a thread refreshes heartbeat_at so long jobs are not presumed lost.
+    """
+    job = Job.query.get(job_id)
+    if job is None:
+        job = Job(id=job_id, name=name, params=params)
+        db.session.add(job)
+    elif job.status == 'succeeded':
+        return job.result
+    elif job.finished_at is not None:
+        logger.warning('Skipping job %s: already %s', job_id, job.status)
+        return None
+    
+    job.status = 'running'
+    job.started_at = job.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+    
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat, args=(current_app._get_current_object(), job_id, stop), daemon=True
+    )
+    heartbeat.start()
+    try:
+        result = fn(**params)
+    except Exception as e:
+        db.session.rollback()
+        _finish_running(job_id, 'failed', error=str(e))
+        raise
+    finally:
+        stop.set()
+        heartbeat.join()
+    
+    _finish_running(job_id, 'succeeded', result=result)
+    return result
+
+def _heartbeat(app, job_id, stop):
+    """Touch a running job's heartbeat_at every JOB_HEARTBEAT_SECONDS until stop is set"""
+    while not stop.wait(app.config['JOB_HEARTBEAT_SECONDS']):
+        with app.app_context():
+            try:
+                Job.query.filter_by(id=job_id, status='running').update({'heartbeat_at': datetime.utcnow()})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception('Could not record heartbeat for job %s', job_id)
+
+def _is_stale(job):
+    cutoff = datetime.utcnow() - timedelta(minutes=current_app.config['JOB_STALE_MINUTES'])
+    return (job.heartbeat_at or job.started_at or job.created_at) < cutoff
+
+def _finish(job, status, result=None, error=None):
+    job.status = status
+    job.result = result
+    job.error = error
+    job.finished_at = datetime.utcnow()
+    job.active_key = None
+
+def _finish_running(job_id, status, result=None, error=None):
+    """Record a run's outcome unless the job was released as abandoned meanwhile"""
+    finished = Job.query.filter_by(id=job_id, status='running').update({
+        'status': status,
+        'result': result,
+        'error': error,
+        'finished_at': datetime.utcnow(),
+        'active_key': None
+    })
+    db.session.commit()
+    if not finished:
+        logger.warning('Job %s %s after it was released as abandoned; keeping that status', job_id, status)
@@ -0,0 +1,465 @@
+from app import db
+from app.models.housing import Housing
+from app.services.cache import cache
+from app.services.search import commute_radius, rank_listings
+from app.utils.geo import bounding_box, calculate_distances
+from app.utils.pagination import cursor_pagination, decode_cursor, encode_cursor, paginate_list
+from app.utils.text import normalize_location
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+import fcntl
+import glob
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ID_DTYPE = 'S36'  # uuid4 strings sort the same as their bytes
+NUMERIC_COLUMNS = {
+    'price': np.int64,
+    'bedrooms': np.float64,  # NULL is NaN, which fails every comparison as it does in SQL
+    'bathrooms': np.float64,
+    'latitude': np.float64,
+    'longitude': np.float64
+}
+FLAG_COLUMNS = ('pet_friendly', 'parking_available')  # int8: 1, 0 or -1 for NULL
+ENCODED_COLUMNS = ('property_type', 'city_key', 'state_key', 'zip_code')  # int32 codes, -1 for NULL
+
+# Incremental refreshes re-read this much before the newest updated_at seen, so
+# rows from transactions that committed after a later timestamp are not missed
+UPDATED_AT_OVERLAP = timedelta(seconds=60)
+
+# Shared snapshot files: magic, header length, JSON header, then 64-byte aligned arrays
+SNAPSHOT_MAGIC = b'WTHSNAP1'
+ALIGNMENT = 64
+POINTER_NAME = 'CURRENT'  # Names the published file; its mtime is when the data was last checked
+LOCK_NAME = '.lock'
+KEEP_VERSIONS = 2
+
+class ListingSnapshot:
+    """Columnar copy of the housing columns search and nearby filter on.
+    
+    Rows are ordered by id. Strings are dictionary-encoded: each encoded
+    column holds int32 codes into a {value: code} dictionary. Snapshots are
+    never modified; a refresh builds a new one, so readers never see a
+    half-applied update.
+    """
+    
+    def __init__(self, ids, columns, dictionaries, watermark):
+        self.ids = ids
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.watermark = watermark  # Newest updated_at loaded
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @classmethod
+    def load(cls, query, dictionaries=None):
+        """Build a snapshot from a Housing query's rows, extending copies of existing dictionaries"""
+        names = ('id', 'updated_at') + tuple(NUMERIC_COLUMNS) + FLAG_COLUMNS + ENCODED_COLUMNS
+        rows = query.with_entities(*[getattr(Housing, name) for name in names]).order_by(None).all()
+        values = dict(zip(names, zip(*rows))) if rows else {name: () for name in names}
+        
+        ids = np.array(values['id'], dtype=ID_DTYPE)
+        order = np.argsort(ids, kind='stable')
+        
+        columns = {}
+        for name, dtype in NUMERIC_COLUMNS.items():
+            columns[name] = np.array(values[name], dtype=dtype)[order]
+        for name in FLAG_COLUMNS:
+            columns[name] = np.array([-1 if value is None else value for value in values[name]], dtype=np.int8)[order]
+        
+        dictionaries = {name: dict(dictionaries[name]) if dictionaries else {} for name in ENCODED_COLUMNS}
+        for name in ENCODED_COLUMNS:
+            codes = dictionaries[name]
+            columns[name] = np.array([
+                -1 if value is None else codes.setdefault(value, len(codes)) for value in values[name]
+            ], dtype=np.int32)[order]
+        
+        watermark = max((value for value in values['updated_at'] if value is not None), default=None)
+        return cls(ids[order], columns, dictionaries, watermark)
+    
+    def save(self, path):
+        """Write the snapshot as one file for open() to map.
+        
+        Every array is stored fixed-width at a 64-byte aligned offset. Each
+        dictionary is stored as a string offset table: the UTF-8 values back to
+        back plus an int64 array of where each one starts.
+        """
+        arrays = {'ids': self.ids, **self.columns}
+        for name, dictionary in self.dictionaries.items():
+            encoded = [value.encode() for value in dictionary]  # In code order
+            arrays[f'{name}.offsets'] = np.cumsum([0] + [len(value) for value in encoded], dtype=np.int64)
+            arrays[f'{name}.data'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': size}
+            size = _aligned(size + array.nbytes)
+        header = json.dumps({
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'arrays': layout
+        }).encode()
+        start = _aligned(len(SNAPSHOT_MAGIC) + 8 + len(header))
+        
+        with open(path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack('<Q', len(header)) + header)
+            for name, array in arrays.items():
+                f.seek(start + layout[name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(start + size)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    @classmethod
+    def open(cls, path):
+        """Map a file written by save() read-only; its arrays live in the page cache every process shares"""
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(buffer[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError(f'Not a listing snapshot: {path}')
+        header_length, = struct.unpack('<Q', bytes(buffer[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC) + 8]))
+        header = json.loads(bytes(buffer[len(SNAPSHOT_MAGIC) + 8:len(SNAPSHOT_MAGIC) + 8 + header_length]))
+        start = _aligned(len(SNAPSHOT_MAGIC) + 8 + header_length)
+        
+        arrays = {
+            name: np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']), buffer=buffer, offset=start + spec['offset'])
+            for name, spec in header['arrays'].items()
+        }
+        dictionaries = {}
+        for name in ENCODED_COLUMNS:
+            offsets = arrays.pop(f'{name}.offsets').tolist()
+            data = arrays.pop(f'{name}.data').tobytes()
+            dictionaries[name] = {
+                data[begin:end].decode(): code for code, (begin, end) in enumerate(zip(offsets, offsets[1:]))
+            }
+        
+        watermark = datetime.fromisoformat(header['watermark']) if header['watermark'] else None
+        return cls(arrays.pop('ids'), arrays, dictionaries, watermark)
+    
+    def merge(self, changed):
+        """A snapshot with changed's rows (loaded with this snapshot's dictionaries) replacing or adding to these.
+        
+        Returns this snapshot itself when nothing differs.
+        """
+        positions = np.searchsorted(self.ids, changed.ids)
+        found = positions < len(self)
+        found[found] = self.ids[positions[found]] == changed.ids[found]
+        keep = np.ones(len(self), dtype=bool)
+        keep[positions[found]] = False
+        
+        if found.all() and all(
+            np.array_equal(column[positions], changed.columns[name], equal_nan=column.dtype.kind == 'f')
+            for name, column in self.columns.items()
+        ):
+            return self  # Only re-read rows that did not change
+        
+        # Both sides are sorted by id, so inserting keeps the order without a re-sort
+        kept_ids = self.ids[keep]
+        at = np.searchsorted(kept_ids, changed.ids)
+        columns = {
+            name: np.insert(column[keep], at, changed.columns[name]) for name, column in self.columns.items()
+        }
+        watermark = max((value for value in (self.watermark, changed.watermark) if value is not None), default=None)
+        return ListingSnapshot(np.insert(kept_ids, at, changed.ids), columns, changed.dictionaries, watermark)
+    
+    def select(self, filters, user=None, near=None):
+        """Positions of the rows apply_search_filters(filters, user) would match, in id order.
+        
+        near=(lat, lng, miles) also keeps only rows inside that circle's
+        bounding box.
+        """
+        columns = self.columns
+        min_price = filters.get('min_price')
+        max_price = filters.get('max_price')
+        bedrooms = filters.get('bedrooms')
+        bathrooms = filters.get('bathrooms')
+        property_type = filters.get('property_type')
+        city = filters.get('city')
+        state = filters.get('state')
+        zip_code = filters.get('zip_code')
+        pet_friendly = filters.get('pet_friendly')
+        parking_available = filters.get('parking_available')
+        
+        mask = np.ones(len(self), dtype=bool)
+        if min_price:
+            mask &= columns['price'] >= min_price
+        if max_price:
+            mask &= columns['price'] <= max_price
+        if bedrooms:
+            mask &= columns['bedrooms'] >= bedrooms
+        if bathrooms:
+            mask &= columns['bathrooms'] >= bathrooms
+        if property_type:
+            mask &= self._matching('property_type', lambda value: value == property_type)
+        if city:
+            mask &= self._matching('city_key', _starts_with(normalize_location(city)))
+        if state:
+            mask &= self._matching('state_key', _starts_with(normalize_location(state)))
+        if zip_code:
+            mask &= self._matching('zip_code', _starts_with(zip_code.strip()))
+        if pet_friendly is not None:
+            mask &= columns['pet_friendly'] == int(pet_friendly)
+        if parking_available is not None:
+            mask &= columns['parking_available'] == int(parking_available)
+        
+        if user is not None:
+            if user.budget_min:
+                mask &= columns['price'] >= user.budget_min
+            if user.budget_max:
+                mask &= columns['price'] <= user.budget_max
+        
+        if near is not None:
+            min_lat, max_lat, min_lng, max_lng = bounding_box(*near)
+            mask &= (columns['latitude'] >= min_lat) & (columns['latitude'] <= max_lat)
+            mask &= (columns['longitude'] >= min_lng) & (columns['longitude'] <= max_lng)
+        
+        return np.flatnonzero(mask)
+    
+    def _matching(self, name, predicate):
+        """Mask of rows whose decoded value satisfies predicate; NULLs never match"""
+        dictionary = self.dictionaries[name]
+        table = np.zeros(len(dictionary) + 1, dtype=bool)  # The extra last slot is what code -1 reads
+        for value, code in dictionary.items():
+            table[code] = predicate(value)
+        return table[self.columns[name]]
+    
+    def housing_ids(self, rows):
+        return [housing_id.decode() for housing_id in self.ids[rows]]
+    
+    def find_nearby(self, lat, lng, radius_miles, filters=None, user=None):
+        """spatial_index.find_nearby over the rows matching filters: [(housing_id, distance_miles)], nearest first"""
+        rows = self.select(filters or {}, user, near=(lat, lng, radius_miles))
+        distances = calculate_distances(lat, lng, self.columns['latitude'][rows], self.columns['longitude'][rows])
+        inside = distances <= radius_miles
+        rows, distances = rows[inside], distances[inside]
+        
+        # Rows are in id order, so a stable sort breaks distance ties by id
+        order = np.argsort(distances, kind='stable')
+        return list(zip(self.housing_ids(rows[order]), distances[order].tolist()))
+    
+    def rank_by_commute(self, filters, user, max_commute=None, sort='score', route_type='driving'):
+        """search.rank_by_commute over the rows matching filters"""
+        near = None
+        if max_commute is not None:
+            near = (user.work_lat, user.work_lng, commute_radius(max_commute, route_type))
+        rows = self.select(filters, user, near)
+        
+        return rank_listings(
+            self.ids[rows].astype(str), self.columns['latitude'][rows], self.columns['longitude'][rows],
+            self.columns['price'][rows], user.work_lat, user.work_lng,
+            max_commute=max_commute, sort=sort, route_type=route_type
+        )
+    
+    def page(self, rows, page, per_page, by_price=False):
+        """(housing_ids, pagination) for one page of rows in id or (price, id) order"""
+        if by_price:
+            rows = self._by_price(rows)
+        page_rows, pagination = paginate_list(rows, page, per_page)
+        return self.housing_ids(page_rows), pagination
+    
+    def page_after(self, rows, cursor, per_page, include_total=False):
+        """(housing_ids, pagination) for the rows after a (price, id) cursor, the order keyset search pages in"""
+        if per_page < 1:
+            raise ValueError('per_page must be at least 1')
+        
+        rows = self._by_price(rows)
+        prices = self.columns['price'][rows]
+        
+        start = 0
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 2 or not isinstance(values[0], (int, float)) or not isinstance(values[1], str):
+                raise ValueError('Invalid cursor')
+            price, housing_id = values
+            # Within one price, rows are in id order
+            low, high = np.searchsorted(prices, price, 'left'), np.searchsorted(prices, price, 'right')
+            start = int(low + np.searchsorted(self.ids[rows[low:high]], housing_id.encode(), 'right'))
+        
+        page_rows = rows[start:start + per_page]
+        next_cursor = None
+        if start + per_page < len(rows):
+            last = page_rows[-1]
+            next_cursor = encode_cursor([self.columns['price'][last].item(), self.ids[last].decode()])
+        
+        total = len(rows) if include_total else None
+        return self.housing_ids(page_rows), cursor_pagination(per_page, next_cursor, total)
+    
+    def _by_price(self, rows):
+        return rows[np.argsort(self.columns['price'][rows], kind='stable')]
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _starts_with(prefix):
+    # An empty prefix matches any non-NULL value, like search._prefix_filter
+    return lambda value: value.startswith(prefix)
+
+class ListingSnapshotStore:
+    """Per-app listing snapshot that search and nearby filter in memory when LISTING_SNAPSHOT is on.
+    
+    A snapshot is served while the listings version is unchanged and it was
+    checked within LISTING_SNAPSHOT_MAX_LAG seconds. After that the next
+    request refreshes it from rows whose updated_at moved, reloading in full
+    when the row count shows deletes. Requests that arrive while another is
+    refreshing, or whose refresh fails, get None and query SQL instead.
+    
+    With LISTING_SNAPSHOT_PATH set, workers share snapshots through that
+    directory instead of each holding a copy. The worker that refreshes
+    writes a new versioned file and atomically repoints CURRENT at it; every
+    worker maps the current file read-only, so N workers share one copy in
+    the page cache and a new worker starts from the file, not a table load.
+    """
+    
+    def init_app(self, app):
+        app.config.setdefault('LISTING_SNAPSHOT', False)
+        app.config.setdefault('LISTING_SNAPSHOT_MAX_LAG', 5)
+        app.config.setdefault('LISTING_SNAPSHOT_PATH', None)
+        
+        app.extensions['listing_snapshot'] = {
+            'snapshot': None,
+            'file': None,  # Name of the mapped file in shared mode
+            'version': None,
+            'checked_at': 0.0,
+            'lock': threading.Lock()
+        }
+    
+    @property
+    def _state(self):
+        return current_app.extensions['listing_snapshot']
+    
+    def _fresh(self, state):
+        lag = time.time() - state['checked_at']
+        return (
+            state['snapshot'] is not None and state['version'] == cache.version()
+            and lag < current_app.config['LISTING_SNAPSHOT_MAX_LAG']
+        )
+    
+    def current(self):
+        """The snapshot if it is enabled and fresh (refreshing it when due), else None"""
+        if not current_app.config['LISTING_SNAPSHOT']:
+            return None
+        
+        state = self._state
+        if self._fresh(state):
+            return state['snapshot']
+        
+        if not state['lock'].acquire(blocking=False):
+            return None  # Another request is refreshing it
+        try:
+            return self._refresh(state)
+        except (SQLAlchemyError, OSError, ValueError):
+            logger.warning('Listing snapshot refresh failed, using SQL', exc_info=True)
+            db.session.rollback()
+            return None
+        finally:
+            state['lock'].release()
+    
+    def refresh(self, full=False):
+        """Bring the snapshot up to date now, waiting for any refresh in progress"""
+        state = self._state
+        with state['lock']:
+            return self._refresh(state, full, wait=True)
+    
+    def _refresh(self, state, full=False, wait=False):
+        version = cache.version()
+        directory = current_app.config['LISTING_SNAPSHOT_PATH']
+        if not directory:
+            state['snapshot'] = self._updated(state['snapshot'], full)
+            state['version'] = version
+            state['checked_at'] = time.time()
+            return state['snapshot']
+        
+        os.makedirs(directory, exist_ok=True)
+        with _file_lock(directory, wait) as locked:
+            if not locked:
+                return None  # Another process is refreshing the published snapshot
+            
+            # Start from whatever was published last, which may already be fresh
+            self._follow(state, directory)
+            if self._fresh(state) and not full:
+                return state['snapshot']
+            
+            snapshot = self._updated(state['snapshot'], full)
+            if snapshot is state['snapshot']:
+                os.utime(os.path.join(directory, POINTER_NAME))  # Unchanged: just record the check
+            else:
+                _publish(snapshot, directory)
+            
+            # Serve the mapped file, not this process's in-memory copy
+            self._follow(state, directory)
+            state['version'] = version
+            return state['snapshot']
+    
+    def _follow(self, state, directory):
+        """Map the published snapshot if it is newer than the one held"""
+        pointer = os.path.join(directory, POINTER_NAME)
+        try:
+            with open(pointer) as f:
+                name = f.read().strip()
+            checked_at = os.stat(pointer).st_mtime
+        except FileNotFoundError:
+            return
+        
+        if name != state['file']:
+            state['snapshot'] = ListingSnapshot.open(os.path.join(directory, name))
+            state['file'] = name
+            state['version'] = cache.version()
+        state['checked_at'] = checked_at
+    
+    def _updated(self, snapshot, full=False):
+        """snapshot brought up to date with the table, or a full load"""
+        if snapshot is None or snapshot.watermark is None or full:
+            return ListingSnapshot.load(Housing.query)
+        
+        changed = Housing.query.filter(Housing.updated_at >= snapshot.watermark - UPDATED_AT_OVERLAP)
+        updated = snapshot.merge(ListingSnapshot.load(changed, snapshot.dictionaries))
+        # Deletes leave no updated_at behind, but they make the row counts disagree
+        if len(updated) != Housing.query.count():
+            return ListingSnapshot.load(Housing.query)
+        return updated
+
+@contextmanager
+def _file_lock(directory, wait):
+    """Hold the directory's cross-process refresh lock, yielding False if it is taken and not waiting"""
+    with open(os.path.join(directory, LOCK_NAME), 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _publish(snapshot, directory):
+    """Write snapshot as a new version and point CURRENT at it, each step an atomic rename"""
+    name = f'listings-{time.time_ns()}.snap'
+    temporary = os.path.join(directory, f'.{name}.tmp')
+    snapshot.save(temporary)
+    os.replace(temporary, os.path.join(directory, name))
+    
+    pointer = os.path.join(directory, POINTER_NAME)
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer + '.tmp', pointer)
+    
+    # Workers still mapping an older file keep its pages until they move on
+    for old in sorted(glob.glob(os.path.join(directory, 'listings-*.snap')))[:-KEEP_VERSIONS]:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+
+listing_snapshot = ListingSnapshotStore()
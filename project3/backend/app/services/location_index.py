@@ -0,0 +1,89 @@
+from app import db
+from app.models.housing import Housing
+from app.services.cache import cache
+from app.utils.text import normalize_location
+from flask import current_app
+from sqlalchemy import func
+import threading
+import time
+
+MAX_SUGGESTIONS = 10
+REBUILD_INTERVAL_SECONDS = 60  # Coalesce rebuilds when listings change often
+
+class CityTrie:
+    """Prefix trie over normalized city names.
+    
+    Every node keeps the best MAX_SUGGESTIONS cities below it (most listings
+    first), so a lookup costs only the length of the prefix.
+    """
+    
+    def __init__(self, cities=()):
+        self.root = {'children': {}, 'top': []}
+        # Inserting in popularity order means each node's first entries are its best
+        for city in sorted(cities, key=lambda city: (-city['listings'], city['city'])):
+            self._insert(city)
+    
+    def _insert(self, city):
+        node = self.root
+        self._offer(node, city)
+        for char in normalize_location(city['city']):
+            node = node['children'].setdefault(char, {'children': {}, 'top': []})
+            self._offer(node, city)
+    
+    @staticmethod
+    def _offer(node, city):
+        if len(node['top']) < MAX_SUGGESTIONS:
+            node['top'].append(city)
+    
+    def search(self, prefix, limit=MAX_SUGGESTIONS):
+        key = normalize_location(prefix)
+        if key and prefix[-1].isspace():
+            key += ' '  # "san " has finished a word, so it should not match Santa Clara
+        
+        node = self.root
+        for char in key:
+            node = node['children'].get(char)
+            if node is None:
+                return []
+        return node['top'][:limit]
+
+class CityIndex:
+    """Per-app city trie, rebuilt from the housing table when listings change"""
+    
+    @property
+    def _state(self):
+        return current_app.extensions.setdefault('city_index', {
+            'trie': None,
+            'version': None,
+            'built_at': 0.0,
+            'lock': threading.Lock()
+        })
+    
+    def rebuild(self):
+        rows = db.session.query(
+            func.min(Housing.city), func.min(Housing.state), func.count(Housing.id)
+        ).group_by(Housing.city_key, Housing.state_key).all()
+        
+        trie = CityTrie(
+            {'city': city, 'state': state, 'listings': listings}
+            for city, state, listings in rows
+        )
+        state = self._state
+        with state['lock']:
+            state['trie'] = trie
+            state['version'] = cache.version()
+            state['built_at'] = time.monotonic()
+        return trie
+    
+    def search(self, prefix, limit=MAX_SUGGESTIONS):
+        state = self._state
+        with state['lock']:
+            trie = state['trie']
+            stale = state['version'] != cache.version()
+            due = time.monotonic() - state['built_at'] >= REBUILD_INTERVAL_SECONDS
+        
+        if trie is None or (stale and due):
+            trie = self.rebuild()
+        return trie.search(prefix, limit)
+
+city_index = CityIndex()
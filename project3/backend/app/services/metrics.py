@@ -0,0 +1,196 @@
+from collections import Counter
+from flask import Response, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import hmac
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Metrics:
+    """Per-request SQL and latency instrumentation exported in Prometheus format.
+    
+    Engine events count queries and DB time into the active request, request
+    hooks record a latency histogram per route, and a request that repeats
+    the same statement N_PLUS_ONE_THRESHOLD times is logged as a likely N+1.
+    Counters live in the process, so every series carries a worker label
+    (the pid) and gets summed across workers on the Prometheus side.
+    """
+    
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_RESPONSE_HEADERS', False)
+        app.config.setdefault('SLOW_QUERY_MS', 200)
+        app.config.setdefault('N_PLUS_ONE_THRESHOLD', 10)
+        app.config.setdefault('METRICS_TOKEN', None)
+        
+        app.extensions['metrics'] = {
+            'requests': {},
+            'queries': {},
+            'slow_queries': 0,
+            'n_plus_one': {},
+            'lock': threading.Lock()
+        }
+        
+        if not app.config['METRICS_ENABLED']:
+            return
+        
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.export)
+    
+    @property
+    def _state(self):
+        return current_app.extensions['metrics']
+    
+    def _start_request(self):
+        g.metrics = {'started': time.perf_counter(), 'queries': 0, 'db_time': 0.0, 'statements': Counter()}
+    
+    def _finish_request(self, response):
+        current = g.pop('metrics', None)
+        if current is None or request.endpoint == 'metrics':
+            return response
+        
+        elapsed = time.perf_counter() - current['started']
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        self._observe(request.method, route, response.status_code, elapsed, current)
+        
+        statement, repeats = (current['statements'].most_common(1) or [(None, 0)])[0]
+        if repeats >= current_app.config['N_PLUS_ONE_THRESHOLD']:
+            with self._state['lock']:
+                self._state['n_plus_one'][route] = self._state['n_plus_one'].get(route, 0) + 1
+            logger.warning('Possible N+1 on %s %s: statement ran %d times: %s', request.method, route, repeats, statement)
+        
+        if current_app.config['METRICS_RESPONSE_HEADERS']:
+            response.headers['X-Query-Count'] = str(current['queries'])
+            response.headers['Server-Timing'] = (
+                f"db;desc=\"{current['queries']} queries\";dur={current['db_time'] * 1000:.2f}, "
+                f'total;dur={elapsed * 1000:.2f}'
+            )
+        return response
+    
+    def _observe(self, method, route, status, elapsed, current):
+        state = self._state
+        with state['lock']:
+            series = state['requests'].setdefault(
+                (method, route, str(status)),
+                {'buckets': [0] * len(LATENCY_BUCKETS), 'count': 0, 'sum': 0.0}
+            )
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    series['buckets'][index] += 1
+            series['count'] += 1
+            series['sum'] += elapsed
+            
+            queries = state['queries'].setdefault(route, {'count': 0, 'seconds': 0.0})
+            queries['count'] += current['queries']
+            queries['seconds'] += current['db_time']
+    
+    def record_query(self, statement, duration):
+        """Attribute one executed statement to the current request"""
+        current = g.get('metrics')
+        if current is None:
+            return
+        
+        current['queries'] += 1
+        current['db_time'] += duration
+        current['statements'][statement] += 1
+        
+        if duration * 1000 >= current_app.config['SLOW_QUERY_MS']:
+            with self._state['lock']:
+                self._state['slow_queries'] += 1
+            logger.warning('Slow query (%.1f ms) on %s: %s', duration * 1000, request.path, statement)
+    
+    def snapshot(self):
+        state = self._state
+        with state['lock']:
+            return {
+                'requests': {key: dict(series, buckets=list(series['buckets'])) for key, series in state['requests'].items()},
+                'queries': {route: dict(totals) for route, totals in state['queries'].items()},
+                'slow_queries': state['slow_queries'],
+                'n_plus_one': dict(state['n_plus_one'])
+            }
+    
+    def export(self):
+        """Render every series in the Prometheus text exposition format"""
+        from app.services.cache import cache
+        
+        token = current_app.config['METRICS_TOKEN']
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return jsonify({'error': 'Unauthorized'}), 401
+        
+        worker = f'worker="{os.getpid()}"'
+        snapshot = self.snapshot()
+        lines = [
+            '# HELP worktohome_http_request_duration_seconds Request latency by route',
+            '# TYPE worktohome_http_request_duration_seconds histogram'
+        ]
+        for (method, route, status), series in sorted(snapshot['requests'].items()):
+            labels = f'method="{method}",route="{route}",status="{status}",{worker}'
+            for bound, count in zip(LATENCY_BUCKETS, series['buckets']):
+                lines.append(f'worktohome_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'worktohome_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+            lines.append(f'worktohome_http_request_duration_seconds_sum{{{labels}}} {series["sum"]:.6f}')
+            lines.append(f'worktohome_http_request_duration_seconds_count{{{labels}}} {series["count"]}')
+        
+        lines += [
+            '# HELP worktohome_db_queries_total SQL statements executed by route',
+            '# TYPE worktohome_db_queries_total counter'
+        ]
+        for route, totals in sorted(snapshot['queries'].items()):
+            lines.append(f'worktohome_db_queries_total{{route="{route}",{worker}}} {totals["count"]}')
+        
+        lines += [
+            '# HELP worktohome_db_query_seconds_total Time spent in SQL statements by route',
+            '# TYPE worktohome_db_query_seconds_total counter'
+        ]
+        for route, totals in sorted(snapshot['queries'].items()):
+            lines.append(f'worktohome_db_query_seconds_total{{route="{route}",{worker}}} {totals["seconds"]:.6f}')
+        
+        lines += [
+            '# HELP worktohome_db_slow_queries_total Statements slower than SLOW_QUERY_MS',
+            '# TYPE worktohome_db_slow_queries_total counter',
+            f'worktohome_db_slow_queries_total{{{worker}}} {snapshot["slow_queries"]}',
+            '# HELP worktohome_n_plus_one_total Requests that repeated one statement N_PLUS_ONE_THRESHOLD times',
+            '# TYPE worktohome_n_plus_one_total counter'
+        ]
+        for route, count in sorted(snapshot['n_plus_one'].items()):
+            lines.append(f'worktohome_n_plus_one_total{{route="{route}",{worker}}} {count}')
+        
+        cache_stats = cache.stats()
+        for outcome in ('hits', 'misses'):
+            lines += [
+                f'# HELP worktohome_cache_{outcome}_total Response cache {outcome} by namespace',
+                f'# TYPE worktohome_cache_{outcome}_total counter'
+            ]
+            for namespace, counts in sorted(cache_stats['namespaces'].items()):
+                lines.append(f'worktohome_cache_{outcome}_total{{namespace="{namespace}",{worker}}} {counts[outcome]}')
+        
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+metrics = Metrics()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    if has_request_context() and 'metrics' in current_app.extensions:
+        metrics.record_query(statement, duration)
+
+@event.listens_for(Engine, 'handle_error')
+def _discard_query_timer(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
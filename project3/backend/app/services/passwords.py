@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+import functools
+import os
+import threading
+
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:600000'  # Werkzeug's current default
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash operations are already queued"""
+
+def init_password_hashing(app):
+    app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    app.config.setdefault('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2))
+    app.config.setdefault('PASSWORD_HASH_MAX_PENDING', app.config['PASSWORD_HASH_WORKERS'] * 16)
+    
+    workers = app.config['PASSWORD_HASH_WORKERS']
+    app.extensions['passwords'] = {
+        'executor': ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash'),
+        'slots': threading.BoundedSemaphore(app.config['PASSWORD_HASH_MAX_PENDING'])
+    }
+
+def _run(fn, *args):
+    """Run a hash operation on the bounded hashing pool.
+    
+    Hashing is CPU-bound and releases the GIL, so a small pool caps how many
+    cores logins can take from other requests; callers beyond
+    PASSWORD_HASH_MAX_PENDING are turned away instead of tying up request
+    threads.
+    """
+    state = current_app.extensions.get('passwords')
+    if state is None:
+        return fn(*args)
+    
+    if not state['slots'].acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return state['executor'].submit(fn, *args).result()
+    finally:
+        state['slots'].release()
+
+def hash_password(password):
+    """Hash with the configured scheme; the parameters are stored in the hash"""
+    return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(password_hash, password):
+    if not password_hash:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """Whether a hash was made with different parameters than the configured scheme"""
+    return bool(password_hash) and password_hash.split('$', 1)[0] != _method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+
+@functools.lru_cache(maxsize=None)
+def _method_prefix(method):
+    """Fully expanded method string Werkzeug writes for `method`, e.g. 'scrypt' -> 'scrypt:32768:8:1'"""
+    return generate_password_hash('', method).split('$', 1)[0]
@@ -0,0 +1,103 @@
+from app.models.user import User
+from app.services.cache import LocalCache
+from collections import namedtuple
+from flask import current_app, has_app_context
+from flask_jwt_extended import create_access_token, get_jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+PROFILE_SOURCES = ('claims', 'cache', 'db')
+PREFERENCES_CLAIM = 'prefs'
+
+# Profile fields search, nearby and commute routes read on every request
+PREFERENCE_FIELDS = ('work_lat', 'work_lng', 'max_commute_time', 'budget_min', 'budget_max')
+
+UserPreferences = namedtuple('UserPreferences', ('id',) + PREFERENCE_FIELDS)
+
+class ProfileStore:
+    """Serves user profiles to hot routes without a User query per request.
+    
+    USER_PROFILE_SOURCE picks where preferences come from: 'db' (the
+    default) queries every time, 'claims' reads them from the access token
+    (update_profile returns a fresh token), and 'cache' keeps to_dict()
+    profiles in a per-process LRU that committed User writes invalidate.
+    Other processes' caches only catch up when entries expire after
+    USER_PROFILE_CACHE_TIMEOUT, so 'cache' suits single-process serving.
+    """
+    
+    def init_app(self, app):
+        app.config.setdefault('USER_PROFILE_SOURCE', 'db')
+        app.config.setdefault('USER_PROFILE_CACHE_SIZE', 10000)
+        app.config.setdefault('USER_PROFILE_CACHE_TIMEOUT', 60)
+        
+        if app.config['USER_PROFILE_SOURCE'] not in PROFILE_SOURCES:
+            raise ValueError(f"Unknown USER_PROFILE_SOURCE: {app.config['USER_PROFILE_SOURCE']}")
+        
+        app.extensions['user_profiles'] = LocalCache(
+            max_entries=app.config['USER_PROFILE_CACHE_SIZE'],
+            default_timeout=app.config['USER_PROFILE_CACHE_TIMEOUT']
+        )
+    
+    @property
+    def _source(self):
+        return current_app.config['USER_PROFILE_SOURCE']
+    
+    def access_token(self, user):
+        """Issue an access token, carrying preference claims in 'claims' mode"""
+        claims = {}
+        if self._source == 'claims':
+            claims[PREFERENCES_CLAIM] = {field: getattr(user, field) for field in PREFERENCE_FIELDS}
+        return create_access_token(identity=user.id, additional_claims=claims)
+    
+    def get_profile(self, user_id):
+        """The user's to_dict(), or None if they do not exist"""
+        # Only the 'cache' source uses the per-process LRU; claims mode reads
+        # full profiles (and pre-claims tokens) from the database
+        if self._source != 'cache':
+            user = User.query.get(user_id)
+            return user.to_dict() if user else None
+        
+        profiles = current_app.extensions['user_profiles']
+        profile = profiles.get(user_id)
+        if profile is None:
+            user = User.query.get(user_id)
+            if user is None:
+                return None
+            profile = user.to_dict()
+            profiles.set(user_id, profile)
+        return profile
+    
+    def get_preferences(self, user_id):
+        """UserPreferences for the current request's user, or None if they do not exist"""
+        if self._source == 'claims':
+            claims = get_jwt().get(PREFERENCES_CLAIM)
+            # Tokens issued before claims were enabled fall through to the database
+            if claims is not None:
+                return UserPreferences(user_id, **{field: claims.get(field) for field in PREFERENCE_FIELDS})
+        
+        profile = self.get_profile(user_id)
+        if profile is None:
+            return None
+        return UserPreferences(user_id, **{field: profile[field] for field in PREFERENCE_FIELDS})
+    
+    def invalidate(self, user_id):
+        current_app.extensions['user_profiles'].delete(user_id)
+
+profiles = ProfileStore()
+
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context):
+    for instance in list(session.dirty) + list(session.deleted):
+        if isinstance(instance, User):
+            session.info.setdefault('users_changed', set()).add(instance.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_profiles_on_commit(session):
+    changed = session.info.pop('users_changed', ())
+    if changed and has_app_context() and 'user_profiles' in current_app.extensions:
+        for user_id in changed:
+            profiles.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop('users_changed', None)
@@ -0,0 +1,8 @@
+from .engine import RoutingEngine, routing
+from .graph import RoadGraph, road_graph
+from .providers import EstimateProvider, GraphProvider, OsrmProvider, Route, UnsupportedRoute
+
+__all__ = [
+    'RoutingEngine', 'routing', 'RoadGraph', 'road_graph', 'EstimateProvider', 'GraphProvider',
+    'OsrmProvider', 'Route', 'UnsupportedRoute'
+]
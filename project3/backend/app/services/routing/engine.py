@@ -0,0 +1,128 @@
+from app.services.routing.graph import load_road_graph
+from app.services.routing.providers import EstimateProvider, GraphProvider, OsrmProvider, UnsupportedRoute
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+COORDINATE_PRECISION = 5  # ~1m; identical lookups within this are coalesced
+
+class RoutingEngine:
+    """Runs route lookups concurrently on a thread pool.
+    
+    Identical in-flight lookups share one provider call, each provider has its
+    own concurrency limit so a slow provider cannot occupy the whole pool, and
+    lookups the primary provider fails or cannot serve fall back to the
+    offline estimate.
+    """
+    
+    def init_app(self, app):
+        app.config.setdefault('ROUTING_PROVIDER', 'estimate')  # estimate, graph or osrm
+        app.config.setdefault('ROAD_GRAPH_PATH', None)
+        app.config.setdefault('OSRM_URL', 'http://localhost:5001')
+        app.config.setdefault('ROUTING_WORKERS', 16)
+        app.config.setdefault('ROUTING_MAX_CONCURRENCY', 8)  # Per provider
+        app.config.setdefault('ROUTING_TIMEOUT', 10)
+        
+        # Search ranking uses the road graph whenever one is configured
+        load_road_graph(app)
+        
+        limit = app.config['ROUTING_MAX_CONCURRENCY']
+        fallback = EstimateProvider(max_concurrency=limit)
+        if app.config['ROUTING_PROVIDER'] == 'graph':
+            if app.extensions['road_graph'] is None:
+                raise ValueError('ROUTING_PROVIDER=graph requires ROAD_GRAPH_PATH')
+            primary = GraphProvider(app.extensions['road_graph'], max_concurrency=limit)
+        elif app.config['ROUTING_PROVIDER'] == 'osrm':
+            primary = OsrmProvider(app.config['OSRM_URL'], app.config['ROUTING_TIMEOUT'], max_concurrency=limit)
+        elif app.config['ROUTING_PROVIDER'] == 'estimate':
+            primary = fallback
+        else:
+            raise ValueError(f"Unknown ROUTING_PROVIDER: {app.config['ROUTING_PROVIDER']}")
+        
+        app.extensions['routing'] = self._state(primary, fallback, app.config['ROUTING_WORKERS'])
+    
+    @staticmethod
+    def _state(primary, fallback, workers):
+        return {
+            'primary': primary,
+            'fallback': fallback,
+            'slots': {
+                provider.name: threading.BoundedSemaphore(provider.max_concurrency or workers)
+                for provider in (primary, fallback)
+            },
+            'executor': ThreadPoolExecutor(max_workers=workers, thread_name_prefix='routing'),
+            'inflight': {},
+            'lock': threading.Lock(),
+            'stats': {'lookups': 0, 'coalesced': 0, 'provider_calls': 0, 'fallbacks': 0}
+        }
+    
+    def route(self, origin, destination, route_type='driving'):
+        """Route one trip; returns a Route, or None when no provider could serve it"""
+        return self.route_many(origin, [(None, *destination)], route_type)[None]
+    
+    def route_many(self, origin, destinations, route_type='driving'):
+        """Route from origin to every (key, lat, lng) concurrently; returns {key: Route or None}"""
+        state = current_app.extensions['routing']
+        futures = {key: self._submit(state, origin, (lat, lng), route_type) for key, lat, lng in destinations}
+        wait(futures.values(), timeout=current_app.config['ROUTING_TIMEOUT'] * 2)
+        
+        routes = {}
+        for key, future in futures.items():
+            try:
+                routes[key] = future.result(timeout=0)
+            except Exception:
+                logger.warning('Route lookup failed for %s', key, exc_info=True)
+                routes[key] = None
+        return routes
+    
+    def stats(self):
+        state = current_app.extensions['routing']
+        with state['lock']:
+            return dict(state['stats'], inflight=len(state['inflight']), provider=state['primary'].name)
+    
+    def _submit(self, state, origin, destination, route_type):
+        key = (
+            round(origin[0], COORDINATE_PRECISION), round(origin[1], COORDINATE_PRECISION),
+            round(destination[0], COORDINATE_PRECISION), round(destination[1], COORDINATE_PRECISION),
+            route_type
+        )
+        with state['lock']:
+            state['stats']['lookups'] += 1
+            future = state['inflight'].get(key)
+            if future is not None:
+                state['stats']['coalesced'] += 1
+                return future
+            future = state['executor'].submit(self._lookup, state, origin, destination, route_type)
+            state['inflight'][key] = future
+        
+        def release(done):
+            with state['lock']:
+                if state['inflight'].get(key) is done:
+                    del state['inflight'][key]
+        
+        future.add_done_callback(release)
+        return future
+    
+    def _lookup(self, state, origin, destination, route_type):
+        primary, fallback = state['primary'], state['fallback']
+        try:
+            return self._call(state, primary, origin, destination, route_type)
+        except Exception as e:
+            if primary is fallback:
+                raise
+            if not isinstance(e, UnsupportedRoute):
+                logger.warning('%s routing failed, using estimate: %s', primary.name, e)
+            with state['lock']:
+                state['stats']['fallbacks'] += 1
+            return self._call(state, fallback, origin, destination, route_type)
+    
+    def _call(self, state, provider, origin, destination, route_type):
+        with state['slots'][provider.name]:
+            with state['lock']:
+                state['stats']['provider_calls'] += 1
+            return provider.route(origin, destination, route_type)
+
+routing = RoutingEngine()
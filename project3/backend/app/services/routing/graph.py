@@ -0,0 +1,373 @@
+from app.utils.geo import EARTH_RADIUS_MILES, calculate_distance
+from collections import OrderedDict
+from flask import current_app
+import csv
+import heapq
+import math
+import numpy as np
+import threading
+
+MODES = ('driving', 'walking', 'biking')
+MODE_BITS = {'driving': 1, 'walking': 2, 'biking': 4}
+MODE_SPEED_KPH = {'walking': 5.0, 'biking': 18.0}  # Driving uses each edge's speed
+DEFAULT_DRIVING_KPH = 50.0
+OFF_NETWORK_KPH = {'driving': 20.0, 'walking': 5.0, 'biking': 15.0}  # From a point to its nearest node
+KM_PER_MILE = 1.609344
+GRID_DEGREES = 0.01  # Snapping grid, ~1km cells
+MAX_SNAP_RINGS = 5
+CACHED_TREES = 64
+
+class RoadGraph:
+    """Road network in CSR arrays with per-mode travel times and ALT landmarks.
+    
+    Edges out of node v are indices[indptr[v]:indptr[v + 1]]; each mode has
+    its own seconds-per-edge array, infinite where the mode may not use the
+    edge. One-to-many queries run a single Dijkstra from the work location
+    (cached per source node), point-to-point queries run A* guided by
+    landmark distances.
+    """
+    
+    def __init__(self, lats, lngs, indptr, indices, lengths, weights, landmarks=None):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.lengths = np.asarray(lengths, dtype=np.float32)  # meters
+        self.weights = {mode: np.asarray(weights[mode], dtype=np.float32) for mode in MODES}  # seconds
+        self.landmarks = landmarks  # {mode: (forward, backward)} arrays of shape (landmarks, nodes)
+        
+        self._adjacency = {}
+        self._max_speed = {}
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_grid()
+    
+    @property
+    def node_count(self):
+        return len(self.lats)
+    
+    @classmethod
+    def from_edges(cls, lats, lngs, sources, targets, lengths=None, speeds=None, modes=None, oneway=None):
+        """Build from parallel edge arrays; two-way edges are added in both directions"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        count = len(sources)
+        
+        if lengths is None:
+            lengths = np.array([
+                calculate_distance(lats[s], lngs[s], lats[t], lngs[t]) * KM_PER_MILE * 1000
+                for s, t in zip(sources, targets)
+            ])
+        lengths = np.asarray(lengths, dtype=np.float64)
+        speeds = np.full(count, DEFAULT_DRIVING_KPH) if speeds is None else np.asarray(speeds, dtype=np.float64)
+        modes = np.full(count, sum(MODE_BITS.values())) if modes is None else np.asarray(modes, dtype=np.int64)
+        oneway = np.zeros(count, dtype=bool) if oneway is None else np.asarray(oneway, dtype=bool)
+        
+        # Add the reverse direction; one-way restrictions only bind drivers
+        reverse_modes = np.where(oneway, modes & ~MODE_BITS['driving'], modes)
+        back = reverse_modes != 0
+        sources, targets = np.concatenate([sources, targets[back]]), np.concatenate([targets, sources[back]])
+        lengths = np.concatenate([lengths, lengths[back]])
+        speeds = np.concatenate([speeds, speeds[back]])
+        modes = np.concatenate([modes, reverse_modes[back]])
+        
+        order = np.argsort(sources, kind='stable')
+        sources, targets, lengths, speeds, modes = sources[order], targets[order], lengths[order], speeds[order], modes[order]
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=len(lats)))])
+        
+        weights = {}
+        for mode in MODES:
+            speed = speeds if mode == 'driving' else MODE_SPEED_KPH[mode]
+            seconds = lengths / (speed * 1000 / 3600)
+            weights[mode] = np.where(modes & MODE_BITS[mode], seconds, np.inf)
+        
+        return cls(lats, lngs, indptr, targets, lengths, weights)
+    
+    @classmethod
+    def from_csv(cls, nodes_path, edges_path):
+        """Load an OSM-derived edge list.
+        
+        nodes: id,lat,lng
+        edges: source,target[,length_m][,speed_kph][,oneway][,modes] where modes
+        is e.g. "driving;walking" (all modes when empty) and oneway is 1/true/yes.
+        """
+        node_index = {}
+        lats, lngs = [], []
+        with open(nodes_path, newline='') as f:
+            for row in csv.DictReader(f):
+                node_index[row['id']] = len(lats)
+                lats.append(float(row['lat']))
+                lngs.append(float(row['lng']))
+        
+        sources, targets, lengths, speeds, modes, oneway = [], [], [], [], [], []
+        with open(edges_path, newline='') as f:
+            for row in csv.DictReader(f):
+                source, target = node_index[row['source']], node_index[row['target']]
+                sources.append(source)
+                targets.append(target)
+                lengths.append(
+                    float(row['length_m']) if row.get('length_m')
+                    else calculate_distance(lats[source], lngs[source], lats[target], lngs[target]) * KM_PER_MILE * 1000
+                )
+                speeds.append(float(row['speed_kph']) if row.get('speed_kph') else DEFAULT_DRIVING_KPH)
+                names = [name.strip() for name in (row.get('modes') or '').split(';') if name.strip()]
+                modes.append(sum(MODE_BITS[name] for name in names) if names else sum(MODE_BITS.values()))
+                oneway.append((row.get('oneway') or '').lower() in ('1', 'true', 'yes'))
+        
+        return cls.from_edges(lats, lngs, sources, targets, lengths, speeds, modes, oneway)
+    
+    def save(self, path):
+        arrays = {
+            'lats': self.lats, 'lngs': self.lngs, 'indptr': self.indptr,
+            'indices': self.indices, 'lengths': self.lengths
+        }
+        for mode in MODES:
+            arrays[f'weights_{mode}'] = self.weights[mode]
+            if self.landmarks:
+                arrays[f'landmarks_forward_{mode}'], arrays[f'landmarks_backward_{mode}'] = self.landmarks[mode]
+        np.savez(path, **arrays)
+    
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            landmarks = None
+            if 'landmarks_forward_driving' in data:
+                landmarks = {
+                    mode: (data[f'landmarks_forward_{mode}'], data[f'landmarks_backward_{mode}'])
+                    for mode in MODES
+                }
+            return cls(
+                data['lats'], data['lngs'], data['indptr'], data['indices'], data['lengths'],
+                {mode: data[f'weights_{mode}'] for mode in MODES}, landmarks
+            )
+    
+    def build_landmarks(self, count=8):
+        """Pick landmarks by farthest-point selection and store distances to and from them"""
+        reverse = self._reverse()
+        landmarks = {}
+        for mode in MODES:
+            chosen = [int(np.argmin(self.lats + self.lngs))]  # Start at a corner of the network
+            forward, backward = [], []
+            while len(chosen) <= count:
+                forward.append(self._dijkstra({chosen[-1]: 0.0}, mode)[0])
+                backward.append(self._dijkstra({chosen[-1]: 0.0}, mode, adjacency=reverse[mode])[0])
+                if len(chosen) == count:
+                    break
+                reached = np.array(forward).min(axis=0)
+                reached[~np.isfinite(reached)] = -1
+                chosen.append(int(np.argmax(reached)))
+            landmarks[mode] = (np.array(forward, dtype=np.float32), np.array(backward, dtype=np.float32))
+        self.landmarks = landmarks
+    
+    def max_speed_kph(self, mode):
+        if mode not in self._max_speed:
+            speed = MODE_SPEED_KPH.get(mode, DEFAULT_DRIVING_KPH)
+            usable = np.isfinite(self.weights[mode]) & (self.weights[mode] > 0)
+            if usable.any():
+                speed = float((self.lengths[usable] / self.weights[mode][usable]).max() * 3.6)
+            self._max_speed[mode] = speed
+        return self._max_speed[mode]
+    
+    def reach_radius_miles(self, minutes, mode):
+        """Straight-line bound on how far `minutes` of travel can get"""
+        return minutes / 60 * self.max_speed_kph(mode) / KM_PER_MILE
+    
+    def nearest_nodes(self, lats, lngs):
+        """Snap coordinates to the network; returns (node indices, straight-line miles to them)"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        nodes = np.empty(len(lats), dtype=np.int64)
+        offsets = np.empty(len(lats), dtype=np.float64)
+        
+        # Points sharing a grid cell share one candidate set and one distance matrix
+        cells = np.stack([np.floor(lats / GRID_DEGREES), np.floor(lngs / GRID_DEGREES)], axis=1).astype(np.int64)
+        unique_cells, groups = np.unique(cells, axis=0, return_inverse=True)
+        for group, (row, col) in enumerate(unique_cells.tolist()):
+            members = np.flatnonzero(groups.ravel() == group)
+            candidates = self._grid_candidates(row, col)
+            distances = _distance_matrix(lats[members], lngs[members], self.lats[candidates], self.lngs[candidates])
+            best = distances.argmin(axis=1)
+            nodes[members] = candidates[best]
+            offsets[members] = distances[np.arange(len(members)), best]
+        return nodes, offsets
+    
+    def one_to_many(self, origin, lats, lngs, mode, cutoff_minutes=None):
+        """Travel (minutes, miles) from origin to every point in one search.
+        
+        Unreachable points, or points beyond cutoff_minutes, get inf.
+        """
+        (source,), (source_offset,) = self.nearest_nodes([origin[0]], [origin[1]])
+        seconds, meters = self._tree(int(source), mode, cutoff_minutes)
+        
+        targets, target_offsets = self.nearest_nodes(lats, lngs)
+        leg_seconds = (source_offset + target_offsets) / (OFF_NETWORK_KPH[mode] / KM_PER_MILE) * 3600
+        minutes = (seconds[targets] + leg_seconds) / 60
+        miles = meters[targets] / 1000 / KM_PER_MILE + source_offset + target_offsets
+        if cutoff_minutes is not None:
+            minutes[minutes > cutoff_minutes] = np.inf
+        miles[~np.isfinite(minutes)] = np.inf
+        return minutes, miles
+    
+    def reachable(self, origin, mode, cutoff_minutes):
+        """Nodes reachable from origin within cutoff_minutes, as (node indices, minutes)"""
+        (source,), (source_offset,) = self.nearest_nodes([origin[0]], [origin[1]])
+        seconds, _ = self._tree(int(source), mode, cutoff_minutes)
+        minutes = seconds / 60 + source_offset / (OFF_NETWORK_KPH[mode] / KM_PER_MILE) * 60
+        nodes = np.flatnonzero(minutes <= cutoff_minutes)
+        return nodes, minutes[nodes]
+    
+    def shortest_path(self, origin, destination, mode):
+        """A* with landmark bounds; returns (minutes, miles, [(lat, lng), ...]) or None if unreachable"""
+        nodes, offsets = self.nearest_nodes([origin[0], destination[0]], [origin[1], destination[1]])
+        source, target = int(nodes[0]), int(nodes[1])
+        heuristic = self._heuristic(target, mode)
+        indptr, indices, weights, lengths = self._adjacency_lists(mode)
+        
+        best = {source: 0.0}
+        meters = {source: 0.0}
+        previous = {source: None}
+        heap = [(heuristic[source], 0.0, source)]
+        done = set()
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if node in done:
+                continue
+            done.add(node)
+            for edge in range(indptr[node], indptr[node + 1]):
+                weight = weights[edge]
+                if weight == math.inf:
+                    continue
+                neighbor = indices[edge]
+                candidate = cost + weight
+                if candidate < best.get(neighbor, math.inf):
+                    best[neighbor] = candidate
+                    meters[neighbor] = meters[node] + lengths[edge]
+                    previous[neighbor] = node
+                    heapq.heappush(heap, (candidate + heuristic[neighbor], candidate, neighbor))
+        
+        if target not in best:
+            return None
+        
+        path = []
+        node = target
+        while node is not None:
+            path.append((float(self.lats[node]), float(self.lngs[node])))
+            node = previous[node]
+        path.reverse()
+        
+        leg_seconds = (offsets[0] + offsets[1]) / (OFF_NETWORK_KPH[mode] / KM_PER_MILE) * 3600
+        minutes = (best[target] + leg_seconds) / 60
+        miles = meters[target] / 1000 / KM_PER_MILE + offsets[0] + offsets[1]
+        return float(minutes), float(miles), [tuple(origin)] + path + [tuple(destination)]
+    
+    def _tree(self, source, mode, cutoff_minutes):
+        """Cached single-source search, as (seconds, meters) arrays over every node"""
+        key = (source, mode, cutoff_minutes)
+        with self._lock:
+            if key in self._trees:
+                self._trees.move_to_end(key)
+                return self._trees[key]
+        
+        cutoff = cutoff_minutes * 60 if cutoff_minutes is not None else math.inf
+        tree = self._dijkstra({source: 0.0}, mode, cutoff=cutoff)
+        with self._lock:
+            self._trees[key] = tree
+            while len(self._trees) > CACHED_TREES:
+                self._trees.popitem(last=False)
+        return tree
+    
+    def _dijkstra(self, sources, mode, cutoff=math.inf, adjacency=None):
+        indptr, indices, weights, lengths = adjacency or self._adjacency_lists(mode)
+        seconds = [math.inf] * self.node_count
+        meters = [math.inf] * self.node_count
+        heap = []
+        for node, cost in sources.items():
+            seconds[node] = cost
+            meters[node] = 0.0
+            heap.append((cost, node))
+        heapq.heapify(heap)
+        
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if cost > seconds[node]:
+                continue
+            for edge in range(indptr[node], indptr[node + 1]):
+                candidate = cost + weights[edge]
+                neighbor = indices[edge]
+                if candidate < seconds[neighbor] and candidate <= cutoff:
+                    seconds[neighbor] = candidate
+                    if lengths is not None:
+                        meters[neighbor] = meters[node] + lengths[edge]
+                    heapq.heappush(heap, (candidate, neighbor))
+        
+        return np.array(seconds), np.array(meters)
+    
+    def _heuristic(self, target, mode):
+        """Lower bounds on seconds from every node to target via the triangle inequality"""
+        if not self.landmarks:
+            return [0.0] * self.node_count
+        forward, backward = self.landmarks[mode]
+        with np.errstate(invalid='ignore'):
+            bounds = np.maximum(forward[:, target, None] - forward, backward - backward[:, target, None])
+        bounds = np.nan_to_num(bounds, nan=0.0, posinf=np.inf, neginf=0.0).max(axis=0)
+        return np.maximum(bounds, 0).tolist()
+    
+    def _adjacency_lists(self, mode):
+        # Plain lists index far faster than NumPy scalars inside the search loop
+        if mode not in self._adjacency:
+            self._adjacency[mode] = (
+                self.indptr.tolist(), self.indices.tolist(), self.weights[mode].tolist(), self.lengths.tolist()
+            )
+        return self._adjacency[mode]
+    
+    def _reverse(self):
+        """Transposed adjacency lists per mode, for distances *to* a node"""
+        sources = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(self.indices, minlength=self.node_count))])
+        return {
+            mode: (indptr.tolist(), sources[order].tolist(), self.weights[mode][order].tolist(), None)
+            for mode in MODES
+        }
+    
+    def _build_grid(self):
+        cells = {}
+        rows = np.floor(self.lats / GRID_DEGREES).astype(np.int64)
+        cols = np.floor(self.lngs / GRID_DEGREES).astype(np.int64)
+        for node, cell in enumerate(zip(rows.tolist(), cols.tolist())):
+            cells.setdefault(cell, []).append(node)
+        self._grid = {cell: np.array(nodes) for cell, nodes in cells.items()}
+    
+    def _grid_candidates(self, row, col):
+        for rings in range(MAX_SNAP_RINGS + 1):
+            if self._grid_cells(row, col, rings):
+                # One more ring catches a closer node just across a cell edge
+                return np.concatenate(self._grid_cells(row, col, rings + 1))
+        return np.arange(self.node_count)
+    
+    def _grid_cells(self, row, col, rings):
+        return [
+            self._grid[(row + dr, col + dc)]
+            for dr in range(-rings, rings + 1) for dc in range(-rings, rings + 1)
+            if (row + dr, col + dc) in self._grid
+        ]
+
+def _distance_matrix(lats1, lngs1, lats2, lngs2):
+    """Haversine miles between every point of the first set and every point of the second"""
+    lat1, lng1 = np.radians(lats1)[:, None], np.radians(lngs1)[:, None]
+    lat2, lng2 = np.radians(lats2)[None, :], np.radians(lngs2)[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def load_road_graph(app):
+    """Load ROAD_GRAPH_PATH (a RoadGraph.save() .npz) into the app, if configured"""
+    path = app.config.get('ROAD_GRAPH_PATH')
+    app.extensions['road_graph'] = RoadGraph.load(path) if path else None
+
+def road_graph():
+    """The current app's road graph, or None when routing falls back to estimates"""
+    return current_app.extensions.get('road_graph')
@@ -0,0 +1,129 @@
+from app.services.routing.graph import MODES as GRAPH_MODES
+from app.utils.geo import calculate_distance, decode_polyline, encode_polyline
+from collections import namedtuple
+import math
+import requests
+
+METERS_PER_MILE = 1609.344
+
+Route = namedtuple('Route', (
+    'distance_miles', 'duration_minutes', 'traffic_duration_minutes',
+    'summary', 'polyline', 'waypoints'
+))
+
+class UnsupportedRoute(Exception):
+    """Raised by a provider that cannot route the requested mode"""
+
+class EstimateProvider:
+    """Offline provider: straight-line distance scaled to typical road circuity and mode speeds"""
+    
+    name = 'estimate'
+    
+    CIRCUITY = {'driving': 1.3, 'transit': 1.4, 'biking': 1.3, 'walking': 1.2}
+    SPEED_MPH = {'driving': 30, 'transit': 18, 'biking': 11, 'walking': 3}
+    PEAK_TRAFFIC_FACTOR = 1.35  # Commutes happen at rush hour
+    WAYPOINT_COUNT = 4
+    
+    def __init__(self, max_concurrency=None):
+        self.max_concurrency = max_concurrency
+    
+    def route(self, origin, destination, route_type):
+        if route_type not in self.SPEED_MPH:
+            raise UnsupportedRoute(route_type)
+        
+        distance = calculate_distance(*origin, *destination) * self.CIRCUITY[route_type]
+        duration = distance / self.SPEED_MPH[route_type] * 60
+        traffic = math.ceil(duration * self.PEAK_TRAFFIC_FACTOR) if route_type == 'driving' else None
+        
+        steps = self.WAYPOINT_COUNT - 1
+        waypoints = [
+            [origin[0] + (destination[0] - origin[0]) * i / steps, origin[1] + (destination[1] - origin[1]) * i / steps]
+            for i in range(self.WAYPOINT_COUNT)
+        ]
+        
+        return Route(
+            distance_miles=round(distance, 2),
+            duration_minutes=int(math.ceil(duration)),
+            traffic_duration_minutes=traffic,
+            summary=f'{distance:.1f} mi by {route_type} (estimated)',
+            polyline=encode_polyline(waypoints),
+            waypoints=waypoints
+        )
+
+class GraphProvider:
+    """Shortest paths on the local RoadGraph (see app.services.routing.graph)"""
+    
+    name = 'graph'
+    
+    MAX_WAYPOINTS = 10
+    
+    def __init__(self, graph, max_concurrency=None):
+        self.graph = graph
+        self.max_concurrency = max_concurrency
+    
+    def route(self, origin, destination, route_type):
+        if route_type not in GRAPH_MODES:
+            raise UnsupportedRoute(route_type)
+        
+        result = self.graph.shortest_path(origin, destination, route_type)
+        if result is None:
+            raise RuntimeError('No path on the road graph')
+        minutes, miles, path = result
+        
+        # The graph has no live traffic, so driving gets the same rush-hour factor as estimates
+        traffic = math.ceil(minutes * EstimateProvider.PEAK_TRAFFIC_FACTOR) if route_type == 'driving' else None
+        step = max(1, math.ceil(len(path) / self.MAX_WAYPOINTS))
+        waypoints = [list(point) for point in path[::step]]
+        if waypoints[-1] != list(path[-1]):
+            waypoints.append(list(path[-1]))
+        
+        return Route(
+            distance_miles=round(miles, 2),
+            duration_minutes=int(math.ceil(minutes)),
+            traffic_duration_minutes=traffic,
+            summary=f'{miles:.1f} mi by {route_type}',
+            polyline=encode_polyline(path),
+            waypoints=waypoints
+        )
+
+class OsrmProvider:
+    """Client for an OSRM-compatible /route/v1 HTTP service"""
+    
+    name = 'osrm'
+    
+    PROFILES = {'driving': 'driving', 'biking': 'bike', 'walking': 'foot'}
+    
+    def __init__(self, url, timeout=10, max_concurrency=None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.session = requests.Session()
+    
+    def route(self, origin, destination, route_type):
+        profile = self.PROFILES.get(route_type)
+        if profile is None:
+            raise UnsupportedRoute(route_type)
+        
+        coordinates = f'{origin[1]},{origin[0]};{destination[1]},{destination[0]}'
+        response = self.session.get(
+            f'{self.url}/route/v1/{profile}/{coordinates}',
+            params={'overview': 'simplified', 'geometries': 'polyline', 'steps': 'false'},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        if data.get('code') != 'Ok' or not data.get('routes'):
+            raise RuntimeError(f"OSRM returned {data.get('code')}")
+        
+        route = data['routes'][0]
+        distance = route['distance'] / METERS_PER_MILE
+        summary = route['legs'][0].get('summary') if route.get('legs') else None
+        
+        return Route(
+            distance_miles=round(distance, 2),
+            duration_minutes=int(math.ceil(route['duration'] / 60)),
+            traffic_duration_minutes=None,  # OSRM has no live traffic
+            summary=summary or f'{distance:.1f} mi by {route_type}',
+            polyline=route['geometry'],
+            waypoints=[list(point) for point in decode_polyline(route['geometry'])]
+        )
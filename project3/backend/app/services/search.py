@@ -0,0 +1,202 @@
+from app.models.housing import Housing
+from app.services.commute import estimate_commutes, max_distance_for_commute
+from app.services.routing.graph import MODES as GRAPH_MODES, road_graph
+from app.services.spatial_index import candidate_filter
+from app.utils.geo import calculate_distances, prefix_range
+from app.utils.text import normalize_location
+from collections import namedtuple
+from sqlalchemy import and_
+import numpy as np
+
+# Supported search filters and how to coerce their raw values
+SEARCH_FILTERS = {
+    'min_price': int,
+    'max_price': int,
+    'bedrooms': int,
+    'bathrooms': float,
+    'property_type': str,
+    'city': str,
+    'state': str,
+    'zip_code': str,
+    'pet_friendly': bool,
+    'parking_available': bool
+}
+
+SORT_OPTIONS = ('price', 'commute', 'score', 'relevance')  # relevance needs q=
+COMMUTE_SCORE_WEIGHT = 0.5  # Share of the score driven by commute vs price
+
+# sort_key is the ascending key the ranking is ordered by, usable as a cursor
+RankedListing = namedtuple(
+    'RankedListing', ['id', 'distance_miles', 'duration_minutes', 'score', 'sort_key', 'relevance'],
+    defaults=(None,)
+)
+
+def parse_search_filters(args):
+    """Read the supported search filters from request args or a JSON object.
+    
+    Values that fail to coerce are dropped, the same way request.args.get(type=...)
+    treats them.
+    """
+    filters = {}
+    for name, cast in SEARCH_FILTERS.items():
+        value = args.get(name)
+        if value is None:
+            continue
+        try:
+            filters[name] = cast(value)
+        except (TypeError, ValueError):
+            continue
+    return filters
+
+def apply_search_filters(query, filters, user=None):
+    """Apply search filters and the user's budget preferences to a Housing query"""
+    min_price = filters.get('min_price')
+    max_price = filters.get('max_price')
+    bedrooms = filters.get('bedrooms')
+    bathrooms = filters.get('bathrooms')
+    property_type = filters.get('property_type')
+    city = filters.get('city')
+    state = filters.get('state')
+    zip_code = filters.get('zip_code')
+    pet_friendly = filters.get('pet_friendly')
+    parking_available = filters.get('parking_available')
+    
+    if min_price:
+        query = query.filter(Housing.price >= min_price)
+    if max_price:
+        query = query.filter(Housing.price <= max_price)
+    if bedrooms:
+        query = query.filter(Housing.bedrooms >= bedrooms)
+    if bathrooms:
+        query = query.filter(Housing.bathrooms >= bathrooms)
+    if property_type:
+        query = query.filter(Housing.property_type == property_type)
+    # Case-insensitive prefix matches on the normalized columns stay index-friendly
+    if city:
+        query = query.filter(_prefix_filter(Housing.city_key, normalize_location(city)))
+    if state:
+        query = query.filter(_prefix_filter(Housing.state_key, normalize_location(state)))
+    if zip_code:
+        query = query.filter(_prefix_filter(Housing.zip_code, zip_code.strip()))
+    if pet_friendly is not None:
+        query = query.filter(Housing.pet_friendly == pet_friendly)
+    if parking_available is not None:
+        query = query.filter(Housing.parking_available == parking_available)
+    
+    # Apply user preferences if available
+    if user is not None:
+        if user.budget_min:
+            query = query.filter(Housing.price >= user.budget_min)
+        if user.budget_max:
+            query = query.filter(Housing.price <= user.budget_max)
+    
+    return query
+
+def _prefix_filter(column, prefix):
+    if not prefix:
+        return column.isnot(None)
+    low, high = prefix_range(prefix)
+    return and_(column >= low, column < high)
+
+def rank_by_relevance(query, relevance):
+    """Rank text-search matches by relevance (from fulltext.text_search) without commute data"""
+    rows = query.with_entities(Housing.id, relevance.label('relevance')).all()
+    ranked = sorted(rows, key=lambda row: (-row.relevance, row.id))
+    return [RankedListing(row.id, None, None, None, (-row.relevance, row.id), row.relevance) for row in ranked]
+
+def commute_radius(max_commute, route_type='driving'):
+    """Farthest straight-line miles a max_commute-minute trip can cover, for pruning candidates"""
+    graph = road_graph() if route_type in GRAPH_MODES else None
+    if graph is not None:
+        return graph.reach_radius_miles(max_commute, route_type)
+    return max_distance_for_commute(max_commute, route_type)
+
+def rank_by_commute(query, work_lat, work_lng, max_commute=None, sort='score', route_type='driving', relevance=None):
+    """Estimate commutes for every candidate and rank them.
+    
+    When max_commute is given, candidates are first pruned in the database to
+    the spatial cells within the farthest distance that commute allows. With a
+    text-search relevance expression, sort='relevance' ranks by it. See
+    rank_listings for the ranking itself.
+    """
+    if max_commute is not None:
+        query = query.filter(candidate_filter(work_lat, work_lng, commute_radius(max_commute, route_type)))
+    
+    columns = [Housing.id, Housing.latitude, Housing.longitude, Housing.price]
+    if relevance is not None:
+        columns.append(relevance.label('relevance'))
+    rows = query.with_entities(*columns).all()
+    if not rows:
+        return []
+    
+    return rank_listings(
+        [row.id for row in rows], [row.latitude for row in rows], [row.longitude for row in rows],
+        [row.price for row in rows], work_lat, work_lng, max_commute=max_commute, sort=sort,
+        route_type=route_type, relevances=[row.relevance for row in rows] if relevance is not None else None
+    )
+
+def rank_listings(ids, lats, lngs, prices, work_lat, work_lng, max_commute=None, sort='score', route_type='driving', relevances=None):
+    """Rank candidate listings given as parallel arrays by commute, price, score or relevance.
+    
+    With a road graph loaded, durations and distances come from one
+    shortest-path search over the network instead of straight-line estimates.
+    Returns RankedListing tuples in ranked order; score is 0-1 and higher is
+    better.
+    """
+    if not len(ids):
+        return []
+    
+    graph = road_graph() if route_type in GRAPH_MODES else None
+    ids = np.asarray(ids)
+    prices = np.asarray(prices, dtype=np.float64)
+    has_relevance = relevances is not None
+    relevances = np.asarray(relevances, dtype=np.float64) if has_relevance else np.zeros(len(ids))
+    distances = calculate_distances(work_lat, work_lng, lats, lngs)
+    durations = estimate_commutes(distances, route_type)['duration_minutes']
+    
+    if graph is not None:
+        minutes, road_miles = graph.one_to_many(
+            (work_lat, work_lng), lats, lngs, route_type, cutoff_minutes=max_commute
+        )
+        reached = np.isfinite(minutes)
+        if max_commute is not None:
+            # Beyond the cutoff (or off the network) means out of reach
+            durations = np.where(reached, np.ceil(np.where(reached, minutes, 0)), max_commute + 1).astype(np.int64)
+        else:
+            # Listings the network cannot reach keep their straight-line estimate
+            durations = np.where(reached, np.ceil(np.where(reached, minutes, 0)).astype(np.int64), durations)
+        distances = np.where(reached, road_miles, distances)
+    
+    if max_commute is not None:
+        keep = durations <= max_commute
+        ids, prices, distances, durations, relevances = ids[keep], prices[keep], distances[keep], durations[keep], relevances[keep]
+    
+    # Min-max normalise so price and commute weigh in on the same scale
+    def normalise(values):
+        spread = values.max() - values.min() if len(values) else 0
+        return (values - values.min()) / spread if spread else np.zeros_like(values, dtype=np.float64)
+    
+    scores = 1 - (
+        COMMUTE_SCORE_WEIGHT * normalise(durations.astype(np.float64))
+        + (1 - COMMUTE_SCORE_WEIGHT) * normalise(prices)
+    )
+    
+    # Ties always fall back to id so the ranking is stable across pages
+    if sort == 'price':
+        keys = (prices,)
+    elif sort == 'commute':
+        keys = (durations, distances)  # Whole minutes tie often; the nearer listing goes first
+    elif sort == 'relevance':
+        keys = (-relevances,)
+    else:
+        keys = (-scores,)
+    order = np.lexsort((ids, *reversed(keys)))
+    
+    return [
+        RankedListing(
+            ids[i].item(), distances[i].item(), durations[i].item(), scores[i].item(),
+            (*(key[i].item() for key in keys), ids[i].item()),
+            relevances[i].item() if has_relevance else None
+        )
+        for i in order
+    ]
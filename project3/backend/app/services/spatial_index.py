@@ -0,0 +1,46 @@
+from app.models.housing import Housing
+from app.utils.geo import bounding_box, calculate_distance, geohash_cover, prefix_range
+from sqlalchemy import and_, or_
+
+def candidate_filter(lat, lng, radius_miles):
+    """Build a filter selecting only listings in the geohash cells covering the circle.
+    
+    The prefix ranges hit the index on Housing.geohash; the bounding box then
+    trims candidates from the corners of the covering cells.
+    """
+    cell_ranges = []
+    for cell in sorted(geohash_cover(lat, lng, radius_miles)):
+        low, high = prefix_range(cell)
+        cell_ranges.append(and_(Housing.geohash >= low, Housing.geohash < high))
+    
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_miles)
+    
+    return and_(
+        or_(*cell_ranges),
+        Housing.latitude >= min_lat,
+        Housing.latitude <= max_lat,
+        Housing.longitude >= min_lng,
+        Housing.longitude <= max_lng
+    )
+
+def find_nearby(lat, lng, radius_miles, query=None):
+    """Return [(housing_id, distance_miles)] within the radius, nearest first.
+    
+    Only ids and coordinates are loaded for the candidates; callers fetch the
+    full rows for the page they actually return.
+    """
+    if query is None:
+        query = Housing.query
+    
+    candidates = query.filter(
+        candidate_filter(lat, lng, radius_miles)
+    ).with_entities(Housing.id, Housing.latitude, Housing.longitude)
+    
+    matches = []
+    for housing_id, housing_lat, housing_lng in candidates:
+        distance = calculate_distance(lat, lng, housing_lat, housing_lng)
+        if distance <= radius_miles:
+            matches.append((housing_id, distance))
+    
+    matches.sort(key=lambda match: (match[1], match[0]))
+    return matches
@@ -0,0 +1,36 @@
+from celery import Celery, Task, shared_task
+import functools
+
+def celery_init_app(app):
+    """Create the Celery app for this Flask app; tasks run inside its app context"""
+    class FlaskTask(Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+    
+    app.config.setdefault('LISTING_REFRESH_INTERVAL', 3600)
+    
+    celery_app = Celery(app.name, task_cls=FlaskTask)
+    celery_app.config_from_object(app.config['CELERY'])
+    celery_app.conf.beat_schedule = {
+        'refresh-listings': {'task': 'housing.refresh_listings', 'schedule': app.config['LISTING_REFRESH_INTERVAL']}
+    }
+    celery_app.set_default()
+    app.extensions['celery'] = celery_app
+    
+    # Register task modules
+    from app.tasks import commute, housing, ingest  # noqa: F401
+    
+    return celery_app
+
+def job_task(name):
+    """Declare a Celery task whose runs are tracked as Job rows; queue it with services.jobs.enqueue"""
+    def decorator(fn):
+        @shared_task(name=name, bind=True)
+        @functools.wraps(fn)
+        def task(self, job_id=None, **params):
+            from app.services.jobs import run_job
+            
+            return run_job(job_id or self.request.id, name, fn, params)
+        return task
+    return decorator
@@ -0,0 +1,12 @@
+from app.services.commute_matrix import precompute_for_location, recompute_favorite_commutes
+from app.tasks import job_task
+
+@job_task('commute.recompute_favorites')
+def recompute_favorites(user_id):
+    """Refresh a user's commutes to their favorites after their work location changes"""
+    return recompute_favorite_commutes(user_id)
+
+@job_task('commute.precompute_location')
+def precompute_location(work_lat, work_lng, radius_miles):
+    """Fill the commute matrix around a work location"""
+    return {'stored': precompute_for_location(work_lat, work_lng, radius_miles)}
@@ -0,0 +1,7 @@
+from app.services.ingest import refresh_listings
+from app.tasks import job_task
+
+@job_task('housing.refresh_listings')
+def refresh_listings_task():
+    """Re-ingest the configured feeds and expire listings they stopped carrying; run by celery beat"""
+    return refresh_listings()
@@ -0,0 +1,7 @@
+from app.services.ingest import DEFAULT_CHUNK_SIZE, ingest_listings
+from celery import shared_task
+
+@shared_task(name='ingest.listings')
+def ingest_listings_task(path, source, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Ingest a listing feed that is readable from the worker"""
+    return ingest_listings(path, source, fmt=fmt, chunk_size=chunk_size)
@@ -0,0 +1,50 @@
+from app import db
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy import event, insert
+import sqlite3
+
+# Applied to every SQLite connection; WAL lets readers run while a request writes
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',  # Durable at checkpoints, which is enough under WAL
+    'PRAGMA busy_timeout=5000',  # Wait for the write lock instead of raising "database is locked"
+    'PRAGMA cache_size=-65536',  # 64MB page cache
+    'PRAGMA temp_store=MEMORY'
+)
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for one worker process.
+    
+    The pool holds DB_POOL_SIZE connections (one per gunicorn thread) plus
+    DB_MAX_OVERFLOW for bursts, so the server opens at most
+    workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW). SQLite keeps SQLAlchemy's
+    default pool and gets SQLITE_PRAGMAS instead.
+    """
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],  # Under server/proxy idle timeouts
+        'pool_pre_ping': True  # Replace connections dropped by failovers or restarts
+    }
+
+def dialect_insert(table):
+    """Return an INSERT construct supporting ON CONFLICT on PostgreSQL and SQLite"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    return insert(table)
+
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
@@ -0,0 +1,169 @@
+import math
+import numpy as np
+
+EARTH_RADIUS_MILES = 3959
+MILES_PER_DEGREE_LAT = 69.0
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~5m cells, plenty for prefix lookups at any radius
+
+def calculate_distance(lat1, lng1, lat2, lng2):
+    """Calculate distance between two points"""
+    R = EARTH_RADIUS_MILES
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    return R * c
+
+def calculate_distances(lat, lng, lats, lngs):
+    """Vectorized calculate_distance from one point to arrays of points"""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lng2 = np.radians(np.asarray(lngs, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat/2)**2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlng/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
+    return EARTH_RADIUS_MILES * c
+
+def bounding_box(lat, lng, radius_miles):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing a radius around a point"""
+    lat_degree = radius_miles / MILES_PER_DEGREE_LAT
+    lng_degree = radius_miles / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - lat_degree, lat + lat_degree, lng - lng_degree, lng + lng_degree
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a base32 geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+    
+    while len(geohash) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        
+        if bit_count == 5:
+            geohash.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    
+    return ''.join(geohash)
+
+def geohash_cell_size(precision):
+    """Return the (lat_degrees, lng_degrees) spanned by a geohash cell"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+def geohash_precision_for_radius(lat, radius_miles):
+    """Pick the finest precision whose cells are at least radius_miles on each side.
+    
+    With cells that large, the cell containing the center plus its eight
+    neighbours is guaranteed to cover the whole circle.
+    """
+    lat_needed = radius_miles / MILES_PER_DEGREE_LAT
+    lng_needed = radius_miles / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lng = geohash_cell_size(precision)
+        if cell_lat >= lat_needed and cell_lng >= lng_needed:
+            return precision
+    return 1
+
+def geohash_cover(lat, lng, radius_miles):
+    """Return the set of geohash prefixes covering a circle around a point"""
+    precision = geohash_precision_for_radius(lat, radius_miles)
+    cell_lat, cell_lng = geohash_cell_size(precision)
+    
+    cells = set()
+    for dlat in (-cell_lat, 0, cell_lat):
+        for dlng in (-cell_lng, 0, cell_lng):
+            cell_center_lat = min(max(lat + dlat, -90.0), 90.0 - 1e-9)
+            cell_center_lng = (lng + dlng + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(cell_center_lat, cell_center_lng, precision))
+    return cells
+
+def prefix_range(prefix):
+    """Return (low, high) bounds matching every string starting with prefix.
+    
+    Range comparisons can use a plain B-tree index on every backend, unlike
+    LIKE 'prefix%' which SQLite only indexes under case-sensitive collation.
+    """
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def merge_cell_ranges(cells):
+    """Collapse same-precision geohash cells into as few (low, high) prefix ranges as possible.
+    
+    Cells that are consecutive in base32 order share one range, so a large
+    contiguous area costs a handful of index range scans rather than one per cell.
+    """
+    def value(cell):
+        total = 0
+        for char in cell:
+            total = total * 32 + GEOHASH_BASE32.index(char)
+        return total
+    
+    ranges = []
+    start = previous = None
+    for cell in sorted(cells, key=value):
+        if previous is not None and value(cell) == value(previous) + 1:
+            previous = cell
+            continue
+        if start is not None:
+            ranges.append((start, prefix_range(previous)[1]))
+        start = previous = cell
+    if start is not None:
+        ranges.append((start, prefix_range(previous)[1]))
+    return ranges
+
+def encode_polyline(points, precision=5):
+    """Encode [(lat, lng), ...] with the Google encoded polyline algorithm"""
+    factor = 10 ** precision
+    result = []
+    previous = (0, 0)
+    for lat, lng in points:
+        current = (int(round(lat * factor)), int(round(lng * factor)))
+        for value in (current[0] - previous[0], current[1] - previous[1]):
+            value = ~(value << 1) if value < 0 else value << 1
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        previous = current
+    return ''.join(result)
+
+def decode_polyline(polyline, precision=5):
+    """Inverse of encode_polyline"""
+    factor = 10 ** precision
+    points = []
+    index = lat = lng = 0
+    while index < len(polyline):
+        deltas = []
+        for _ in range(2):
+            shift = value = 0
+            while True:
+                byte = ord(polyline[index]) - 63
+                index += 1
+                value |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / factor, lng / factor))
+    return points
@@ -0,0 +1,36 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib provider is used without it
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Encodes responses with orjson, keeping Flask's conversions for other types.
+    
+    Datetimes are passed through to Flask's default hook so they render the
+    same as under the stdlib provider; call sites that want ISO strings
+    convert explicitly.
+    """
+    
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.options | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_json(app):
+    """Install the orjson provider when orjson is importable"""
+    if orjson is not None and app.config.get('JSON_FAST_PROVIDER', True):
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,114 @@
+from datetime import date, datetime
+from sqlalchemy import DateTime, tuple_
+import base64
+import binascii
+import bisect
+import json
+import math
+
+def paginate_list(items, page, per_page):
+    """Slice an already-ranked list, returning (page_items, pagination dict).
+    
+    The pagination dict has the same shape the routes build from query.paginate().
+    """
+    page = max(page, 1)
+    total = len(items)
+    pages = math.ceil(total / per_page) if per_page > 0 else 0
+    start = (page - 1) * per_page
+    
+    return items[start:start + per_page], {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': pages,
+        'has_next': page < pages,
+        'has_prev': page > 1
+    }
+
+def encode_cursor(values):
+    """Encode a sort key as an opaque, URL-safe cursor"""
+    values = [value.isoformat() if isinstance(value, (datetime, date)) else value for value in values]
+    payload = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor back into its sort key values, raising ValueError if malformed"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def cursor_pagination(per_page, next_cursor, total=None):
+    """Build the pagination dict returned in cursor mode"""
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }
+    if total is not None:
+        pagination['total'] = total
+    return pagination
+
+def keyset_paginate(query, columns, cursor, per_page, descending=False):
+    """Fetch the page after cursor from a query ordered by columns.
+    
+    The last column must be unique (normally the primary key) so the order is
+    total. Seeking with a row-value comparison instead of OFFSET keeps deep
+    pages as cheap as the first. Returns (items, next_cursor).
+    """
+    if per_page < 1:
+        raise ValueError('per_page must be at least 1')
+    
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise ValueError('Invalid cursor')
+        values = [_from_cursor_value(column, value) for column, value in zip(columns, values)]
+        key = tuple_(*columns)
+        query = query.filter(key < tuple(values) if descending else key > tuple(values))
+    
+    # One extra row tells us whether another page exists without a COUNT(*)
+    items = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    
+    return items, next_cursor
+
+def paginate_list_after(items, sort_key, cursor, per_page):
+    """Cursor pagination over an already-ranked list ordered ascending by sort_key.
+    
+    Returns (page_items, next_cursor).
+    """
+    if per_page < 1:
+        raise ValueError('per_page must be at least 1')
+    
+    keys = [tuple(sort_key(item)) for item in items]
+    start = 0
+    if cursor:
+        try:
+            start = bisect.bisect_right(keys, tuple(decode_cursor(cursor)))
+        except TypeError:
+            raise ValueError('Invalid cursor')
+    
+    page_items = items[start:start + per_page]
+    next_cursor = None
+    if start + per_page < len(items):
+        next_cursor = encode_cursor(keys[start + per_page - 1])
+    
+    return page_items, next_cursor
+
+def _from_cursor_value(column, value):
+    """Turn a JSON cursor value back into the Python type the column binds"""
+    if value is not None and isinstance(column.type, DateTime):
+        if not isinstance(value, str):
+            raise ValueError('Invalid cursor')
+        return datetime.fromisoformat(value)
+    return value
@@ -0,0 +1,47 @@
+from sqlalchemy import Date, DateTime, Time
+import functools
+
+def parse_fields(value, model):
+    """Split a comma-separated fields= argument; raises ValueError naming unknown fields"""
+    if not value:
+        return None
+    
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = set(fields) - set(model.SERIALIZED_FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    return fields
+
+def select_fields(query, model, fields=None, extra=()):
+    """Narrow an ORM query to plain row tuples of the serialized columns.
+    
+    `extra` columns (e.g. keyset or lookup keys) are selected after the
+    serialized ones, readable by name on each row but left out of
+    rows_to_dicts().
+    """
+    fields = tuple(fields) if fields else model.SERIALIZED_FIELDS
+    names = fields + tuple(name for name in extra if name not in fields)
+    return query.with_entities(*[getattr(model, name) for name in names])
+
+def rows_to_dicts(rows, model, fields=None):
+    """Build response dicts from select_fields() rows without hydrating ORM objects"""
+    fields = tuple(fields) if fields else model.SERIALIZED_FIELDS
+    temporal_fields = _temporal_fields(model)
+    temporal = [index for index, field in enumerate(fields) if field in temporal_fields]
+    
+    result = []
+    for row in rows:
+        values = list(row)
+        for index in temporal:
+            if values[index] is not None:
+                values[index] = values[index].isoformat()
+        result.append(dict(zip(fields, values)))
+    return result
+
+@functools.lru_cache(maxsize=None)  # Keyed on the model only, so one entry per model
+def _temporal_fields(model):
+    """Names of date/time columns, which are sent as ISO strings like to_dict()"""
+    return frozenset(
+        column.key for column in model.__table__.c
+        if isinstance(column.type, (Date, DateTime, Time))
+    )
@@ -0,0 +1,5 @@
+def normalize_location(value):
+    """Lowercase and collapse whitespace so location names compare exactly"""
+    if value is None:
+        return None
+    return ' '.join(str(value).split()).lower()
@@ -0,0 +1,60 @@
+"""Compare per-listing cost of /api/commute/calculate vs /api/commute/calculate-batch.
+
+Usage: python -m benchmarks.bench_commute_batch [listings]
+"""
+import random
+import sys
+import time
+
+from app import create_app, db
+from app.models.housing import Housing
+from app.models.user import User
+
+def seed(count):
+    rng = random.Random(42)
+    housing = [
+        Housing(
+            title=f'Listing {i}', address=f'{i} Main St', city='San Francisco',
+            state='CA', zip_code='94105', price=rng.randint(1000, 5000),
+            latitude=37.7749 + rng.uniform(-0.3, 0.3),
+            longitude=-122.4194 + rng.uniform(-0.3, 0.3)
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(housing)
+    db.session.commit()
+    return [h.id for h in housing]
+
+def main(count=200):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    client = app.test_client()
+    
+    with app.app_context():
+        db.create_all()
+        housing_ids = seed(count)
+        
+        response = client.post('/api/auth/register', json={
+            'email': 'bench@example.com', 'username': 'bench', 'password': 'password123'
+        })
+        token = response.get_json()['access_token']
+        user = User.query.filter_by(username='bench').first()
+        user.work_lat, user.work_lng = 37.7749, -122.4194
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        start = time.perf_counter()
+        for housing_id in housing_ids:
+            client.post('/api/commute/calculate', headers=headers, json={'housing_id': housing_id})
+        single = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        client.post('/api/commute/calculate-batch', headers=headers, json={'housing_ids': housing_ids})
+        batch = time.perf_counter() - start
+    
+    print(f'listings: {count}')
+    print(f'single endpoint: {single * 1000 / count:8.3f} ms/listing ({single:.3f}s total)')
+    print(f'batch endpoint:  {batch * 1000 / count:8.3f} ms/listing ({batch:.3f}s total)')
+    print(f'speedup:         {single / batch:8.1f}x')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,39 @@
+"""Measure logins/sec on one core for a few password hashing settings.
+
+Usage: python -m benchmarks.bench_login [logins] [method ...]
+"""
+import sys
+import time
+
+from app import create_app, db
+from app.models.user import User
+
+DEFAULT_METHODS = ['pbkdf2:sha256:600000', 'pbkdf2:sha256:210000', 'scrypt:32768:8:1', 'scrypt:16384:8:1']
+
+def logins_per_second(method, logins):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': method,
+        'PASSWORD_HASH_WORKERS': 1
+    })
+    client = app.test_client()
+    
+    with app.app_context():
+        db.create_all()
+        user = User(email='bench@example.com', username='bench')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        
+        start = time.perf_counter()
+        for _ in range(logins):
+            response = client.post('/api/auth/login', json={'email': 'bench@example.com', 'password': 'password123'})
+            assert response.status_code == 200
+        return logins / (time.perf_counter() - start)
+
+def main(logins=20, *methods):
+    for method in methods or DEFAULT_METHODS:
+        print(f'{method:<24}{logins_per_second(method, logins):>8.1f} logins/sec/core')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, *sys.argv[2:])
@@ -0,0 +1,50 @@
+"""Micro-benchmarks for hot helpers.
+
+Usage: python -m pytest benchmarks/bench_micro.py --benchmark-only
+"""
+from datetime import datetime
+import random
+
+import pytest
+
+from app.models.housing import Housing
+from app.utils.geo import calculate_distance, calculate_distances
+from app.utils.serialization import rows_to_dicts
+
+WORK_LAT, WORK_LNG = 37.7749, -122.4194
+
+@pytest.fixture(scope='module')
+def points():
+    rng = random.Random(42)
+    lats = [WORK_LAT + rng.uniform(-0.5, 0.5) for _ in range(10000)]
+    lngs = [WORK_LNG + rng.uniform(-0.5, 0.5) for _ in range(10000)]
+    return lats, lngs
+
+@pytest.fixture(scope='module')
+def housing():
+    return Housing(
+        id='bench', title='2 bed apartment', description='Bright unit', address='1 Market St',
+        city='San Francisco', state='CA', zip_code='94105', latitude=WORK_LAT, longitude=WORK_LNG,
+        price=2500, bedrooms=2, bathrooms=1.0, square_feet=900, property_type='apartment',
+        amenities=['gym', 'pool'], pet_friendly=True, parking_available=False, furnished=False
+    )
+
+def test_to_dict(benchmark, housing):
+    benchmark(housing.to_dict)
+
+def test_rows_to_dicts_projection(benchmark):
+    # One search page of fields= rows, as the list endpoints serialize them
+    fields = ('id', 'title', 'price', 'latitude', 'longitude', 'created_at')
+    rows = [('bench', '2 bed apartment', 2500, WORK_LAT, WORK_LNG, datetime(2024, 5, 1))] * 20
+    benchmark(rows_to_dicts, rows, Housing, fields)
+
+def test_calculate_distance(benchmark):
+    benchmark(calculate_distance, WORK_LAT, WORK_LNG, 37.8044, -122.2712)
+
+def test_calculate_distance_loop(benchmark, points):
+    lats, lngs = points
+    benchmark(lambda: [calculate_distance(WORK_LAT, WORK_LNG, lat, lng) for lat, lng in zip(lats, lngs)])
+
+def test_calculate_distances_vectorized(benchmark, points):
+    lats, lngs = points
+    benchmark(calculate_distances, WORK_LAT, WORK_LNG, lats, lngs)
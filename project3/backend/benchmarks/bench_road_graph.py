@@ -0,0 +1,70 @@
+"""Time RoadGraph queries on a synthetic street grid.
+
+Usage: python -m benchmarks.bench_road_graph [grid_size] [listings]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from app.services.routing.graph import RoadGraph
+
+STEP = 0.002  # ~200m blocks
+
+def build_grid(size, rng):
+    lats = [37.6 + row * STEP for row in range(size) for col in range(size)]
+    lngs = [-122.6 + col * STEP for row in range(size) for col in range(size)]
+    sources, targets, speeds = [], [], []
+    for row in range(size):
+        for col in range(size):
+            node = row * size + col
+            # Every tenth street is an arterial
+            for neighbor, arterial in ((node + 1, row % 10 == 0), (node + size, col % 10 == 0)):
+                if (neighbor == node + 1 and col + 1 < size) or (neighbor == node + size and row + 1 < size):
+                    sources.append(node)
+                    targets.append(neighbor)
+                    speeds.append(70 if arterial else rng.choice([30, 40, 50]))
+    return RoadGraph.from_edges(lats, lngs, sources, targets, speeds=speeds)
+
+def main(size=200, listings=10000):
+    rng = random.Random(42)
+    
+    start = time.perf_counter()
+    graph = build_grid(size, rng)
+    print(f'build {graph.node_count} nodes / {len(graph.indices)} edges: {time.perf_counter() - start:.2f}s')
+    
+    start = time.perf_counter()
+    graph.build_landmarks(8)
+    print(f'8 landmarks x {len(graph.weights)} modes: {time.perf_counter() - start:.2f}s')
+    
+    span = (size - 1) * STEP
+    work = (37.6 + span / 2, -122.6 + span / 2)
+    lats = np.array([37.6 + rng.uniform(0, span) for _ in range(listings)])
+    lngs = np.array([-122.6 + rng.uniform(0, span) for _ in range(listings)])
+    
+    start = time.perf_counter()
+    graph.one_to_many(work, lats, lngs, 'driving')
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    graph.one_to_many(work, lats, lngs, 'driving')
+    warm = time.perf_counter() - start
+    print(f'one-to-many, {listings} listings: {cold * 1000:.0f} ms cold, {warm * 1000:.0f} ms cached '
+          f'({cold / listings * 1e6:.0f} us/listing)')
+    
+    trips = [((lats[i], lngs[i]), (lats[i + 1], lngs[i + 1])) for i in range(0, 40, 2)]
+    start = time.perf_counter()
+    for origin, destination in trips:
+        graph.shortest_path(origin, destination, 'driving')
+    alt = (time.perf_counter() - start) / len(trips)
+    
+    landmarks, graph.landmarks = graph.landmarks, None
+    start = time.perf_counter()
+    for origin, destination in trips:
+        graph.shortest_path(origin, destination, 'driving')
+    plain = (time.perf_counter() - start) / len(trips)
+    graph.landmarks = landmarks
+    print(f'point-to-point: ALT {alt * 1000:.1f} ms, plain Dijkstra {plain * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,55 @@
+"""Compare ORM to_dict() + stdlib JSON against row tuples + orjson for one search page.
+
+Usage: python -m benchmarks.bench_serialization [rows] [repeats]
+"""
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app, db
+from app.models.housing import Housing
+from app.utils.json_provider import OrjsonProvider
+from app.utils.serialization import rows_to_dicts, select_fields
+from benchmarks.datagen import seed
+
+LIST_FIELDS = ['id', 'title', 'price', 'bedrooms', 'bathrooms', 'latitude', 'longitude', 'city']
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main(rows=100, repeats=200):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'CACHE_TYPE': 'null'})
+    stdlib = DefaultJSONProvider(app)
+    fast = OrjsonProvider(app)
+    
+    with app.app_context():
+        db.create_all()
+        seed(listings=rows * 10, users=0)
+        query = Housing.query.order_by(Housing.price).limit(rows)
+        
+        def orm_stdlib():
+            db.session.expire_all()
+            with app.test_request_context():
+                stdlib.response({'housing': [housing.to_dict() for housing in query.all()]})
+        
+        def rows_orjson():
+            with app.test_request_context():
+                fast.response({'housing': rows_to_dicts(select_fields(query, Housing).all(), Housing)})
+        
+        def rows_orjson_projected():
+            with app.test_request_context():
+                fast.response({'housing': rows_to_dicts(select_fields(query, Housing, LIST_FIELDS).all(), Housing, LIST_FIELDS)})
+        
+        baseline = timed(orm_stdlib, repeats)
+        print(f'{rows} rows per page, mean of {repeats} runs')
+        print(f'  ORM to_dict + stdlib json:      {baseline:.2f} ms')
+        for label, fn in (('row tuples + orjson:', rows_orjson), ('row tuples + orjson, projected:', rows_orjson_projected)):
+            elapsed = timed(fn, repeats)
+            print(f'  {label:<32}{elapsed:.2f} ms ({baseline / elapsed:.1f}x)')
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,130 @@
+"""Compare HTTP throughput of the Flask dev server and the gunicorn production profile.
+
+Usage: python -m benchmarks.bench_serving [--seconds 15] [--concurrency 16] [--database-url URL]
+
+Each server is started as a subprocess against the same SQLite file (seeded with
+benchmarks.datagen when empty) and driven over real sockets by a thread pool
+mixing search and nearby requests. Response caching is off so every request
+reaches the database.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.models.user import User
+from benchmarks.datagen import seed
+from benchmarks.loadtest import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    # What `python app.py` runs, minus the reloader's extra process
+    'dev': lambda port: [
+        sys.executable, '-c',
+        f"from wsgi import app; app.run(debug=True, use_reloader=False, host='127.0.0.1', port={port})"
+    ],
+    'production': lambda port: [
+        sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+        '--access-logfile', '/dev/null', 'wsgi:app'
+    ]
+}
+
+def prepare(database_url, listings, users):
+    """Seed the database if needed and return access tokens for its users"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+    with app.app_context():
+        db.create_all()
+        if not User.query.first():
+            seed(listings, users)
+        return [create_access_token(identity=user_id) for user_id, in db.session.query(User.id).limit(1000)]
+
+def wait_until_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url + '/metrics', timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {url} did not start')
+
+def drive(url, tokens, seconds, concurrency):
+    """Hammer the server from `concurrency` threads; returns requests/sec and latency percentiles"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+    
+    def client(worker):
+        rng = random.Random(worker)
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            headers = {'Authorization': f'Bearer {rng.choice(tokens)}'}
+            if rng.random() < 0.5:
+                path, params = '/api/housing/search', {'max_price': rng.randint(2000, 6000), 'bedrooms': rng.randint(0, 3)}
+            else:
+                path, params = '/api/housing/nearby', {'radius': rng.choice([2, 5, 10])}
+            start = time.perf_counter()
+            response = session.get(url + path, headers=headers, params=params)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code >= 400:
+                    errors[0] += 1
+    
+    threads = [threading.Thread(target=client, args=(worker,)) for worker in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    return {
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p99_ms': round(percentile(latencies, 99), 1),
+        'errors': errors[0]
+    }
+
+def run(mode, port, database_url, tokens, seconds, concurrency):
+    env = dict(os.environ, DATABASE_URL=database_url, CACHE_TYPE='null', FLASK_ENV='production')
+    server = subprocess.Popen(
+        SERVERS[mode](port), cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_ready(url)
+        drive(url, tokens, 2, concurrency)  # Warm up pools and caches
+        return drive(url, tokens, seconds, concurrency)
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=15)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--database-url', default='sqlite:////tmp/worktohome-serving.db')
+    parser.add_argument('--listings', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+    
+    tokens = prepare(args.database_url, args.listings, args.users)
+    
+    print(f"{'server':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for mode in SERVERS:
+        stats = run(mode, args.port, args.database_url, tokens, args.seconds, args.concurrency)
+        print(f"{mode:<12}{stats['requests_per_second']:>10}{stats['p50_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}")
+
+if __name__ == '__main__':
+    main()
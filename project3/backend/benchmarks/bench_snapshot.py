@@ -0,0 +1,77 @@
+"""Compare SQL filtering against the in-memory and memory-mapped listing snapshots for search filters.
+
+Usage: python -m benchmarks.bench_snapshot [listings] [repeats]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app import create_app, db
+from app.models.housing import Housing
+from app.services.listing_snapshot import ListingSnapshot
+from app.services.search import apply_search_filters
+from benchmarks.datagen import seed
+
+def random_filters(rng):
+    filters = {'max_price': rng.randint(1500, 5000)}
+    if rng.random() < 0.5:
+        filters['bedrooms'] = rng.randint(1, 3)
+    if rng.random() < 0.3:
+        filters['pet_friendly'] = True
+    if rng.random() < 0.3:
+        filters['city'] = rng.choice(['san', 'oak', 'berk'])
+    return filters
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main(listings=100000, repeats=50):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'CACHE_TYPE': 'null'})
+    
+    with app.app_context():
+        db.create_all()
+        seed(listings=listings, users=0)
+        
+        start = time.perf_counter()
+        snapshot = ListingSnapshot.load(Housing.query)
+        load_ms = (time.perf_counter() - start) * 1000
+        
+        rng = random.Random(7)
+        searches = [random_filters(rng) for _ in range(repeats)]
+        iterator = iter(searches * 3)
+        
+        def sql():
+            apply_search_filters(Housing.query, next(iterator)).with_entities(Housing.id).all()
+        
+        def in_memory():
+            snapshot.housing_ids(snapshot.select(next(iterator)))
+        
+        # What a new worker does with LISTING_SNAPSHOT_PATH: map the published file
+        path = os.path.join(tempfile.mkdtemp(), 'listings.snap')
+        snapshot.save(path)
+        start = time.perf_counter()
+        mapped = ListingSnapshot.open(path)
+        open_ms = (time.perf_counter() - start) * 1000
+        
+        def mapped_file():
+            mapped.housing_ids(mapped.select(next(iterator)))
+        
+        sql_ms = timed(sql, repeats)
+        snapshot_ms = timed(in_memory, repeats)
+        mapped_ms = timed(mapped_file, repeats)
+        
+        print(f'{listings} listings, mean of {repeats} random filter sets (matching ids only)')
+        print(f'  full snapshot load:  {load_ms:.0f} ms')
+        print(f'  SQL:                 {sql_ms:.2f} ms')
+        print(f'  snapshot:            {snapshot_ms:.2f} ms ({sql_ms / snapshot_ms:.1f}x)')
+        print(f'  snapshot, mask only: {timed(lambda: snapshot.select(searches[0]), repeats):.2f} ms')
+        print(f'  map shared file:     {open_ms:.1f} ms ({os.path.getsize(path) / 2 ** 20:.1f} MiB)')
+        print(f'  mapped snapshot:     {mapped_ms:.2f} ms')
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
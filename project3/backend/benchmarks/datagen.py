@@ -0,0 +1,144 @@
+"""Seed a database with synthetic users, listings, favorites and commutes.
+
+Usage: python -m benchmarks.datagen --listings 1000000 --users 5000 [--database-url URL]
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.models.commute import Commute
+from app.models.favorite import Favorite
+from app.models.housing import Housing
+from app.models.user import User
+from app.services.commute import commute_records, estimate_commutes
+from app.services.ingest import normalize_record, upsert_listings
+from app.services.passwords import hash_password
+from app.utils.geo import calculate_distances
+
+BENCH_PASSWORD = 'password123'
+
+# Metro areas listings and offices are scattered around
+METROS = [
+    ('San Francisco', 'CA', '941', 37.7749, -122.4194),
+    ('Oakland', 'CA', '946', 37.8044, -122.2712),
+    ('San Jose', 'CA', '951', 37.3382, -121.8863),
+    ('Seattle', 'WA', '981', 47.6062, -122.3321),
+    ('Austin', 'TX', '787', 30.2672, -97.7431),
+    ('New York', 'NY', '100', 40.7128, -74.0060),
+    ('Chicago', 'IL', '606', 41.8781, -87.6298),
+    ('Boston', 'MA', '021', 42.3601, -71.0589)
+]
+PROPERTY_TYPES = ['apartment', 'house', 'condo', 'townhouse']
+AMENITIES = ['gym', 'pool', 'balcony', 'in-unit laundry', 'dishwasher', 'doorman', 'garden', 'ev charging']
+
+def generate_listings(count, rng):
+    """Yield raw listing records in the ingestion feed format"""
+    for i in range(count):
+        city, state, zip_prefix, lat, lng = rng.choice(METROS)
+        bedrooms = rng.randint(0, 5)
+        yield {
+            'source_id': str(i),
+            'title': f'{bedrooms} bed {rng.choice(PROPERTY_TYPES)} in {city}',
+            'description': 'Bright unit with ' + ', '.join(rng.sample(AMENITIES, 3)),
+            'address': f'{rng.randint(1, 9999)} Main St',
+            'city': city,
+            'state': state,
+            'zip_code': f'{zip_prefix}{rng.randint(0, 99):02d}',
+            'latitude': lat + rng.gauss(0, 0.15),
+            'longitude': lng + rng.gauss(0, 0.15),
+            'price': rng.randint(800, 6000),
+            'bedrooms': bedrooms,
+            'bathrooms': rng.choice([1.0, 1.5, 2.0, 2.5, 3.0]),
+            'square_feet': rng.randint(350, 3500),
+            'property_type': rng.choice(PROPERTY_TYPES),
+            'amenities': rng.sample(AMENITIES, rng.randint(0, 5)),
+            'pet_friendly': rng.random() < 0.4,
+            'parking_available': rng.random() < 0.5,
+            'furnished': rng.random() < 0.2
+        }
+
+def seed(listings=10000, users=100, favorites_per_user=20, commutes_per_user=20, seed=42, chunk_size=5000):
+    """Populate the current app's database; returns counts of what was written"""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    
+    chunk = []
+    for raw in generate_listings(listings, rng):
+        chunk.append(normalize_record(raw, 'synthetic'))
+        if len(chunk) == chunk_size:
+            upsert_listings(chunk)
+            db.session.commit()
+            chunk = []
+    if chunk:
+        upsert_listings(chunk)
+        db.session.commit()
+    
+    # Hashing is deliberately slow, so every synthetic user shares one hash
+    password_hash = hash_password(BENCH_PASSWORD)
+    user_rows = []
+    for i in range(users):
+        _, _, _, lat, lng = rng.choice(METROS)
+        user_rows.append({
+            'id': str(uuid.uuid4()), 'email': f'bench{i}@example.com', 'username': f'bench{i}',
+            'password_hash': password_hash, 'work_lat': round(lat + rng.gauss(0, 0.05), 4),
+            'work_lng': round(lng + rng.gauss(0, 0.05), 4), 'max_commute_time': rng.choice([None, 30, 45, 60]),
+            'created_at': datetime.utcnow(), 'updated_at': datetime.utcnow()
+        })
+    if user_rows:
+        db.session.execute(User.__table__.insert(), user_rows)
+    
+    housing_rows = db.session.query(Housing.id, Housing.latitude, Housing.longitude).limit(max(favorites_per_user, commutes_per_user) * 50).all()
+    
+    favorite_rows = []
+    commute_rows = []
+    for user in user_rows:
+        for housing in rng.sample(housing_rows, min(favorites_per_user, len(housing_rows))):
+            favorite_rows.append({
+                'id': str(uuid.uuid4()), 'user_id': user['id'], 'housing_id': housing[0],
+                'priority': rng.randint(1, 5), 'created_at': datetime.utcnow()
+            })
+        
+        sample = rng.sample(housing_rows, min(commutes_per_user, len(housing_rows)))
+        distances = calculate_distances(
+            user['work_lat'], user['work_lng'], [h[1] for h in sample], [h[2] for h in sample]
+        )
+        for housing, record in zip(sample, commute_records(estimate_commutes(distances, 'driving'))):
+            commute_rows.append(dict(
+                record, id=str(uuid.uuid4()), user_id=user['id'], housing_id=housing[0], route_type='driving',
+                calculated_at=datetime.utcnow() - timedelta(minutes=rng.randint(0, 100000))
+            ))
+    
+    if favorite_rows:
+        db.session.execute(Favorite.__table__.insert(), favorite_rows)
+    if commute_rows:
+        db.session.execute(Commute.__table__.insert(), commute_rows)
+    db.session.commit()
+    
+    return {
+        'listings': listings,
+        'users': len(user_rows),
+        'favorites': len(favorite_rows),
+        'commutes': len(commute_rows),
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--listings', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--favorites-per-user', type=int, default=20)
+    parser.add_argument('--commutes-per-user', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', default='sqlite:////tmp/worktohome-bench.db')
+    args = parser.parse_args()
+    
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url})
+    with app.app_context():
+        db.create_all()
+        print(seed(args.listings, args.users, args.favorites_per_user, args.commutes_per_user, args.seed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""In-process load driver reporting latency percentiles and queries per request.
+
+Usage: python -m benchmarks.loadtest [--requests 200] [--database-url URL] [--listings 20000] [--users 50]
+
+Without --database-url a fresh in-memory database is seeded with benchmarks.datagen;
+point it at a database seeded by `python -m benchmarks.datagen` to test at scale.
+"""
+import argparse
+import random
+import time
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.housing import Housing
+from app.models.user import User
+from benchmarks.datagen import seed
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def build_scenarios(users, housing_ids, rng):
+    """Return (name, callable(client)) pairs for each endpoint under test"""
+    def headers():
+        return {'Authorization': f'Bearer {rng.choice(users)}'}
+    
+    def search(client):
+        return client.get('/api/housing/search', headers=headers(), query_string={
+            'city': rng.choice(['San', 'Seattle', 'Austin', 'New York']),
+            'max_price': rng.randint(2000, 6000),
+            'bedrooms': rng.randint(0, 3)
+        })
+    
+    def nearby(client):
+        return client.get('/api/housing/nearby', headers=headers(), query_string={'radius': rng.choice([2, 5, 10])})
+    
+    def calculate(client):
+        return client.post('/api/commute/calculate', headers=headers(), json={'housing_id': rng.choice(housing_ids)})
+    
+    def favorites(client):
+        return client.get('/api/housing/favorites', headers=headers())
+    
+    return [('search', search), ('nearby', nearby), ('calculate', calculate), ('favorites', favorites)]
+
+def run(app, requests_per_endpoint=200, seed_value=42):
+    """Drive every scenario and return per-endpoint latency and query statistics"""
+    rng = random.Random(seed_value)
+    client = app.test_client()
+    
+    with app.app_context():
+        users = [create_access_token(identity=user_id) for user_id, in db.session.query(User.id).limit(1000)]
+        housing_ids = [housing_id for housing_id, in db.session.query(Housing.id).limit(10000)]
+        
+        query_count = [0]
+        def count_query(*args):
+            query_count[0] += 1
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+        
+        results = {}
+        try:
+            for name, scenario in build_scenarios(users, housing_ids, rng):
+                latencies = []
+                queries = []
+                errors = 0
+                for _ in range(requests_per_endpoint):
+                    query_count[0] = 0
+                    start = time.perf_counter()
+                    response = scenario(client)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    queries.append(query_count[0])
+                    if response.status_code >= 400:
+                        errors += 1
+                
+                results[name] = {
+                    'requests': requests_per_endpoint,
+                    'errors': errors,
+                    'p50_ms': round(percentile(latencies, 50), 2),
+                    'p95_ms': round(percentile(latencies, 95), 2),
+                    'p99_ms': round(percentile(latencies, 99), 2),
+                    'queries_per_request': round(sum(queries) / len(queries), 2)
+                }
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_query)
+    
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--database-url', help='use an already seeded database')
+    parser.add_argument('--listings', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--cache', default='null', help='CACHE_TYPE to run with (null measures the database path)')
+    args = parser.parse_args()
+    
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': args.database_url or 'sqlite:///:memory:',
+        'CACHE_TYPE': args.cache,
+        'COMMUTE_PRECOMPUTE_MODE': 'off'
+    })
+    if not args.database_url:
+        with app.app_context():
+            db.create_all()
+            seed(args.listings, args.users)
+    
+    results = run(app, args.requests)
+    print(f"{'endpoint':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}{'errors':>8}")
+    for name, stats in results.items():
+        print(f"{name:<12}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+              f"{stats['queries_per_request']:>10}{stats['errors']:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Production serving profile: gunicorn -c gunicorn.conf.py wsgi:app
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# Threads overlap the DB, Redis and routing waits that dominate requests;
+# processes use the cores, so one per core is enough. Each worker keeps its
+# own connection pool sized to its threads (see DB_POOL_SIZE).
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', '4' if worker_class == 'gthread' else '1'))
+
+# Every worker can hold DB_POOL_SIZE + DB_MAX_OVERFLOW connections (defaults
+# as in create_app); refuse to start past the server's limit when it is given
+db_connections = workers * (
+    int(os.getenv('DB_POOL_SIZE', os.getenv('GUNICORN_THREADS', '4'))) + int(os.getenv('DB_MAX_OVERFLOW', '2'))
+)
+db_max_connections = int(os.getenv('DB_MAX_CONNECTIONS', '0'))
+if db_max_connections and db_connections > db_max_connections:
+    raise RuntimeError(
+        f'{workers} workers can open {db_connections} database connections, '
+        f'more than DB_MAX_CONNECTIONS={db_max_connections}; lower WEB_CONCURRENCY or DB_POOL_SIZE'
+    )
+
+# A write only invalidates other workers' cached responses through a shared
+# backend; the in-process one would serve them stale for the whole TTL
+if workers > 1:
+    os.environ.setdefault('CACHE_TYPE', 'redis')
+
+# Load the app once in the master so workers fork with it (and the road graph) in shared pages
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to cap slow leaks; jitter keeps them from restarting together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+def on_starting(server):
+    server.log.info('Up to %d database connections across %d workers', db_connections, workers)
+
+def post_fork(server, worker):
+    """Give each worker fresh pool state; connections opened in the master must not be shared"""
+    from app import db
+    from wsgi import app
+    
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,5 @@
+from app import create_app
+
+# Worker entry point: celery -A make_celery worker --loglevel=info
+flask_app = create_app()
+celery_app = flask_app.extensions['celery']
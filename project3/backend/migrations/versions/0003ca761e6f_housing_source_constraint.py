@@ -0,0 +1,27 @@
+"""housing source constraint
+
+Revision ID: 0003ca761e6f
+Revises: 41471a272ccb
+Create Date: 2026-10-18 06:34:52.164087
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003ca761e6f'
+down_revision = '41471a272ccb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Feed ingestion upserts on (source, source_id); manual listings leave both NULL
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_housing_source', ['source', 'source_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_housing_source', type_='unique')
@@ -0,0 +1,71 @@
+"""commute matrix and unique commutes
+
+Revision ID: 41471a272ccb
+Revises: 61645ddf8f8d
+Create Date: 2026-10-18 06:31:09.527730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '41471a272ccb'
+down_revision = '61645ddf8f8d'
+branch_labels = None
+depends_on = None
+
+commutes = sa.table(
+    'commutes',
+    sa.column('id', sa.String),
+    sa.column('user_id', sa.String),
+    sa.column('housing_id', sa.String),
+    sa.column('route_type', sa.String),
+    sa.column('calculated_at', sa.DateTime)
+)
+
+
+def upgrade():
+    op.create_table('commute_matrix',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('work_lat', sa.Float(), nullable=False),
+    sa.Column('work_lng', sa.Float(), nullable=False),
+    sa.Column('housing_id', sa.String(length=36), nullable=False),
+    sa.Column('route_type', sa.String(length=20), nullable=False),
+    sa.Column('distance_miles', sa.Float(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('fuel_cost', sa.Float(), nullable=True),
+    sa.Column('total_commute_cost', sa.Float(), nullable=True),
+    sa.Column('calculated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['housing_id'], ['housing.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('work_lat', 'work_lng', 'housing_id', 'route_type', name='uq_commute_matrix_cell')
+    )
+
+    # calculate_commute used to add a row per call; keep the newest per (user, housing, route type)
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(
+        commutes.c.id, commutes.c.user_id, commutes.c.housing_id, commutes.c.route_type
+    ).order_by(
+        commutes.c.user_id, commutes.c.housing_id, commutes.c.route_type,
+        commutes.c.calculated_at.desc().nulls_last(), commutes.c.id.desc()
+    )).all()
+    seen = set()
+    duplicates = []
+    for row in rows:
+        key = (row.user_id, row.housing_id, row.route_type)
+        if key in seen:
+            duplicates.append(row.id)
+        seen.add(key)
+    for start in range(0, len(duplicates), 500):
+        bind.execute(commutes.delete().where(commutes.c.id.in_(duplicates[start:start + 500])))
+
+    with op.batch_alter_table('commutes', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_commutes_user_housing_route', ['user_id', 'housing_id', 'route_type'])
+
+
+def downgrade():
+    with op.batch_alter_table('commutes', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_commutes_user_housing_route', type_='unique')
+
+    op.drop_table('commute_matrix')
@@ -0,0 +1,26 @@
+"""job heartbeat
+
+Revision ID: 4ceb6504a652
+Revises: 9af0133ea08b
+Create Date: 2026-10-18 18:04:51.227406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4ceb6504a652'
+down_revision = '9af0133ea08b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
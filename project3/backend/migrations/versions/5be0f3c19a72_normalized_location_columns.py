@@ -0,0 +1,51 @@
+"""normalized location columns
+
+Revision ID: 5be0f3c19a72
+Revises: a41c9e27d3b5
+Create Date: 2026-10-18 07:12:45.901214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5be0f3c19a72'
+down_revision = 'a41c9e27d3b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('city_key', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('state_key', sa.String(length=50), nullable=True))
+
+    # New writes go through normalize_location(); existing rows get a SQL approximation
+    # that e683ce847f11 corrects
+    op.execute('UPDATE housing SET city_key = LOWER(TRIM(city)), state_key = LOWER(TRIM(state))')
+
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_housing_city_key'), ['city_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_housing_state_key'), ['state_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_housing_zip_code'), ['zip_code'], unique=False)
+
+    # City/state no longer use ILIKE, so the trigram indexes are dead weight
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_housing_state_trgm', table_name='housing')
+        op.drop_index('ix_housing_city_trgm', table_name='housing')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index('ix_housing_city_trgm', 'housing', ['city'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+        op.create_index('ix_housing_state_trgm', 'housing', ['state'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'})
+
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_housing_zip_code'))
+        batch_op.drop_index(batch_op.f('ix_housing_state_key'))
+        batch_op.drop_index(batch_op.f('ix_housing_city_key'))
+        batch_op.drop_column('state_key')
+        batch_op.drop_column('city_key')
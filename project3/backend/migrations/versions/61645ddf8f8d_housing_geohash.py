@@ -0,0 +1,52 @@
+"""housing geohash
+
+Revision ID: 61645ddf8f8d
+Revises: 03d78ad116d8
+Create Date: 2026-10-18 06:27:41.803512
+
+"""
+from alembic import op
+from app.utils.geo import geohash_encode
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '61645ddf8f8d'
+down_revision = '03d78ad116d8'
+branch_labels = None
+depends_on = None
+
+housing = sa.table(
+    'housing',
+    sa.column('id', sa.String),
+    sa.column('latitude', sa.Float),
+    sa.column('longitude', sa.Float),
+    sa.column('geohash', sa.String)
+)
+
+
+def upgrade():
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+
+    # New writes set it in a before_insert/update hook; existing rows are encoded here
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(housing.c.id, housing.c.latitude, housing.c.longitude)).all()
+    updates = [
+        {'row_id': row.id, 'new_geohash': geohash_encode(row.latitude, row.longitude)}
+        for row in rows if row.latitude is not None and row.longitude is not None
+    ]
+    if updates:
+        bind.execute(
+            housing.update().where(housing.c.id == sa.bindparam('row_id')).values(geohash=sa.bindparam('new_geohash')),
+            updates
+        )
+
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_housing_geohash'), ['geohash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_housing_geohash'))
+        batch_op.drop_column('geohash')
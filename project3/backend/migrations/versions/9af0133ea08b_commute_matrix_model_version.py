@@ -0,0 +1,28 @@
+"""commute matrix model version
+
+Revision ID: 9af0133ea08b
+Revises: e683ce847f11
+Create Date: 2026-10-18 17:22:36.540118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9af0133ea08b'
+down_revision = 'e683ce847f11'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows predate versioning (2 minutes per mile), so they are
+    # version 1 and get recomputed with the current model on next use
+    with op.batch_alter_table('commute_matrix', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('model_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('commute_matrix', schema=None) as batch_op:
+        batch_op.drop_column('model_version')
@@ -0,0 +1,63 @@
+"""add search indexes
+
+Revision ID: a41c9e27d3b5
+Revises: 0003ca761e6f
+Create Date: 2026-10-18 06:41:02.518337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c9e27d3b5'
+down_revision = '0003ca761e6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    is_postgresql = op.get_bind().dialect.name == 'postgresql'
+
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.create_index('ix_housing_price', ['price'], unique=False)
+        batch_op.create_index('ix_housing_property_type_price', ['property_type', 'price'], unique=False)
+        batch_op.create_index('ix_housing_bedrooms_price', ['bedrooms', 'price'], unique=False)
+        batch_op.create_index('ix_housing_bathrooms_price', ['bathrooms', 'price'], unique=False)
+
+    # Trigram GIN indexes serve ILIKE '%city%' on PostgreSQL only
+    if is_postgresql:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_housing_city_trgm', 'housing', ['city'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+        op.create_index('ix_housing_state_trgm', 'housing', ['state'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'})
+
+    with op.batch_alter_table('commutes', schema=None) as batch_op:
+        batch_op.create_index('ix_commutes_user_calculated_at', ['user_id', 'calculated_at'], unique=False)
+
+    # add_favorite checked for duplicates without a constraint; keep the oldest row
+    op.execute(
+        'DELETE FROM favorites WHERE id NOT IN ('
+        'SELECT MIN(id) FROM favorites GROUP BY user_id, housing_id)'
+    )
+    with op.batch_alter_table('favorites', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_favorites_user_housing', ['user_id', 'housing_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('favorites', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_favorites_user_housing', type_='unique')
+
+    with op.batch_alter_table('commutes', schema=None) as batch_op:
+        batch_op.drop_index('ix_commutes_user_calculated_at')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_housing_state_trgm', table_name='housing')
+        op.drop_index('ix_housing_city_trgm', table_name='housing')
+
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.drop_index('ix_housing_bathrooms_price')
+        batch_op.drop_index('ix_housing_bedrooms_price')
+        batch_op.drop_index('ix_housing_property_type_price')
+        batch_op.drop_index('ix_housing_price')
@@ -0,0 +1,68 @@
+"""housing full text search
+
+Revision ID: e1b5d8a7c342
+Revises: c7e2a94d1f60
+Create Date: 2026-10-18 10:03:17.640215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b5d8a7c342'
+down_revision = 'c7e2a94d1f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Generated, so every write (including bulk upserts) keeps it current
+        op.execute(
+            "ALTER TABLE housing ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(amenities::text, '')), 'C')) STORED"
+        )
+        op.execute('CREATE INDEX ix_housing_search_vector ON housing USING gin (search_vector)')
+
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE housing_fts USING fts5("
+            "title, description, amenities, content='housing', content_rowid='rowid', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER housing_fts_insert AFTER INSERT ON housing BEGIN "
+            "INSERT INTO housing_fts(rowid, title, description, amenities) "
+            "VALUES (new.rowid, new.title, new.description, new.amenities); END"
+        )
+        op.execute(
+            "CREATE TRIGGER housing_fts_delete AFTER DELETE ON housing BEGIN "
+            "INSERT INTO housing_fts(housing_fts, rowid, title, description, amenities) "
+            "VALUES ('delete', old.rowid, old.title, old.description, old.amenities); END"
+        )
+        op.execute(
+            "CREATE TRIGGER housing_fts_update AFTER UPDATE OF title, description, amenities ON housing BEGIN "
+            "INSERT INTO housing_fts(housing_fts, rowid, title, description, amenities) "
+            "VALUES ('delete', old.rowid, old.title, old.description, old.amenities); "
+            "INSERT INTO housing_fts(rowid, title, description, amenities) "
+            "VALUES (new.rowid, new.title, new.description, new.amenities); END"
+        )
+        op.execute("INSERT INTO housing_fts(housing_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX ix_housing_search_vector')
+        op.execute('ALTER TABLE housing DROP COLUMN search_vector')
+
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER housing_fts_update')
+        op.execute('DROP TRIGGER housing_fts_delete')
+        op.execute('DROP TRIGGER housing_fts_insert')
+        op.execute('DROP TABLE housing_fts')
@@ -0,0 +1,55 @@
+"""renormalize location keys
+
+Revision ID: e683ce847f11
+Revises: f4c2a8e9b613
+Create Date: 2026-10-18 16:40:52.118304
+
+"""
+from alembic import op
+from app.utils.text import normalize_location
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e683ce847f11'
+down_revision = 'f4c2a8e9b613'
+branch_labels = None
+depends_on = None
+
+housing = sa.table(
+    'housing',
+    sa.column('id', sa.String),
+    sa.column('city', sa.String),
+    sa.column('state', sa.String),
+    sa.column('city_key', sa.String),
+    sa.column('state_key', sa.String)
+)
+
+
+def upgrade():
+    # 5be0f3c19a72 backfilled with LOWER(TRIM()), which keeps inner runs of
+    # whitespace (and, on SQLite, non-ASCII capitals) that normalize_location
+    # removes; recompute the keys with the function new writes use
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(
+        housing.c.id, housing.c.city, housing.c.state, housing.c.city_key, housing.c.state_key
+    )).all()
+
+    updates = []
+    for row in rows:
+        city_key, state_key = normalize_location(row.city), normalize_location(row.state)
+        if (city_key, state_key) != (row.city_key, row.state_key):
+            updates.append({'row_id': row.id, 'new_city_key': city_key, 'new_state_key': state_key})
+
+    if updates:
+        bind.execute(
+            housing.update().where(housing.c.id == sa.bindparam('row_id')).values(
+                city_key=sa.bindparam('new_city_key'), state_key=sa.bindparam('new_state_key')
+            ),
+            updates
+        )
+
+
+def downgrade():
+    # The recomputed keys are what the application writes, so there is nothing to undo
+    pass
@@ -0,0 +1,26 @@
+"""housing updated_at index
+
+Revision ID: f4c2a8e9b613
+Revises: e1b5d8a7c342
+Create Date: 2026-10-18 11:02:17.463920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c2a8e9b613'
+down_revision = 'e1b5d8a7c342'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.create_index('ix_housing_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('housing', schema=None) as batch_op:
+        batch_op.drop_index('ix_housing_updated_at')
@@ -0,0 +1,84 @@
+import pytest
+from app import create_app, db
+from app.models.housing import Housing
+from app.models.user import User
+from sqlalchemy import event
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'COMMUTE_PRECOMPUTE_MODE': 'sync',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',  # Cheap hashes keep the suite fast
+        'CELERY': {'task_always_eager': True, 'broker_url': 'memory://', 'result_backend': 'cache+memory://'}
+    })
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def user(client):
+    """Register a user with a work location in downtown San Francisco"""
+    response = client.post('/api/auth/register', json={
+        'email': 'commuter@example.com',
+        'username': 'commuter',
+        'password': 'password123'
+    })
+    data = response.get_json()
+    
+    user = User.query.get(data['user']['id'])
+    user.work_lat = 37.7749
+    user.work_lng = -122.4194
+    db.session.commit()
+    
+    user.access_token = data['access_token']
+    return user
+
+@pytest.fixture
+def auth_headers(user):
+    return {'Authorization': f'Bearer {user.access_token}'}
+
+@pytest.fixture
+def make_housing():
+    """Factory inserting a housing listing with sensible defaults"""
+    def _make_housing(**overrides):
+        fields = {
+            'title': 'Test listing',
+            'address': '1 Market St',
+            'city': 'San Francisco',
+            'state': 'CA',
+            'zip_code': '94105',
+            'latitude': 37.7749,
+            'longitude': -122.4194,
+            'price': 2500,
+            'bedrooms': 2,
+            'bathrooms': 1.0,
+            'property_type': 'apartment'
+        }
+        fields.update(overrides)
+        housing = Housing(**fields)
+        db.session.add(housing)
+        db.session.commit()
+        return housing
+    
+    return _make_housing
+
+@pytest.fixture
+def query_counter(app):
+    """Record every SQL statement executed while the fixture is active"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
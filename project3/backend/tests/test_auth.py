@@ -1,22 +1,7 @@
-import pytest
-from app import create_app, db
+import threading
+from app import db
 from app.models.user import User
 
-@pytest.fixture
-def app():
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.drop_all()
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
-
 def test_register_user(client):
     """Test user registration"""
     response = client.post('/api/auth/register', json={
@@ -59,3 +44,45 @@ def test_invalid_login(client):
     })
     
     assert response.status_code == 401
+
+def test_password_hash_uses_configured_method(app, user):
+    """Test new hashes carry the configured scheme and work factor"""
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+    assert not user.password_needs_rehash()
+
+def test_login_upgrades_outdated_hash(app, client, user):
+    """Test a successful login re-hashes with the current parameters"""
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    assert user.password_needs_rehash()
+    
+    response = client.post('/api/auth/login', json={'email': 'commuter@example.com', 'password': 'password123'})
+    
+    assert response.status_code == 200
+    db.session.expire_all()
+    upgraded = User.query.get(user.id)
+    assert upgraded.password_hash.startswith('pbkdf2:sha256:2000$')
+    assert upgraded.check_password('password123')
+
+def test_failed_login_keeps_hash(app, client, user):
+    """Test a wrong password never rewrites the stored hash"""
+    original = user.password_hash
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    
+    response = client.post('/api/auth/login', json={'email': 'commuter@example.com', 'password': 'wrong'})
+    
+    assert response.status_code == 401
+    db.session.expire_all()
+    assert User.query.get(user.id).password_hash == original
+
+def test_login_rejected_when_hashing_saturated(app, client, user):
+    """Test logins beyond PASSWORD_HASH_MAX_PENDING get a 503 instead of queueing"""
+    slots = app.extensions['passwords']['slots'] = threading.BoundedSemaphore(1)
+    slots.acquire()
+    
+    response = client.post('/api/auth/login', json={'email': 'commuter@example.com', 'password': 'password123'})
+    
+    assert response.status_code == 503
+    slots.release()
+    assert client.post('/api/auth/login', json={
+        'email': 'commuter@example.com', 'password': 'password123'
+    }).status_code == 200
@@ -0,0 +1,27 @@
+from app.models.commute import Commute
+from app.models.favorite import Favorite
+from app.models.housing import Housing
+from app.models.user import User
+from benchmarks.datagen import seed
+from benchmarks.loadtest import run
+
+def test_seed_generates_requested_scale(app):
+    """The generator writes listings, users and their favorites and commutes"""
+    stats = seed(listings=200, users=5, favorites_per_user=3, commutes_per_user=4, chunk_size=50)
+    
+    assert Housing.query.count() == 200
+    assert User.query.count() == 5
+    assert Favorite.query.count() == stats['favorites'] == 15
+    assert Commute.query.count() == stats['commutes'] == 20
+
+def test_load_driver_reports_every_endpoint(app):
+    """A short load run covers each endpoint without errors"""
+    seed(listings=200, users=3)
+    
+    results = run(app, requests_per_endpoint=5)
+    
+    assert set(results) == {'search', 'nearby', 'calculate', 'favorites'}
+    for stats in results.values():
+        assert stats['errors'] == 0
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+        assert stats['queries_per_request'] >= 1
@@ -0,0 +1,70 @@
+import time
+from app import db
+from app.services.cache import LocalCache, RedisCache
+
+def test_local_cache_lru_and_ttl(monkeypatch):
+    """Test the in-process backend evicts least recently used and expired entries"""
+    cache = LocalCache(max_entries=2, default_timeout=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    
+    now = time.monotonic()
+    monkeypatch.setattr('app.services.cache.time.monotonic', lambda: now + 11)
+    assert cache.get('a') is None
+
+def test_redis_outage_is_a_miss(client, auth_headers, make_housing):
+    """Test an unreachable Redis costs cache hits instead of failing requests"""
+    backend = RedisCache('redis://127.0.0.1:1/0')  # Nothing listens on port 1
+    client.application.extensions['response_cache']['backend'] = backend
+    housing = make_housing()
+    
+    backend.set('key', 1)
+    backend.incr('counter')
+    backend.delete('key')
+    assert backend.get('key') is None and backend.get_counter('counter') == 0
+    
+    assert client.get('/api/housing/search', headers=auth_headers).status_code == 200
+    assert client.get(f'/api/housing/{housing.id}', headers=auth_headers).status_code == 200
+
+def test_search_cached_until_housing_changes(client, auth_headers, make_housing):
+    """Test repeat searches hit the cache and a listing write invalidates them"""
+    housing = make_housing(price=2000)
+    
+    first = client.get('/api/housing/search?max_price=3000', headers=auth_headers).get_json()
+    second = client.get('/api/housing/search?max_price=3000', headers=auth_headers).get_json()
+    assert first == second
+    
+    housing.price = 2100
+    db.session.commit()
+    
+    third = client.get('/api/housing/search?max_price=3000', headers=auth_headers).get_json()
+    assert third['housing'][0]['price'] == 2100
+    
+    stats = client.get('/api/housing/cache/stats', headers=auth_headers).get_json()
+    assert stats['backend'] == 'simple'
+    assert stats['namespaces']['search'] == {'hits': 1, 'misses': 2, 'hit_ratio': 0.3333}
+
+def test_search_cache_respects_user_budget(client, auth_headers, user, make_housing):
+    """Test the user's budget is part of the cache key"""
+    make_housing(price=2000)
+    assert len(client.get('/api/housing/search', headers=auth_headers).get_json()['housing']) == 1
+    
+    user.budget_max = 1500
+    db.session.commit()
+    
+    assert client.get('/api/housing/search', headers=auth_headers).get_json()['housing'] == []
+
+def test_detail_cache_invalidated_on_update(client, auth_headers, make_housing):
+    """Test detail responses are cached per listing and dropped on write"""
+    housing = make_housing(title='Before')
+    
+    assert client.get(f'/api/housing/{housing.id}', headers=auth_headers).get_json()['title'] == 'Before'
+    housing.title = 'After'
+    db.session.commit()
+    
+    assert client.get(f'/api/housing/{housing.id}', headers=auth_headers).get_json()['title'] == 'After'
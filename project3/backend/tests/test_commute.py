@@ -0,0 +1,228 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.commute import Commute
+from app.models.commute_matrix import CommuteMatrix
+from app.services.commute import ESTIMATE_MODEL_VERSION, commute_records, estimate_commute, estimate_commutes, upsert_commutes
+from app.services.commute_matrix import get_commute_estimates
+from app.utils.pagination import encode_cursor
+
+WORK_LAT, WORK_LNG = 37.7749, -122.4194
+
+def test_vectorized_estimates_match_scalar():
+    """Test the NumPy path agrees with the single-listing estimate"""
+    distances = [0.0, 1.5, 12.25]
+    
+    for route_type in ('driving', 'walking'):
+        records = commute_records(estimate_commutes(distances, route_type))
+        expected = [estimate_commute(distance, route_type) for distance in distances]
+        assert records == expected
+
+def test_calculate_batch_by_ids(client, auth_headers, make_housing):
+    """Test a batch computes one commute per found listing in one call"""
+    near = make_housing(latitude=WORK_LAT + 0.01, longitude=WORK_LNG)
+    far = make_housing(latitude=WORK_LAT + 0.1, longitude=WORK_LNG)
+    
+    response = client.post('/api/commute/calculate-batch', headers=auth_headers, json={
+        'housing_ids': [near.id, far.id, 'missing-id']
+    })
+    
+    assert response.status_code == 201
+    data = response.get_json()
+    by_housing = {c['housing_id']: c for c in data['commutes']}
+    assert set(by_housing) == {near.id, far.id}
+    assert by_housing[near.id]['distance_miles'] < by_housing[far.id]['distance_miles']
+    assert by_housing[far.id]['fuel_cost'] is not None
+    assert data['not_found'] == ['missing-id']
+    assert Commute.query.count() == 2
+
+def test_calculate_batch_by_filters(client, auth_headers, make_housing):
+    """Test a batch can select listings with search filters"""
+    make_housing(price=1500)
+    make_housing(price=4000)
+    
+    response = client.post('/api/commute/calculate-batch', headers=auth_headers, json={
+        'filters': {'max_price': 2000},
+        'route_type': 'walking'
+    })
+    
+    data = response.get_json()
+    assert len(data['commutes']) == 1
+    assert data['commutes'][0]['fuel_cost'] is None
+
+def test_calculate_batch_requires_input(client, auth_headers):
+    """Test an empty batch is rejected"""
+    response = client.post('/api/commute/calculate-batch', headers=auth_headers, json={})
+    assert response.status_code == 400
+
+def test_calculate_batch_rejects_malformed_ids(client, auth_headers):
+    """Test housing_ids that are not a list of strings are a client error"""
+    for housing_ids in ('abc', [1, 2], [['nested']], {'id': 'abc'}):
+        response = client.post('/api/commute/calculate-batch', headers=auth_headers, json={'housing_ids': housing_ids})
+        assert response.status_code == 400, housing_ids
+
+def test_calculate_batch_rejects_oversized_filters(client, auth_headers, make_housing, monkeypatch):
+    """Test filters matching more than a batch are rejected instead of silently truncated"""
+    monkeypatch.setattr('app.routes.commute.MAX_BATCH_SIZE', 2)
+    for price in (1000, 2000, 3000):
+        make_housing(price=price)
+    
+    response = client.post('/api/commute/calculate-batch', headers=auth_headers, json={'filters': {}})
+    assert response.status_code == 400
+    assert Commute.query.count() == 0
+    
+    response = client.post('/api/commute/calculate-batch', headers=auth_headers, json={'filters': {'max_price': 2000}})
+    assert response.status_code == 201
+    assert len(response.get_json()['commutes']) == 2
+
+def test_history_cursor_newest_first(client, auth_headers, user, make_housing):
+    """Test history cursor pages walk (calculated_at, id) descending"""
+    for minutes in range(5):
+        db.session.add(Commute(
+            user_id=user.id, housing_id=make_housing().id, distance_miles=1.0,
+            duration_minutes=minutes, route_type='driving',
+            calculated_at=datetime(2024, 1, 1) + timedelta(minutes=minutes)
+        ))
+    db.session.commit()
+    
+    durations = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/api/commute/history?cursor={cursor}&per_page=2', headers=auth_headers)
+        data = response.get_json()
+        durations.extend(c['duration_minutes'] for c in data['commutes'])
+        cursor = data['pagination']['next_cursor']
+    
+    assert durations == [4, 3, 2, 1, 0]
+
+def test_history_pages_by_default(client, auth_headers, user, make_housing):
+    """Test history without a cursor returns one bounded page instead of every row"""
+    for minutes in range(3):
+        db.session.add(Commute(
+            user_id=user.id, housing_id=make_housing().id, distance_miles=1.0,
+            duration_minutes=minutes, route_type='driving',
+            calculated_at=datetime(2024, 1, 1) + timedelta(minutes=minutes)
+        ))
+    db.session.commit()
+    
+    response = client.get('/api/commute/history?per_page=2', headers=auth_headers)
+    data = response.get_json()
+    assert [c['duration_minutes'] for c in data['commutes']] == [2, 1]
+    assert data['pagination']['total'] == 3
+    assert data['pagination']['has_next']
+    
+    response = client.get('/api/commute/history?page=2&per_page=2', headers=auth_headers)
+    assert [c['duration_minutes'] for c in response.get_json()['commutes']] == [0]
+
+def test_history_rejects_mistyped_cursor(client, auth_headers):
+    """Test a cursor whose timestamp is not a string is a client error, not a 500"""
+    cursor = encode_cursor([123, 'x'])
+    response = client.get(f'/api/commute/history?cursor={cursor}', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_calculate_upserts_and_shares_matrix(client, auth_headers, user, make_housing):
+    """Test repeat calculations reuse one Commute row and the shared matrix"""
+    housing = make_housing(latitude=WORK_LAT + 0.05, longitude=WORK_LNG)
+    
+    for _ in range(2):
+        response = client.post('/api/commute/calculate', headers=auth_headers, json={'housing_id': housing.id})
+        assert response.status_code == 201
+    
+    assert Commute.query.count() == 1
+    assert CommuteMatrix.query.count() == 1
+    
+    # A colleague at the same office (within the rounding cell) reuses the entry
+    colleague = client.post('/api/auth/register', json={
+        'email': 'colleague@example.com', 'username': 'colleague', 'password': 'password123'
+    }).get_json()
+    client.put('/api/auth/profile', headers={'Authorization': f"Bearer {colleague['access_token']}"},
+               json={'work_lat': WORK_LAT + 0.0001, 'work_lng': WORK_LNG})
+    response = client.post('/api/commute/calculate', json={'housing_id': housing.id},
+                           headers={'Authorization': f"Bearer {colleague['access_token']}"})
+    
+    assert response.status_code == 201
+    assert CommuteMatrix.query.count() == 1
+
+def test_upsert_commutes_updates_in_place(app, user, make_housing):
+    """Test an upsert over an existing row keeps its id and clears route fields it no longer has"""
+    housing = make_housing()
+    routed = dict(estimate_commute(3.0, 'driving'), route_summary='I-80', waypoints=[[37.0, -122.0]])
+    first = upsert_commutes(user.id, 'driving', {housing.id: routed})[0]
+    db.session.commit()
+    first_id = first.id
+    
+    second = upsert_commutes(user.id, 'driving', {housing.id: estimate_commute(4.0, 'driving')})[0]
+    db.session.commit()
+    
+    assert Commute.query.count() == 1
+    assert second.id == first_id
+    assert second.distance_miles == estimate_commute(4.0, 'driving')['distance_miles']
+    assert second.route_summary is None and second.waypoints is None
+
+def test_endpoints_agree_on_commute_minutes(client, auth_headers, make_housing):
+    """Test search, reachable and calculate report the same minutes for a listing"""
+    housing = make_housing(latitude=WORK_LAT + 0.1, longitude=WORK_LNG)
+    
+    searched = client.get('/api/housing/search?sort=commute', headers=auth_headers).get_json()
+    reachable = client.get('/api/housing/reachable?minutes=60', headers=auth_headers).get_json()
+    calculated = client.post('/api/commute/calculate', headers=auth_headers, json={'housing_id': housing.id}).get_json()
+    
+    minutes = calculated['commute']['duration_minutes']
+    assert searched['housing'][0]['estimated_commute_minutes'] == minutes
+    assert reachable['housing'][0]['estimated_commute_minutes'] == minutes
+
+def test_calculate_rejects_unknown_route_type(client, auth_headers, make_housing):
+    """Test a route type without a duration model is rejected"""
+    housing = make_housing()
+    
+    response = client.post('/api/commute/calculate', headers=auth_headers, json={
+        'housing_id': housing.id, 'route_type': 'teleport'
+    })
+    
+    assert response.status_code == 400
+
+def test_moving_listing_drops_matrix_rows(app, make_housing):
+    """Test shared estimates for a listing's old coordinates are discarded"""
+    housing = make_housing(latitude=WORK_LAT + 0.05, longitude=WORK_LNG)
+    get_commute_estimates(WORK_LAT, WORK_LNG, [housing], 'driving')
+    db.session.commit()
+    
+    housing.price = 2500
+    db.session.commit()
+    assert CommuteMatrix.query.count() == 1
+    
+    housing.latitude = WORK_LAT + 0.1
+    db.session.commit()
+    assert CommuteMatrix.query.count() == 0
+
+def test_stale_matrix_rows_recomputed(app, make_housing):
+    """Test rows from an older estimate model or past the max age are replaced"""
+    housing = make_housing(latitude=WORK_LAT + 0.05, longitude=WORK_LNG)
+    expected = get_commute_estimates(WORK_LAT, WORK_LNG, [housing], 'driving')[housing.id]['duration_minutes']
+    db.session.commit()
+    
+    for stale in ({'model_version': ESTIMATE_MODEL_VERSION - 1}, {'calculated_at': datetime(2000, 1, 1)}):
+        entry = CommuteMatrix.query.one()
+        for field, value in dict(stale, duration_minutes=999).items():
+            setattr(entry, field, value)
+        db.session.commit()
+        
+        estimate = get_commute_estimates(WORK_LAT, WORK_LNG, [housing], 'driving')[housing.id]
+        db.session.commit()
+        
+        db.session.expire_all()
+        entry = CommuteMatrix.query.one()
+        assert estimate['duration_minutes'] == expected == entry.duration_minutes
+        assert entry.model_version == ESTIMATE_MODEL_VERSION
+
+def test_profile_location_change_precomputes_matrix(client, auth_headers, make_housing):
+    """Test moving the work location fills the matrix for nearby listings"""
+    make_housing(latitude=37.80, longitude=-122.27)
+    make_housing(latitude=37.81, longitude=-122.28)
+    make_housing(latitude=40.71, longitude=-74.00)  # Other coast, outside the radius
+    
+    response = client.put('/api/auth/profile', headers=auth_headers, json={'work_lat': 37.8044, 'work_lng': -122.2712})
+    
+    assert response.status_code == 200
+    entries = CommuteMatrix.query.all()
+    assert len(entries) == 2
+    assert {(e.work_lat, e.work_lng) for e in entries} == {(37.804, -122.271)}
@@ -0,0 +1,65 @@
+from app import db
+from app.models.user import User
+from app.services.ingest import upsert_listings, normalize_record
+
+def titles(response):
+    return [housing['title'] for housing in response.get_json()['housing']]
+
+def test_q_matches_title_description_and_amenities(client, auth_headers, make_housing):
+    """Test free text finds words in any indexed field, stemmed, ranked by relevance"""
+    make_housing(title='Loft with a balcony')
+    make_housing(title='Quiet flat', description='Two balconies facing the park')
+    make_housing(title='Studio', amenities=['in-unit laundry', 'gym'])
+    make_housing(title='Basement')
+    
+    balcony = client.get('/api/housing/search?q=balcony', headers=auth_headers)
+    laundry = client.get('/api/housing/search?q=In-Unit Laundry', headers=auth_headers)
+    
+    assert titles(balcony) == ['Loft with a balcony', 'Quiet flat']
+    assert balcony.get_json()['housing'][0]['relevance'] > balcony.get_json()['housing'][1]['relevance']
+    assert titles(laundry) == ['Studio']
+
+def test_q_combines_with_filters_and_sorts(client, auth_headers, make_housing):
+    """Test text matches respect the usual filters and other sort orders"""
+    make_housing(title='Cheap balcony', price=1500)
+    make_housing(title='Pricey balcony', price=3500)
+    make_housing(title='Cheap basement', price=1200)
+    
+    filtered = client.get('/api/housing/search?q=balcony&max_price=2000', headers=auth_headers)
+    by_price = client.get('/api/housing/search?q=balcony&sort=price', headers=auth_headers)
+    
+    assert titles(filtered) == ['Cheap balcony']
+    assert titles(by_price) == ['Cheap balcony', 'Pricey balcony']
+
+def test_index_follows_writes(client, auth_headers, app, make_housing):
+    """Test ORM updates, bulk upserts and deletes keep the index in sync"""
+    housing = make_housing(title='Garden flat')
+    housing.title = 'Rooftop flat'
+    db.session.commit()
+    upsert_listings([normalize_record({
+        'source_id': 'x', 'title': 'Garden cottage', 'address': '2 Main St', 'city': 'Oakland', 'state': 'CA',
+        'zip_code': '94607', 'latitude': 37.7749, 'longitude': -122.4194, 'price': 2000
+    }, 'zillow')])
+    db.session.commit()
+    
+    assert titles(client.get('/api/housing/search?q=garden', headers=auth_headers)) == ['Garden cottage']
+    
+    db.session.delete(housing)
+    db.session.commit()
+    assert titles(client.get('/api/housing/search?q=flat', headers=auth_headers)) == []
+
+def test_q_without_work_location(client, auth_headers, user, make_housing):
+    """Test relevance ranking works for users who have not set a work location"""
+    make_housing(title='Balcony loft')
+    User.query.get(user.id).work_lat = None
+    db.session.commit()
+    
+    response = client.get('/api/housing/search?q=balcony', headers=auth_headers)
+    
+    assert titles(response) == ['Balcony loft']
+    assert 'estimated_commute_minutes' not in response.get_json()['housing'][0]
+
+def test_relevance_requires_q(client, auth_headers):
+    """Test relevance sorting and empty queries are rejected"""
+    assert client.get('/api/housing/search?sort=relevance', headers=auth_headers).status_code == 400
+    assert client.get('/api/housing/search?q=%21%21', headers=auth_headers).status_code == 400
@@ -0,0 +1,399 @@
+from app import db
+from app.models.favorite import Favorite
+from app.services.isochrone import reachable_listings
+from app.services.search import rank_listings
+from app.utils.geo import calculate_distance, geohash_cover, geohash_encode, merge_cell_ranges
+
+WORK_LAT, WORK_LNG = 37.7749, -122.4194
+
+def test_geohash_maintained_on_write(app, make_housing):
+    """Test the geohash column follows the coordinates"""
+    housing = make_housing()
+    assert housing.geohash == geohash_encode(WORK_LAT, WORK_LNG)
+    
+    housing.latitude = 37.8044
+    housing.longitude = -122.2712
+    db.session.commit()
+    assert housing.geohash == geohash_encode(37.8044, -122.2712)
+
+def test_geohash_cover_contains_circle():
+    """Test the covering cells contain points at the edge of the radius"""
+    cells = geohash_cover(WORK_LAT, WORK_LNG, 5)
+    
+    for lat, lng in [(WORK_LAT + 0.072, WORK_LNG), (WORK_LAT, WORK_LNG - 0.09)]:
+        assert calculate_distance(WORK_LAT, WORK_LNG, lat, lng) < 5
+        point = geohash_encode(lat, lng)
+        assert any(point.startswith(cell) for cell in cells)
+
+def test_nearby_filters_by_radius_and_sorts(client, auth_headers, make_housing):
+    """Test nearby returns only listings inside the circle, nearest first"""
+    make_housing(title='Far', latitude=WORK_LAT + 0.1, longitude=WORK_LNG + 0.1)  # ~8.6 miles
+    make_housing(title='Near', latitude=WORK_LAT + 0.01, longitude=WORK_LNG)  # ~0.7 miles
+    make_housing(title='Mid', latitude=WORK_LAT + 0.05, longitude=WORK_LNG)  # ~3.5 miles
+    make_housing(title='Corner', latitude=WORK_LAT + 0.07, longitude=WORK_LNG + 0.088)  # box corner, ~6.4 miles
+    
+    response = client.get('/api/housing/nearby?radius=5', headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [h['title'] for h in data['housing']] == ['Near', 'Mid']
+    assert data['housing'][0]['distance_miles'] < data['housing'][1]['distance_miles']
+    assert data['pagination']['total'] == 2
+
+def test_nearby_pagination(client, auth_headers, make_housing):
+    """Test pages follow the distance ordering"""
+    for i in range(5):
+        make_housing(title=f'Listing {i}', latitude=WORK_LAT + 0.01 * i, longitude=WORK_LNG)
+    
+    response = client.get('/api/housing/nearby?radius=5&per_page=2&page=2', headers=auth_headers)
+    
+    data = response.get_json()
+    assert [h['title'] for h in data['housing']] == ['Listing 2', 'Listing 3']
+    assert data['pagination']['pages'] == 3
+    assert data['pagination']['has_next'] and data['pagination']['has_prev']
+
+def test_merge_cell_ranges_joins_neighbours():
+    """Test consecutive cells collapse into one range that still bounds each cell"""
+    ranges = merge_cell_ranges(['9q8yy', '9q8yz', '9q8z0', '9q8zb'])
+    
+    assert ranges == [('9q8yy', '9q8z1'), ('9q8zb', '9q8zc')]
+
+def test_reachable_filters_by_commute_time(client, auth_headers, make_housing):
+    """Test reachable returns listings within the commute budget, fastest first"""
+    make_housing(title='Outside', latitude=WORK_LAT + 0.3, longitude=WORK_LNG)  # ~20.7 miles, 54 min
+    make_housing(title='Mid', latitude=WORK_LAT + 0.1, longitude=WORK_LNG)  # ~6.9 miles, 18 min
+    make_housing(title='Close', latitude=WORK_LAT + 0.02, longitude=WORK_LNG)  # ~1.4 miles, 4 min
+    
+    response = client.get('/api/housing/reachable?minutes=30&mode=driving', headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [h['title'] for h in data['housing']] == ['Close', 'Mid']
+    assert [h['estimated_commute_minutes'] for h in data['housing']] == [4, 18]
+    assert data['isochrone']['source'] == 'estimate'
+
+def test_reachable_reuses_isochrone(client, auth_headers, make_housing):
+    """Test budgets in the same bucket share one cached isochrone"""
+    make_housing(title='Mid', latitude=WORK_LAT + 0.1, longitude=WORK_LNG)  # 18 min
+    
+    first = client.get('/api/housing/reachable?minutes=17', headers=auth_headers).get_json()
+    second = client.get('/api/housing/reachable?minutes=19', headers=auth_headers).get_json()
+    stats = client.get('/api/housing/cache/stats', headers=auth_headers).get_json()
+    
+    assert first['housing'] == [] and [h['title'] for h in second['housing']] == ['Mid']
+    assert stats['namespaces']['isochrone'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+def test_reachable_skips_deleted_listings(client, auth_headers, make_housing, monkeypatch):
+    """Test a match whose listing is gone by the time it loads is left out"""
+    housing = make_housing(title='Close', latitude=WORK_LAT + 0.02, longitude=WORK_LNG)
+    
+    def matches_with_deleted(query, work_lat, work_lng, minutes, mode):
+        isochrone, matches = reachable_listings(query, work_lat, work_lng, minutes, mode)
+        return isochrone, matches + [('deleted-id', 5, 2.0)]
+    monkeypatch.setattr('app.routes.housing.reachable_listings', matches_with_deleted)
+    
+    response = client.get('/api/housing/reachable?minutes=30', headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert [h['id'] for h in response.get_json()['housing']] == [housing.id]
+
+def test_reachable_rejects_unknown_mode(client, auth_headers):
+    """Test an unsupported mode is rejected"""
+    response = client.get('/api/housing/reachable?mode=teleport', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_search_max_commute_prunes_and_annotates(client, auth_headers, make_housing):
+    """Test max_commute drops listings whose estimated commute is too long"""
+    make_housing(title='Close', latitude=WORK_LAT + 0.02, longitude=WORK_LNG)  # ~1.4 miles, 4 min
+    make_housing(title='Outside', latitude=WORK_LAT + 0.3, longitude=WORK_LNG)  # ~20.7 miles, 54 min
+    
+    response = client.get('/api/housing/search?max_commute=30', headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [h['title'] for h in data['housing']] == ['Close']
+    assert data['housing'][0]['estimated_commute_minutes'] == 4
+    assert data['pagination']['total'] == 1
+
+def test_commute_sort_orders_by_duration(app):
+    """Test sort=commute ranks by minutes, then distance, then id"""
+    ids = ['c', 'b', 'a', 'd']
+    lats = [WORK_LAT + 0.013, WORK_LAT + 0.0145, WORK_LAT + 0.0145, WORK_LAT + 0.05]  # 3, 3, 3 and 9 min
+    
+    ranked = rank_listings(ids, lats, [WORK_LNG] * 4, [2000] * 4, WORK_LAT, WORK_LNG, sort='commute')
+    
+    assert [match.id for match in ranked] == ['c', 'a', 'b', 'd']
+    assert [match.sort_key[:2] for match in ranked] == [(match.duration_minutes, match.distance_miles) for match in ranked]
+
+def test_search_uses_saved_max_commute(client, auth_headers, user, make_housing):
+    """Test the user's max_commute_time applies when no limit is passed"""
+    user.max_commute_time = 10
+    db.session.commit()
+    make_housing(title='Close', latitude=WORK_LAT + 0.02, longitude=WORK_LNG)
+    make_housing(title='Outside', latitude=WORK_LAT + 0.1, longitude=WORK_LNG)
+    
+    response = client.get('/api/housing/search', headers=auth_headers)
+    
+    assert [h['title'] for h in response.get_json()['housing']] == ['Close']
+
+def test_search_sort_orders(client, auth_headers, make_housing):
+    """Test commute, price and score rankings paginate after ranking"""
+    make_housing(title='Cheap far', price=1000, latitude=WORK_LAT + 0.2, longitude=WORK_LNG)
+    make_housing(title='Pricey near', price=4000, latitude=WORK_LAT + 0.01, longitude=WORK_LNG)
+    make_housing(title='Balanced', price=1200, latitude=WORK_LAT + 0.03, longitude=WORK_LNG)
+    
+    def titles(sort, **params):
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        response = client.get(f'/api/housing/search?sort={sort}&{query}', headers=auth_headers)
+        return [h['title'] for h in response.get_json()['housing']]
+    
+    assert titles('commute') == ['Pricey near', 'Balanced', 'Cheap far']
+    assert titles('price') == ['Cheap far', 'Balanced', 'Pricey near']
+    assert titles('score')[0] == 'Balanced'
+    assert titles('commute', per_page=1, page=2) == ['Balanced']
+
+def test_search_rejects_unknown_sort(client, auth_headers):
+    """Test an unsupported sort key is a client error"""
+    response = client.get('/api/housing/search?sort=bogus', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_search_cursor_walks_all_pages(client, auth_headers, make_housing):
+    """Test keyset pages cover every listing once in (price, id) order"""
+    for price in (1800, 1500, 1500, 2200, 1900):
+        make_housing(price=price)
+    
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/api/housing/search?cursor={cursor}&per_page=2', headers=auth_headers)
+        data = response.get_json()
+        assert 'total' not in data['pagination']
+        seen.extend((h['price'], h['id']) for h in data['housing'])
+        cursor = data['pagination']['next_cursor']
+    
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+def test_search_cursor_optional_total(client, auth_headers, make_housing):
+    """Test include_total adds the count only when asked"""
+    make_housing()
+    
+    response = client.get('/api/housing/search?cursor=&include_total=true', headers=auth_headers)
+    
+    assert response.get_json()['pagination']['total'] == 1
+
+def test_nearby_cursor_follows_distance(client, auth_headers, make_housing):
+    """Test nearby cursor pages continue nearest-first"""
+    for i in range(3):
+        make_housing(title=f'Listing {i}', latitude=WORK_LAT + 0.01 * i, longitude=WORK_LNG)
+    
+    first = client.get('/api/housing/nearby?cursor=&per_page=2', headers=auth_headers).get_json()
+    cursor = first['pagination']['next_cursor']
+    second = client.get(f'/api/housing/nearby?cursor={cursor}&per_page=2', headers=auth_headers).get_json()
+    
+    assert [h['title'] for h in first['housing']] == ['Listing 0', 'Listing 1']
+    assert [h['title'] for h in second['housing']] == ['Listing 2']
+    assert second['pagination']['has_next'] is False
+
+def test_invalid_cursor_rejected(client, auth_headers):
+    """Test a malformed cursor is a client error"""
+    response = client.get('/api/housing/search?cursor=not-a-cursor', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_cursor_routes_reject_empty_pages(client, auth_headers, make_housing):
+    """Test per_page below 1 is a client error rather than a crash or an endless cursor"""
+    make_housing()
+    
+    for path in ('/api/housing/search', '/api/housing/nearby', '/api/housing/reachable', '/api/commute/history'):
+        for per_page in (0, -1):
+            response = client.get(f'{path}?cursor=&per_page={per_page}', headers=auth_headers)
+            assert response.status_code == 400, path
+
+def test_favorites_single_query(client, auth_headers, user, make_housing, query_counter):
+    """Test listing favorites does not issue one query per favorite"""
+    for i in range(10):
+        housing = make_housing(title=f'Listing {i}')
+        db.session.add(Favorite(user_id=user.id, housing_id=housing.id))
+    db.session.commit()
+    db.session.expire_all()
+    query_counter.clear()
+    
+    response = client.get('/api/housing/favorites', headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert len(response.get_json()['favorites']) == 10
+    favorite_queries = [s for s in query_counter if 'FROM favorites' in s]
+    assert len(favorite_queries) == 1
+    assert not [s for s in query_counter if s.lstrip().startswith('SELECT') and 'FROM housing' in s and 'favorites' not in s]
+
+def test_favorites_field_projection(client, auth_headers, user, make_housing, query_counter):
+    """Test fields= trims the payload and the selected columns"""
+    housing = make_housing(description='Long text', amenities=['gym'])
+    db.session.add(Favorite(user_id=user.id, housing_id=housing.id, notes='Nice'))
+    db.session.commit()
+    db.session.expire_all()
+    query_counter.clear()
+    
+    response = client.get('/api/housing/favorites?fields=id,title,price', headers=auth_headers)
+    
+    favorite = response.get_json()['favorites'][0]
+    assert set(favorite) == {'id', 'title', 'price', 'favorite_id', 'notes', 'priority', 'visit_date'}
+    assert favorite['notes'] == 'Nice'
+    favorites_query = next(s for s in query_counter if 'FROM favorites' in s)
+    assert 'description' not in favorites_query and 'amenities' not in favorites_query
+
+def test_favorites_unknown_field_rejected(client, auth_headers):
+    """Test projecting a field that does not exist is a client error"""
+    response = client.get('/api/housing/favorites?fields=id,password', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_search_field_projection(client, auth_headers, make_housing, query_counter):
+    """Test search fields= selects only the requested columns, in every mode"""
+    for price in (1500, 1800, 2100):
+        make_housing(price=price, description='Long text')
+    query_counter.clear()
+    
+    paged = client.get('/api/housing/search?fields=id,title', headers=auth_headers).get_json()
+    keyset = client.get('/api/housing/search?fields=title&cursor=&per_page=2', headers=auth_headers).get_json()
+    ranked = client.get('/api/housing/search?fields=title&sort=commute', headers=auth_headers).get_json()
+    
+    assert [set(h) for h in paged['housing']] == [{'id', 'title'}] * 3
+    assert [set(h) for h in keyset['housing']] == [{'title'}] * 2
+    assert keyset['pagination']['next_cursor'] is not None
+    assert set(ranked['housing'][0]) == {'title', 'distance_miles', 'estimated_commute_minutes', 'score'}
+    assert not [s for s in query_counter if 'FROM housing' in s and 'housing.description' in s]
+
+def test_search_unknown_field_rejected(client, auth_headers):
+    """Test search rejects projecting unknown fields"""
+    response = client.get('/api/housing/search?fields=id,password', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_search_facets(client, auth_headers, make_housing, query_counter):
+    """Test facet counts come back with results from a single grouped query"""
+    make_housing(property_type='apartment', bedrooms=0, price=900, pet_friendly=True)
+    make_housing(property_type='apartment', bedrooms=2, price=1800)
+    make_housing(property_type='house', bedrooms=5, price=4200, pet_friendly=True)
+    make_housing(property_type=None, bedrooms=None, price=1850)
+    query_counter.clear()
+    
+    response = client.get(
+        '/api/housing/search?facets=property_type,bedrooms,price_band,pet_friendly', headers=auth_headers
+    )
+    
+    facets = response.get_json()['facets']
+    assert facets['property_type'] == [{'value': 'apartment', 'count': 2}, {'value': 'house', 'count': 1}]
+    assert facets['bedrooms'] == [
+        {'value': '0', 'count': 1}, {'value': '2', 'count': 1}, {'value': '4+', 'count': 1}
+    ]
+    assert facets['price_band'] == [
+        {'value': '0-999', 'count': 1}, {'value': '1500-1999', 'count': 2}, {'value': '4000+', 'count': 1}
+    ]
+    assert facets['pet_friendly'] == [{'value': False, 'count': 2}, {'value': True, 'count': 2}]
+    assert len([s for s in query_counter if 'GROUP BY' in s]) == 1
+
+def test_search_facets_follow_filters(client, auth_headers, make_housing):
+    """Test facet counts cover the filtered matches in ranked and cursor modes"""
+    make_housing(property_type='apartment', price=1500)
+    make_housing(property_type='house', price=3500)
+    
+    ranked = client.get('/api/housing/search?facets=property_type&max_price=2000&sort=score', headers=auth_headers)
+    keyset = client.get('/api/housing/search?facets=property_type&max_price=2000&cursor=', headers=auth_headers)
+    plain = client.get('/api/housing/search', headers=auth_headers)
+    
+    assert ranked.get_json()['facets'] == {'property_type': [{'value': 'apartment', 'count': 1}]}
+    assert keyset.get_json()['facets'] == ranked.get_json()['facets']
+    assert 'facets' not in plain.get_json()
+
+def test_search_facets_follow_commute_limit(client, auth_headers, user, make_housing, monkeypatch):
+    """Test facet counts match the results a saved commute limit leaves, across id chunks"""
+    monkeypatch.setattr('app.services.facets.ID_CHUNK_SIZE', 1)
+    user.max_commute_time = 10
+    db.session.commit()
+    make_housing(property_type='apartment', latitude=WORK_LAT + 0.02, longitude=WORK_LNG)  # 4 min
+    make_housing(property_type='apartment', latitude=WORK_LAT + 0.03, longitude=WORK_LNG)  # 6 min
+    make_housing(property_type='house', latitude=WORK_LAT + 0.3, longitude=WORK_LNG)  # 54 min
+    
+    data = client.get('/api/housing/search?facets=property_type', headers=auth_headers).get_json()
+    
+    assert data['pagination']['total'] == 2
+    assert data['facets'] == {'property_type': [{'value': 'apartment', 'count': 2}]}
+
+def test_search_unknown_facet(client, auth_headers):
+    """Test unknown facets are rejected"""
+    response = client.get('/api/housing/search?facets=bedrooms,colour', headers=auth_headers)
+    
+    assert response.status_code == 400
+    assert 'colour' in response.get_json()['error']
+
+def test_favorites_batch_add(client, auth_headers, user, make_housing, query_counter):
+    """Test batch add validates ids in one query and reports each item"""
+    ids = [make_housing(title=f'Listing {i}').id for i in range(3)]
+    db.session.add(Favorite(user_id=user.id, housing_id=ids[0], notes='Keep'))
+    db.session.commit()
+    query_counter.clear()
+    
+    response = client.post('/api/housing/favorites/batch', headers=auth_headers, json={'favorites': [
+        {'housing_id': ids[0]},
+        {'housing_id': ids[1], 'notes': 'Balcony', 'priority': 4},
+        {'housing_id': ids[2]},
+        {'housing_id': 'missing'},
+        {'housing_id': ids[2]},
+        {'housing_id': ids[1], 'priority': 9}
+    ]})
+    
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['exists', 'created', 'created', 'not_found', 'invalid', 'invalid']
+    assert results[0]['favorite']['notes'] == 'Keep'
+    assert results[1]['favorite']['priority'] == 4
+    assert len([s for s in query_counter if 'FROM housing' in s]) == 1
+    assert len([s for s in query_counter if s.startswith('INSERT INTO favorites')]) == 1
+    assert Favorite.query.filter_by(user_id=user.id).count() == 3
+
+def test_favorites_batch_update(client, auth_headers, user, make_housing, query_counter):
+    """Test batch update applies different changes per favorite in one UPDATE"""
+    favorites = [Favorite(user_id=user.id, housing_id=make_housing().id, notes='Old') for _ in range(3)]
+    db.session.add_all(favorites)
+    db.session.commit()
+    ids = [favorite.id for favorite in favorites]
+    query_counter.clear()
+    
+    response = client.patch('/api/housing/favorites/batch', headers=auth_headers, json={'favorites': [
+        {'id': ids[0], 'priority': 5},
+        {'id': ids[1], 'notes': 'Visit Saturday', 'visit_date': '2026-11-07'},
+        {'id': ids[2], 'visit_date': '11/07/2026'},
+        {'id': 'missing', 'priority': 2}
+    ]})
+    
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['updated', 'updated', 'invalid', 'not_found']
+    assert results[1]['favorite']['visit_date'] == '2026-11-07'
+    assert len([s for s in query_counter if s.startswith('UPDATE favorites')]) == 1
+    
+    db.session.expire_all()
+    stored = {favorite.id: favorite for favorite in Favorite.query}
+    assert (stored[ids[0]].priority, stored[ids[0]].notes) == (5, 'Old')
+    assert (stored[ids[1]].priority, stored[ids[1]].notes) == (1, 'Visit Saturday')
+    assert stored[ids[1]].visit_date.isoformat() == '2026-11-07'
+    assert stored[ids[2]].visit_date is None
+
+def test_favorites_batch_remove(client, auth_headers, user, make_housing):
+    """Test batch remove deletes only the caller's favorites"""
+    other = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'password123'
+    }).get_json()['user']
+    mine = Favorite(user_id=user.id, housing_id=make_housing().id)
+    theirs = Favorite(user_id=other['id'], housing_id=make_housing().id)
+    db.session.add_all([mine, theirs])
+    db.session.commit()
+    
+    response = client.delete('/api/housing/favorites/batch', headers=auth_headers, json={'ids': [mine.id, theirs.id]})
+    
+    assert [result['status'] for result in response.get_json()['results']] == ['deleted', 'not_found']
+    assert [favorite.id for favorite in Favorite.query] == [theirs.id]
+
+def test_favorites_batch_limits(client, auth_headers):
+    """Test malformed and oversized batches are rejected"""
+    assert client.post('/api/housing/favorites/batch', headers=auth_headers, json={}).status_code == 400
+    assert client.delete(
+        '/api/housing/favorites/batch', headers=auth_headers, json={'ids': ['x'] * 101}
+    ).status_code == 400
@@ -0,0 +1,31 @@
+from app import db
+from app.models.commute import Commute
+from app.models.favorite import Favorite
+from app.models.housing import Housing
+from app.services.search import apply_search_filters
+
+def query_plan(query):
+    """Return SQLite's EXPLAIN QUERY PLAN details for an ORM query"""
+    statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {statement}')).all()
+    return ' | '.join(row[-1] for row in rows)
+
+def test_search_filters_use_indexes(app):
+    """Test the hot search filters are served by the composite indexes"""
+    plan = query_plan(apply_search_filters(Housing.query, {'property_type': 'condo', 'max_price': 3000}))
+    assert 'ix_housing_property_type_price' in plan
+    
+    plan = query_plan(apply_search_filters(Housing.query, {'min_price': 1000, 'max_price': 3000}))
+    assert 'ix_housing_price' in plan
+    
+    plan = query_plan(apply_search_filters(Housing.query, {'bedrooms': 3}))
+    assert 'ix_housing_bedrooms_price' in plan
+
+def test_user_scoped_lookups_use_indexes(app):
+    """Test favorites and commute history lookups seek on user_id"""
+    plan = query_plan(Favorite.query.filter_by(user_id='u1', housing_id='h1'))
+    assert 'USING INDEX' in plan and 'user_id=? AND housing_id=?' in plan  # SQLite names the unique index sqlite_autoindex_*
+    
+    plan = query_plan(Commute.query.filter_by(user_id='u1').order_by(Commute.calculated_at.desc()))
+    assert 'ix_commutes_user_calculated_at' in plan
+    assert 'TEMP B-TREE' not in plan  # No sort step; the index provides the order
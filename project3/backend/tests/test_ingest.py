@@ -0,0 +1,79 @@
+import json
+from app import db
+from app.models.commute_matrix import CommuteMatrix
+from app.models.housing import Housing
+from app.services.commute_matrix import get_commute_estimates
+from app.services.ingest import ingest_listings
+from app.tasks.ingest import ingest_listings_task
+from app.utils.geo import geohash_encode
+
+def listing(source_id, **overrides):
+    record = {
+        'source_id': source_id, 'title': f'Listing {source_id}', 'address': '1 Main St',
+        'city': 'Oakland', 'state': 'CA', 'zip_code': '94607',
+        'latitude': 37.8044, 'longitude': -122.2712, 'price': 2000,
+        'amenities': ['gym'], 'pet_friendly': True
+    }
+    record.update(overrides)
+    return record
+
+def write_ndjson(path, records):
+    path.write_text('\n'.join(json.dumps(record) for record in records) + '\n')
+    return str(path)
+
+def test_ingest_ndjson_upserts_on_source_id(app, tmp_path):
+    """Test re-ingesting a feed updates rows instead of duplicating them"""
+    feed = write_ndjson(tmp_path / 'feed.ndjson', [listing('a'), listing('b'), {'source_id': 'bad'}])
+    
+    stats = ingest_listings(feed, 'zillow', chunk_size=2)
+    
+    assert stats['read'] == 3 and stats['upserted'] == 2 and stats['skipped'] == 1
+    original = Housing.query.filter_by(source='zillow', source_id='a').one()
+    assert original.geohash == geohash_encode(37.8044, -122.2712)
+    assert original.amenities == ['gym'] and original.pet_friendly is True
+    
+    feed = write_ndjson(tmp_path / 'feed2.ndjson', [listing('a', price=2100), listing('a', price=2200)])
+    ingest_listings(feed, 'zillow')
+    
+    assert Housing.query.count() == 2
+    updated = Housing.query.filter_by(source='zillow', source_id='a').one()
+    assert updated.id == original.id
+    assert updated.price == 2200
+
+def test_ingest_move_drops_matrix_rows(app, tmp_path):
+    """Test a feed that moves a listing discards its shared commute estimates"""
+    ingest_listings(write_ndjson(tmp_path / 'feed.ndjson', [listing('a'), listing('b')]), 'zillow')
+    get_commute_estimates(37.7749, -122.4194, Housing.query.all(), 'driving')
+    db.session.commit()
+    
+    moved = listing('a', latitude=37.81)
+    ingest_listings(write_ndjson(tmp_path / 'feed2.ndjson', [moved, listing('b')]), 'zillow')
+    
+    remaining = {entry.housing_id for entry in CommuteMatrix.query.all()}
+    assert remaining == {Housing.query.filter_by(source_id='b').one().id}
+
+def test_ingest_csv(app, tmp_path):
+    """Test CSV feeds with list and boolean columns"""
+    path = tmp_path / 'feed.csv'
+    path.write_text(
+        'source_id,title,address,city,state,zip_code,latitude,longitude,price,amenities,pet_friendly\n'
+        'x1,Loft,2 Main St,Oakland,CA,94607,37.80,-122.27,1800,pool|gym,yes\n'
+    )
+    
+    ingest_listings(str(path), 'realtor')
+    
+    housing = Housing.query.one()
+    assert housing.amenities == ['pool', 'gym']
+    assert housing.pet_friendly is True
+
+def test_ingest_cli_and_task(app, tmp_path):
+    """Test the Flask command and the Celery task both ingest a feed"""
+    feed = write_ndjson(tmp_path / 'feed.ndjson', [listing('a'), listing('b')])
+    
+    result = app.test_cli_runner().invoke(args=['ingest-listings', feed, '--source', 'zillow'])
+    assert 'rows/sec' in result.output
+    assert Housing.query.count() == 2
+    
+    stats = ingest_listings_task.delay(feed, 'realtor').get()
+    assert stats['upserted'] == 2
+    assert Housing.query.count() == 4
@@ -0,0 +1,170 @@
+import json
+import time
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.commute import Commute
+from app.models.favorite import Favorite
+from app.models.housing import Housing
+from app.models.job import Job
+from app.services.ingest import expire_listings
+from app.services.jobs import enqueue, run_job
+from app.tasks.commute import precompute_location, recompute_favorites
+from app.tasks.housing import refresh_listings_task
+
+WORK_LAT, WORK_LNG = 37.7749, -122.4194
+
+def test_work_location_change_recomputes_favorites(client, auth_headers, user, make_housing):
+    """Test moving work queues a job that refreshes commutes to every favorite"""
+    housing = make_housing(latitude=WORK_LAT + 0.1, longitude=WORK_LNG)
+    db.session.add(Favorite(user_id=user.id, housing_id=housing.id))
+    db.session.commit()
+    
+    response = client.put('/api/auth/profile', headers=auth_headers, json={'work_lat': WORK_LAT + 0.1})
+    
+    job = response.get_json()['job']
+    assert job['name'] == 'commute.recompute_favorites'
+    assert job['status'] == 'succeeded' and job['result'] == {'favorites': 1, 'commutes': 1}
+    assert Commute.query.filter_by(user_id=user.id, housing_id=housing.id).one().distance_miles < 0.1
+    
+    polled = client.get(f"/api/jobs/{job['id']}", headers=auth_headers).get_json()
+    listed = client.get('/api/jobs', headers=auth_headers).get_json()['jobs']
+    assert polled['status'] == 'succeeded'
+    assert [entry['id'] for entry in listed] == [job['id']]
+
+def test_active_key_deduplicates(app):
+    """Test a key that is still queued returns the existing job instead of a new one"""
+    queued = Job(name=precompute_location.name, key='cell', active_key='cell', status='queued')
+    db.session.add(queued)
+    db.session.commit()
+    
+    job, created = enqueue(precompute_location, {'work_lat': WORK_LAT, 'work_lng': WORK_LNG, 'radius_miles': 1}, key='cell')
+    
+    assert not created and job.id == queued.id
+    assert Job.query.count() == 1
+
+def test_stale_active_key_is_released(app):
+    """Test a job left running by a dead worker stops blocking its key"""
+    started = datetime.utcnow() - timedelta(minutes=app.config['JOB_STALE_MINUTES'] + 1)
+    stale = Job(name=precompute_location.name, key='cell', active_key='cell', status='running', started_at=started)
+    db.session.add(stale)
+    db.session.commit()
+    
+    job, created = enqueue(precompute_location, {'work_lat': WORK_LAT, 'work_lng': WORK_LNG, 'radius_miles': 1}, key='cell')
+    
+    assert created and job.id != stale.id
+    db.session.refresh(stale)
+    assert stale.status == 'failed' and stale.active_key is None
+
+def test_heartbeat_keeps_long_job_active(app):
+    """Test a job started long ago that still heartbeats keeps its key"""
+    started = datetime.utcnow() - timedelta(minutes=app.config['JOB_STALE_MINUTES'] * 3)
+    running = Job(name=precompute_location.name, key='cell', active_key='cell', status='running',
+                  started_at=started, heartbeat_at=datetime.utcnow())
+    db.session.add(running)
+    db.session.commit()
+    
+    job, created = enqueue(precompute_location, {'work_lat': WORK_LAT, 'work_lng': WORK_LNG, 'radius_miles': 1}, key='cell')
+    
+    assert not created and job.id == running.id and job.status == 'running'
+
+def test_running_job_records_heartbeats(tmp_path):
+    """Test a running job refreshes heartbeat_at from its background thread"""
+    app = create_app({
+        'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'jobs.db'}", 'JOB_HEARTBEAT_SECONDS': 0.01
+    })
+    
+    with app.app_context():
+        db.create_all()
+        job = Job(name='slow', status='queued')
+        db.session.add(job)
+        db.session.commit()
+        run_job(job.id, 'slow', lambda: time.sleep(0.2), {})
+        
+        db.session.expire_all()
+        job = Job.query.get(job.id)
+        assert job.status == 'succeeded' and job.heartbeat_at > job.started_at
+        db.session.remove()
+
+def test_released_job_keeps_failed_status(app):
+    """Test a run released as abandoned neither overwrites its status nor runs again"""
+    job = Job(name='slow', key='cell', active_key='cell', status='queued')
+    db.session.add(job)
+    db.session.commit()
+    
+    def released_meanwhile():
+        # What enqueue does when the heartbeat lapses while this run is still going
+        Job.query.filter_by(id=job.id).update({'status': 'failed', 'active_key': None, 'finished_at': datetime.utcnow()})
+        db.session.commit()
+        return {'done': True}
+    
+    run_job(job.id, 'slow', released_meanwhile, {})
+    db.session.refresh(job)
+    assert job.status == 'failed' and job.result is None
+    
+    calls = []
+    assert run_job(job.id, 'slow', lambda: calls.append(1), {}) is None
+    assert calls == []
+
+def test_list_jobs_rejects_bad_limit(client, auth_headers):
+    """Test limits below 1 are a client error; SQLite would treat LIMIT -5 as unlimited"""
+    for limit in (0, -5):
+        response = client.get(f'/api/jobs?limit={limit}', headers=auth_headers)
+        assert response.status_code == 400, limit
+
+def test_finished_key_runs_again(client, auth_headers):
+    """Test the precompute endpoint releases its key once the job finishes"""
+    first = client.post('/api/commute/precompute', headers=auth_headers, json={'radius_miles': 5})
+    second = client.post('/api/commute/precompute', headers=auth_headers, json={'radius_miles': 5})
+    
+    assert first.status_code == 202
+    assert first.get_json()['job']['status'] == 'succeeded'
+    assert first.get_json()['job']['id'] != second.get_json()['job']['id']
+    assert Job.query.filter(Job.active_key.isnot(None)).count() == 0
+
+def test_failed_job_records_error(app, user, monkeypatch):
+    """Test an exception marks the job failed and frees its key"""
+    def fail(user_id):
+        raise RuntimeError('routing unavailable')
+    monkeypatch.setattr('app.tasks.commute.recompute_favorite_commutes', fail)
+    
+    job, _ = enqueue(recompute_favorites, {'user_id': user.id}, key='recompute', user_id=user.id)
+    
+    assert job.status == 'failed' and job.error == 'routing unavailable'
+    assert job.active_key is None and job.finished_at is not None
+
+def test_other_users_job_hidden(client, auth_headers, app):
+    """Test a job owned by someone else is not visible"""
+    other = Job(name='commute.recompute_favorites', user_id='someone-else', status='queued')
+    db.session.add(other)
+    db.session.commit()
+    
+    response = client.get(f'/api/jobs/{other.id}', headers=auth_headers)
+    assert response.status_code == 404
+
+def test_expire_listings_keeps_favorites_and_manual(app, user, make_housing):
+    """Test only stale, unfavorited feed listings are deleted"""
+    stale = datetime.utcnow() - timedelta(days=30)
+    expired = make_housing(title='Expired', source='zillow', source_id='1')
+    favorited = make_housing(title='Favorited', source='zillow', source_id='2')
+    make_housing(title='Fresh', source='zillow', source_id='3')
+    make_housing(title='Manual')
+    Housing.query.filter(Housing.id.in_([expired.id, favorited.id])).update({'updated_at': stale}, synchronize_session=False)
+    db.session.add(Favorite(user_id=user.id, housing_id=favorited.id))
+    db.session.commit()
+    
+    assert expire_listings(14) == 1
+    assert sorted(housing.title for housing in Housing.query) == ['Favorited', 'Fresh', 'Manual']
+
+def test_scheduled_refresh_ingests_feeds(app, tmp_path):
+    """Test a beat-triggered refresh gets a Job row and re-ingests configured feeds"""
+    feed = tmp_path / 'feed.ndjson'
+    feed.write_text(json.dumps({
+        'source_id': 'a', 'title': 'Loft', 'address': '1 Main St', 'city': 'Oakland', 'state': 'CA',
+        'zip_code': '94607', 'latitude': 37.8044, 'longitude': -122.2712, 'price': 2000
+    }) + '\n')
+    app.config['LISTING_FEEDS'] = f'zillow={feed}'
+    
+    stats = refresh_listings_task.delay().get()
+    
+    assert stats['feeds']['zillow']['upserted'] == 1
+    assert Job.query.filter_by(name='housing.refresh_listings').one().status == 'succeeded'
@@ -0,0 +1,181 @@
+from app import db
+from app.models.housing import Housing
+from app.services.listing_snapshot import ListingSnapshot, listing_snapshot
+import fcntl
+import numpy as np
+import pytest
+
+SEARCHES = (
+    '',
+    '?max_price=2500&bedrooms=2',
+    '?city=san&property_type=apartment',
+    '?zip_code=941&pet_friendly=true',
+    '?parking_available=false&bathrooms=1.5',
+    '?sort=price&per_page=3&page=2',
+    '?sort=score&max_commute=20',
+    '?sort=commute'
+)
+
+@pytest.fixture
+def listings(make_housing):
+    make_housing(title='Mission flat', price=2100, bedrooms=1, pet_friendly=True)
+    make_housing(title='SoMa loft', price=2400, bedrooms=2, bathrooms=2.0, zip_code='94103', parking_available=True)
+    make_housing(title='Oakland house', city='Oakland', zip_code='94607', latitude=37.8044, longitude=-122.2712,
+                 price=2900, bedrooms=3, property_type='house', pet_friendly=True)
+    make_housing(title='Sunset studio', price=1700, bedrooms=None, bathrooms=None, property_type=None)
+    make_housing(title='San Jose condo', city='San Jose', zip_code='95112', latitude=37.3382, longitude=-121.8863,
+                 price=2400, bedrooms=2, property_type='condo')
+
+def search(client, auth_headers, args=''):
+    body = client.get(f'/api/housing/search{args}', headers=auth_headers).get_json()
+    return [housing['title'] for housing in body['housing']], body['pagination']
+
+def test_snapshot_matches_sql(app, client, auth_headers, listings):
+    """Test every filter, sort and page returns the same listings from the snapshot as from SQL"""
+    expected = [search(client, auth_headers, args) for args in SEARCHES]
+    app.config['LISTING_SNAPSHOT'] = True
+    
+    for args, (titles, pagination) in zip(SEARCHES, expected):
+        snapshot_titles, snapshot_pagination = search(client, auth_headers, args)
+        if 'sort' in args:
+            assert snapshot_titles == titles, args
+        else:
+            assert sorted(snapshot_titles) == sorted(titles), args  # SQL leaves the order unspecified
+        assert snapshot_pagination == pagination, args
+
+def test_snapshot_cursor_pages(app, client, auth_headers, listings):
+    """Test keyset cursors page the same way and interchange with SQL ones"""
+    def pages(per_page=2):
+        titles, cursor = [], ''
+        while cursor is not None:
+            body = client.get(f'/api/housing/search?per_page={per_page}&cursor={cursor}', headers=auth_headers).get_json()
+            titles += [housing['title'] for housing in body['housing']]
+            cursor = body['pagination']['next_cursor']
+        return titles
+    
+    expected = pages()
+    first = client.get('/api/housing/search?per_page=2&cursor=', headers=auth_headers).get_json()
+    app.config['LISTING_SNAPSHOT'] = True
+    resumed = client.get(f"/api/housing/search?per_page=2&cursor={first['pagination']['next_cursor']}", headers=auth_headers)
+    
+    assert pages() == expected
+    assert [housing['title'] for housing in resumed.get_json()['housing']] == expected[2:4]
+    assert client.get('/api/housing/search?cursor=bm9wZQ', headers=auth_headers).status_code == 400
+
+def test_snapshot_cursor_rejects_empty_pages(app, client, auth_headers, listings):
+    """Test per_page below 1 is refused by the snapshot pager and the route"""
+    snapshot = ListingSnapshot.load(Housing.query)
+    app.config['LISTING_SNAPSHOT'] = True
+    
+    with pytest.raises(ValueError):
+        snapshot.page_after(snapshot.select({}), '', 0)
+    assert client.get('/api/housing/search?per_page=0&cursor=', headers=auth_headers).status_code == 400
+
+def test_snapshot_nearby(app, client, auth_headers, listings):
+    """Test nearby returns the same matches and distances from the snapshot"""
+    expected = client.get('/api/housing/nearby?radius=15', headers=auth_headers).get_json()
+    app.config['LISTING_SNAPSHOT'] = True
+    
+    assert client.get('/api/housing/nearby?radius=15', headers=auth_headers).get_json() == expected
+
+def test_snapshot_filters_without_database(app, client, auth_headers, listings, query_counter):
+    """Test a fresh snapshot only leaves the page's rows to fetch from the database"""
+    app.config['LISTING_SNAPSHOT'] = True
+    search(client, auth_headers, '?max_price=2500')
+    query_counter.clear()
+    
+    search(client, auth_headers, '?max_price=2400')  # A new response cache key
+    
+    housing_queries = [s for s in query_counter if 'FROM housing' in s]
+    assert len(housing_queries) == 1
+    assert 'housing.id IN' in housing_queries[0]
+
+def test_snapshot_refreshes_incrementally(app, client, auth_headers, listings, make_housing, query_counter):
+    """Test writes are picked up from updated_at, with deletes forcing a full reload"""
+    app.config['LISTING_SNAPSHOT'] = True
+    search(client, auth_headers)
+    
+    Housing.query.filter_by(title='Mission flat').one().price = 3100
+    make_housing(title='Noe cottage', price=2000)
+    query_counter.clear()
+    titles, _ = search(client, auth_headers, '?max_price=2500')
+    
+    assert 'Mission flat' not in titles and 'Noe cottage' in titles
+    assert any('housing.updated_at >=' in s for s in query_counter)
+    
+    db.session.delete(Housing.query.filter_by(title='Noe cottage').one())
+    db.session.commit()
+    assert 'Noe cottage' not in search(client, auth_headers)[0]
+    assert len(listing_snapshot.current()) == 5
+
+def test_snapshot_falls_back_to_sql_while_refreshing(app, client, auth_headers, listings, make_housing):
+    """Test a stale snapshot is not served while another request holds the refresh"""
+    app.config['LISTING_SNAPSHOT'] = True
+    search(client, auth_headers)
+    make_housing(title='Noe cottage', price=2000)
+    
+    with app.extensions['listing_snapshot']['lock']:
+        assert listing_snapshot.current() is None
+        assert 'Noe cottage' in search(client, auth_headers)[0]
+    assert 'Noe cottage' in search(client, auth_headers)[0]
+
+def test_snapshot_file_round_trip(app, listings, tmp_path):
+    """Test a saved snapshot maps back read-only with the same rows and dictionaries"""
+    snapshot = ListingSnapshot.load(Housing.query)
+    snapshot.save(tmp_path / 'listings.snap')
+    
+    mapped = ListingSnapshot.open(tmp_path / 'listings.snap')
+    
+    assert mapped.dictionaries == snapshot.dictionaries and mapped.watermark == snapshot.watermark
+    assert (mapped.ids == snapshot.ids).all() and not mapped.ids.flags.writeable
+    for name, column in snapshot.columns.items():
+        assert np.array_equal(mapped.columns[name], column, equal_nan=column.dtype.kind == 'f'), name
+    assert list(mapped.select({'city': 'san', 'max_price': 2400})) == list(snapshot.select({'city': 'san', 'max_price': 2400}))
+
+def new_worker(app):
+    """Reset the per-process snapshot state, as a freshly forked worker has it"""
+    listing_snapshot.init_app(app)
+
+def test_shared_snapshot_across_workers(app, client, auth_headers, listings, make_housing, tmp_path, query_counter):
+    """Test workers map the published file instead of loading the table, and pick up new versions"""
+    app.config.update(LISTING_SNAPSHOT=True, LISTING_SNAPSHOT_PATH=str(tmp_path))
+    expected = search(client, auth_headers, '?sort=price')
+    published = (tmp_path / 'CURRENT').read_text()
+    
+    new_worker(app)
+    query_counter.clear()
+    assert len(listing_snapshot.current()) == 5
+    assert not [s for s in query_counter if 'FROM housing' in s]
+    assert search(client, auth_headers, '?sort=price&per_page=10') == (expected[0], {**expected[1], 'per_page': 10})
+    
+    # A write makes the writing worker publish a new version
+    make_housing(title='Noe cottage', price=2000)
+    assert 'Noe cottage' in search(client, auth_headers)[0]
+    assert (tmp_path / 'CURRENT').read_text() != published
+    assert len(list(tmp_path.glob('listings-*.snap'))) == 2
+    
+    # Other workers move to it once their copy is due for a check
+    new_worker(app)
+    assert len(listing_snapshot.current()) == 6
+
+def test_shared_snapshot_unchanged_refresh(app, client, auth_headers, listings, tmp_path):
+    """Test a refresh that finds nothing new re-stamps CURRENT rather than writing a version"""
+    app.config.update(LISTING_SNAPSHOT=True, LISTING_SNAPSHOT_PATH=str(tmp_path), LISTING_SNAPSHOT_MAX_LAG=0)
+    search(client, auth_headers)
+    published = (tmp_path / 'CURRENT').read_text()
+    
+    search(client, auth_headers, '?max_price=2500')
+    
+    assert (tmp_path / 'CURRENT').read_text() == published
+    assert len(list(tmp_path.glob('listings-*.snap'))) == 1
+
+def test_shared_snapshot_falls_back_while_locked(app, client, auth_headers, listings, tmp_path):
+    """Test a worker uses SQL while another process holds the refresh lock"""
+    app.config.update(LISTING_SNAPSHOT=True, LISTING_SNAPSHOT_PATH=str(tmp_path))
+    
+    with open(tmp_path / '.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        assert listing_snapshot.current() is None
+        assert len(search(client, auth_headers)[0]) == 5
+    
+    assert listing_snapshot.current() is not None
@@ -0,0 +1,60 @@
+from app import db
+from app.models.housing import Housing
+from app.services.location_index import CityTrie
+from app.services.search import apply_search_filters
+from tests.test_indexes import query_plan
+
+def test_city_trie_prefix_ranking():
+    """Test prefix lookups return the most listed cities first"""
+    trie = CityTrie([
+        {'city': 'San Jose', 'state': 'CA', 'listings': 5},
+        {'city': 'San Francisco', 'state': 'CA', 'listings': 9},
+        {'city': 'Santa Clara', 'state': 'CA', 'listings': 2},
+        {'city': 'Oakland', 'state': 'CA', 'listings': 7}
+    ])
+    
+    assert [c['city'] for c in trie.search('san')] == ['San Francisco', 'San Jose', 'Santa Clara']
+    assert [c['city'] for c in trie.search('SAN ')] == ['San Francisco', 'San Jose']
+    assert [c['city'] for c in trie.search('san', limit=1)] == ['San Francisco']
+    assert trie.search('x') == []
+
+def test_location_keys_maintained_on_write(app, make_housing):
+    """Test normalized city/state keys follow the display values"""
+    housing = make_housing(city='  San   Francisco ', state='CA')
+    assert (housing.city_key, housing.state_key) == ('san francisco', 'ca')
+    
+    housing.city = 'Oakland'
+    db.session.commit()
+    assert housing.city_key == 'oakland'
+
+def test_search_city_prefix_is_case_insensitive(client, auth_headers, make_housing):
+    """Test city/state/zip filters match on normalized prefixes"""
+    make_housing(title='SF', city='San Francisco', zip_code='94105')
+    make_housing(title='SJ', city='San Jose', zip_code='95112')
+    make_housing(title='Oak', city='Oakland', state='CA', zip_code='94607')
+    
+    def titles(query):
+        response = client.get(f'/api/housing/search?{query}', headers=auth_headers)
+        return sorted(h['title'] for h in response.get_json()['housing'])
+    
+    assert titles('city=san') == ['SF', 'SJ']
+    assert titles('city=SAN%20FRAN') == ['SF']
+    assert titles('state=ca&zip_code=946') == ['Oak']
+    assert titles('city=francisco') == []  # Prefix, not substring
+
+def test_city_filter_uses_index(app):
+    """Test the city filter is served by the normalized column index"""
+    assert 'ix_housing_city_key' in query_plan(apply_search_filters(Housing.query, {'city': 'San'}))
+
+def test_autocomplete_endpoint(client, auth_headers, make_housing):
+    """Test autocomplete suggests cities with listing counts"""
+    make_housing(city='San Francisco')
+    make_housing(city='San Francisco')
+    make_housing(city='San Jose')
+    
+    response = client.get('/api/housing/cities/autocomplete?q=sa', headers=auth_headers)
+    
+    assert response.get_json()['cities'] == [
+        {'city': 'San Francisco', 'state': 'CA', 'listings': 2},
+        {'city': 'San Jose', 'state': 'CA', 'listings': 1}
+    ]
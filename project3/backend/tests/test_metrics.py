@@ -0,0 +1,81 @@
+import logging
+import os
+from app import create_app, db
+from app.models.housing import Housing
+
+def test_response_headers_report_queries(app, client, auth_headers, make_housing):
+    """Non-production responses carry the query count and DB timing"""
+    app.config['METRICS_RESPONSE_HEADERS'] = True
+    make_housing()
+    
+    response = client.get('/api/housing/search', headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) >= 1
+    assert response.headers['Server-Timing'].startswith('db;desc=')
+
+def test_headers_hidden_in_production(app, client, auth_headers):
+    """Production mode leaves the timing headers off"""
+    app.config['METRICS_RESPONSE_HEADERS'] = False
+    
+    response = client.get('/api/housing/search', headers=auth_headers)
+    
+    assert 'X-Query-Count' not in response.headers
+    assert 'Server-Timing' not in response.headers
+
+def test_metrics_endpoint_exports_prometheus_series(client, auth_headers, make_housing):
+    """Latency histograms, query totals and cache counters are exported"""
+    housing = make_housing()
+    client.get('/api/housing/search', headers=auth_headers)
+    client.get(f'/api/housing/{housing.id}', headers=auth_headers)
+    
+    response = client.get('/metrics')
+    body = response.get_data(as_text=True)
+    worker = f'worker="{os.getpid()}"'
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert f'worktohome_http_request_duration_seconds_count{{method="GET",route="/api/housing/search",status="200",{worker}}} 1' in body
+    assert f'worktohome_http_request_duration_seconds_bucket{{method="GET",route="/api/housing/search",status="200",{worker},le="+Inf"}} 1' in body
+    assert f'worktohome_db_queries_total{{route="/api/housing/search",{worker}}}' in body
+    assert f'worktohome_cache_misses_total{{namespace="detail",{worker}}} 1' in body
+
+def test_metrics_token_required_when_set(app, client):
+    """METRICS_TOKEN turns /metrics into a bearer-token endpoint"""
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+
+def test_repeated_statement_logged_as_n_plus_one(caplog):
+    """Lazy-loading a relationship once per row trips the N+1 warning"""
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'N_PLUS_ONE_THRESHOLD': 3})
+    
+    @app.route('/lazy-favorites')
+    def lazy_favorites():
+        return {'counts': [len(housing.favorites) for housing in Housing.query.all()]}
+    
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Housing(title='Listing', address='1 Market St', city='San Francisco', state='CA',
+                    zip_code='94105', latitude=37.7749, longitude=-122.4194, price=2500)
+            for _ in range(4)
+        ])
+        db.session.commit()
+        client = app.test_client()
+        
+        with caplog.at_level(logging.WARNING, logger='app.services.metrics'):
+            client.get('/lazy-favorites')
+        
+        assert any('Possible N+1' in record.getMessage() for record in caplog.records)
+        body = client.get('/metrics').get_data(as_text=True)
+        assert f'worktohome_n_plus_one_total{{route="/lazy-favorites",worker="{os.getpid()}"}} 1' in body
+        db.session.remove()
+
+def test_metrics_can_be_disabled():
+    """METRICS_ENABLED=False registers no hooks or endpoint"""
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'METRICS_ENABLED': False})
+    
+    assert app.test_client().get('/metrics').status_code == 404
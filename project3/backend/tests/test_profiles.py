@@ -0,0 +1,98 @@
+from flask_jwt_extended import decode_token
+from app import db
+from app.models.user import User
+
+def user_queries(statements):
+    return [s for s in statements if 'FROM users' in s]
+
+def test_profiles_read_from_db_by_default(app, client, auth_headers, user):
+    """Test the default source sees a write made by another process at once"""
+    client.get('/api/auth/profile', headers=auth_headers)
+    
+    with db.engine.begin() as connection:  # Bypasses this process's session events
+        connection.execute(User.__table__.update().where(User.id == user.id).values(budget_max=1234))
+    db.session.expire_all()  # The test client shares one session; requests in a real worker do not
+    
+    assert app.config['USER_PROFILE_SOURCE'] == 'db'
+    assert client.get('/api/auth/profile', headers=auth_headers).get_json()['budget_max'] == 1234
+
+def test_claims_mode_profile_reads_from_db(app, client, auth_headers, user):
+    """Test claims mode does not serve full profiles from the per-process cache"""
+    app.config['USER_PROFILE_SOURCE'] = 'claims'
+    client.get('/api/auth/profile', headers=auth_headers)
+    
+    with db.engine.begin() as connection:  # Another worker's write
+        connection.execute(User.__table__.update().where(User.id == user.id).values(budget_max=3000))
+    db.session.expire_all()
+    
+    assert client.get('/api/auth/profile', headers=auth_headers).get_json()['budget_max'] == 3000
+
+def test_cached_profile_skips_user_lookup(app, client, auth_headers, make_housing, query_counter):
+    """Test repeat requests read preferences from the profile cache"""
+    app.config['USER_PROFILE_SOURCE'] = 'cache'
+    make_housing()
+    client.get('/api/housing/search', headers=auth_headers)
+    query_counter.clear()
+    
+    client.get('/api/housing/search?bedrooms=2', headers=auth_headers)
+    client.get('/api/housing/nearby', headers=auth_headers)
+    client.get('/api/auth/profile', headers=auth_headers)
+    
+    assert user_queries(query_counter) == []
+
+def test_profile_update_invalidates_cache(app, client, auth_headers, make_housing):
+    """Test a budget change applies to the next search"""
+    app.config['USER_PROFILE_SOURCE'] = 'cache'
+    make_housing(price=2500)
+    assert len(client.get('/api/housing/search', headers=auth_headers).get_json()['housing']) == 1
+    
+    client.put('/api/auth/profile', headers=auth_headers, json={'budget_max': 2000})
+    
+    assert client.get('/api/housing/search', headers=auth_headers).get_json()['housing'] == []
+    assert client.get('/api/auth/profile', headers=auth_headers).get_json()['budget_max'] == 2000
+
+def test_direct_user_write_invalidates_cache(app, client, auth_headers, user):
+    """Test committed User changes made outside the profile route are picked up"""
+    app.config['USER_PROFILE_SOURCE'] = 'cache'
+    client.get('/api/auth/profile', headers=auth_headers)
+    
+    User.query.get(user.id).first_name = 'Changed'
+    db.session.commit()
+    
+    assert client.get('/api/auth/profile', headers=auth_headers).get_json()['first_name'] == 'Changed'
+
+def test_claims_mode_reads_preferences_from_token(app, client, user, make_housing, query_counter):
+    """Test preference claims ride in the token and are refreshed by update_profile"""
+    app.config['USER_PROFILE_SOURCE'] = 'claims'
+    make_housing(price=2500)
+    login = client.post('/api/auth/login', json={'email': 'commuter@example.com', 'password': 'password123'})
+    token = login.get_json()['access_token']
+    assert decode_token(token)['prefs']['work_lat'] == 37.7749
+    query_counter.clear()
+    
+    response = client.get('/api/housing/nearby', headers={'Authorization': f'Bearer {token}'})
+    
+    assert response.status_code == 200
+    assert user_queries(query_counter) == []
+    
+    update = client.put('/api/auth/profile', headers={'Authorization': f'Bearer {token}'}, json={'budget_max': 2000})
+    fresh = update.get_json()['access_token']
+    assert decode_token(fresh)['prefs']['budget_max'] == 2000
+    search = client.get('/api/housing/search', headers={'Authorization': f'Bearer {fresh}'})
+    assert search.get_json()['housing'] == []
+
+def test_claims_mode_accepts_tokens_without_claims(app, client, auth_headers):
+    """Test tokens issued before claims were enabled still work"""
+    app.config['USER_PROFILE_SOURCE'] = 'claims'
+    
+    response = client.get('/api/housing/nearby', headers=auth_headers)
+    
+    assert response.status_code == 200
+
+def test_deleted_user_not_found(client, auth_headers, user):
+    """Test a token for a removed user gets a 404 instead of an error"""
+    db.session.delete(User.query.get(user.id))
+    db.session.commit()
+    
+    assert client.get('/api/housing/search', headers=auth_headers).status_code == 404
+    assert client.post('/api/commute/calculate', headers=auth_headers, json={'housing_id': 'x'}).status_code == 404
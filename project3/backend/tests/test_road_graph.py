@@ -0,0 +1,147 @@
+import csv
+import pytest
+from app import create_app, db
+from app.services.isochrone import reachable_listings
+from app.services.routing import RoadGraph, routing
+from app.services.search import rank_by_commute
+from app.models.housing import Housing
+
+SIZE = 12
+STEP = 0.01
+ORIGIN_LAT, ORIGIN_LNG = 37.70, -122.50
+BRIDGE_ROW = SIZE - 1  # The only crossing over the river, far from the work row
+
+def node_id(row, col):
+    return row * SIZE + col
+
+def coordinates(row, col):
+    return ORIGIN_LAT + row * STEP, ORIGIN_LNG + col * STEP
+
+def river_grid():
+    """Grid of streets split down the middle by a river with a single bridge"""
+    lats, lngs = zip(*[coordinates(row, col) for row in range(SIZE) for col in range(SIZE)])
+    sources, targets = [], []
+    for row in range(SIZE):
+        for col in range(SIZE):
+            if row + 1 < SIZE:
+                sources.append(node_id(row, col))
+                targets.append(node_id(row + 1, col))
+            river = col == SIZE // 2 - 1
+            if col + 1 < SIZE and (not river or row == BRIDGE_ROW):
+                sources.append(node_id(row, col))
+                targets.append(node_id(row, col + 1))
+    return lats, lngs, sources, targets
+
+@pytest.fixture
+def graph():
+    graph = RoadGraph.from_edges(*river_grid())
+    graph.build_landmarks(4)
+    return graph
+
+@pytest.fixture
+def graph_path(tmp_path, graph):
+    path = tmp_path / 'graph.npz'
+    graph.save(path)
+    return str(path)
+
+def test_route_detours_over_bridge(graph):
+    """Test a trip across the river costs the detour, not the straight line"""
+    west, east = coordinates(0, SIZE // 2 - 1), coordinates(0, SIZE // 2)
+    
+    minutes, miles, path = graph.shortest_path(west, east, 'driving')
+    
+    assert miles > 2 * (BRIDGE_ROW * STEP * 69)
+    assert coordinates(BRIDGE_ROW, SIZE // 2) in path
+
+def test_alt_matches_one_to_many(graph):
+    """Test landmark-guided A* agrees with the single-source search"""
+    origin = coordinates(0, 0)
+    targets = [coordinates(row, col) for row in range(0, SIZE, 3) for col in range(0, SIZE, 3)]
+    
+    minutes, miles = graph.one_to_many(origin, [t[0] for t in targets], [t[1] for t in targets], 'driving')
+    
+    for target, expected in zip(targets, minutes):
+        assert graph.shortest_path(origin, target, 'driving')[0] == pytest.approx(expected, rel=1e-4)
+
+def test_one_to_many_cutoff_and_modes(graph):
+    """Test the cutoff marks far points unreachable and walking is slower"""
+    origin = coordinates(0, 0)
+    near, far = coordinates(1, 1), coordinates(SIZE - 1, SIZE - 1)
+    
+    driving, _ = graph.one_to_many(origin, [near[0], far[0]], [near[1], far[1]], 'driving', cutoff_minutes=5)
+    walking, _ = graph.one_to_many(origin, [near[0]], [near[1]], 'walking')
+    
+    assert driving[0] < 5 and driving[1] == float('inf')
+    assert walking[0] > driving[0]
+
+def test_oneway_edges_bind_drivers_only():
+    """Test a one-way street can be walked against traffic but not driven"""
+    graph = RoadGraph.from_edges([37.70, 37.71], [-122.5, -122.5], [0], [1], oneway=[True])
+    
+    assert graph.shortest_path((37.70, -122.5), (37.71, -122.5), 'driving') is not None
+    assert graph.shortest_path((37.71, -122.5), (37.70, -122.5), 'driving') is None
+    assert graph.shortest_path((37.71, -122.5), (37.70, -122.5), 'walking') is not None
+
+def test_csv_round_trip(tmp_path):
+    """Test the edge-list loader honours modes and the saved graph reloads"""
+    nodes, edges = tmp_path / 'nodes.csv', tmp_path / 'edges.csv'
+    with open(nodes, 'w', newline='') as f:
+        csv.writer(f).writerows([['id', 'lat', 'lng'], ['a', 37.70, -122.5], ['b', 37.71, -122.5]])
+    with open(edges, 'w', newline='') as f:
+        csv.writer(f).writerows([['source', 'target', 'speed_kph', 'modes'], ['a', 'b', 100, 'driving']])
+    
+    graph = RoadGraph.from_csv(nodes, edges)
+    graph.save(tmp_path / 'graph.npz')
+    loaded = RoadGraph.load(tmp_path / 'graph.npz')
+    
+    assert loaded.max_speed_kph('driving') == pytest.approx(100)
+    assert loaded.shortest_path((37.70, -122.5), (37.71, -122.5), 'walking') is None
+
+def test_ranking_and_calculate_use_graph(graph_path):
+    """Test search ranking and the graph provider see the river"""
+    app = create_app({
+        'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'ROUTING_PROVIDER': 'graph', 'ROAD_GRAPH_PATH': graph_path
+    })
+    work = coordinates(0, SIZE // 2 - 1)
+    with app.app_context():
+        db.create_all()
+        across = Housing(title='Across the river', address='1 East St', city='SF', state='CA', zip_code='94105',
+                         latitude=coordinates(0, SIZE // 2)[0], longitude=coordinates(0, SIZE // 2)[1], price=2000)
+        same_side = Housing(title='Same side', address='1 West St', city='SF', state='CA', zip_code='94105',
+                            latitude=coordinates(3, SIZE // 2 - 1)[0], longitude=coordinates(3, SIZE // 2 - 1)[1], price=2000)
+        db.session.add_all([across, same_side])
+        db.session.commit()
+        
+        ranked = rank_by_commute(Housing.query, *work, sort='score')
+        route = routing.route(work, (across.latitude, across.longitude))
+        
+        assert [match.id for match in ranked] == [same_side.id, across.id]
+        assert ranked[1].duration_minutes > ranked[0].duration_minutes
+        assert route.duration_minutes == ranked[1].duration_minutes
+        db.session.remove()
+
+def test_reachable_follows_the_network(graph_path):
+    """Test the isochrone leaves out a listing that is close but only reachable over the bridge"""
+    app = create_app({
+        'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'ROUTING_PROVIDER': 'graph', 'ROAD_GRAPH_PATH': graph_path
+    })
+    work = coordinates(0, SIZE // 2 - 1)
+    with app.app_context():
+        db.create_all()
+        across = Housing(title='Across the river', address='1 East St', city='SF', state='CA', zip_code='94105',
+                         latitude=coordinates(0, SIZE // 2)[0], longitude=coordinates(0, SIZE // 2)[1], price=2000)
+        same_side = Housing(title='Same side', address='1 West St', city='SF', state='CA', zip_code='94105',
+                            latitude=coordinates(3, SIZE // 2 - 1)[0], longitude=coordinates(3, SIZE // 2 - 1)[1], price=2000)
+        db.session.add_all([across, same_side])
+        db.session.commit()
+        
+        ranked = {match.id: match.duration_minutes for match in rank_by_commute(Housing.query, *work)}
+        isochrone, matches = reachable_listings(Housing.query, *work, ranked[same_side.id], 'driving')
+        
+        assert ranked[across.id] > ranked[same_side.id]
+        assert isochrone.source == 'graph'
+        assert [match[0] for match in matches] == [same_side.id]
+        assert matches[0][1] == ranked[same_side.id]
+        db.session.remove()
@@ -0,0 +1,117 @@
+import threading
+import time
+from app.services.routing import EstimateProvider, OsrmProvider, Route, routing
+from app.utils.geo import decode_polyline
+
+WORK = (37.7749, -122.4194)
+HOME = (37.8044, -122.2712)
+
+class SlowProvider:
+    """Records concurrency and call count around a fixed delay"""
+    
+    name = 'slow'
+    
+    def __init__(self, max_concurrency=None, delay=0.05, fail=False):
+        self.max_concurrency = max_concurrency
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+    
+    def route(self, origin, destination, route_type):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if self.fail:
+            raise RuntimeError('provider down')
+        return Route(1.0, 2, None, 'slow', '', [])
+
+def use_provider(app, provider):
+    app.extensions['routing'] = routing._state(provider, EstimateProvider(), workers=16)
+
+def test_estimate_depends_on_route_type():
+    """Test the offline provider uses per-mode speeds and only drives in traffic"""
+    provider = EstimateProvider()
+    
+    driving = provider.route(WORK, HOME, 'driving')
+    walking = provider.route(WORK, HOME, 'walking')
+    
+    assert walking.duration_minutes > driving.duration_minutes
+    assert driving.traffic_duration_minutes > driving.duration_minutes
+    assert walking.traffic_duration_minutes is None
+    assert decode_polyline(driving.polyline)[0] == WORK
+
+def test_calculate_fills_route_details(client, auth_headers, make_housing):
+    """Test commute calculation stores traffic, polyline and waypoints"""
+    housing = make_housing(latitude=HOME[0], longitude=HOME[1])
+    
+    response = client.post('/api/commute/calculate', headers=auth_headers,
+                           json={'housing_id': housing.id, 'route_type': 'biking'})
+    commute = response.get_json()['commute']
+    
+    assert response.status_code == 201
+    assert commute['route_polyline'] and len(commute['waypoints']) == EstimateProvider.WAYPOINT_COUNT
+    assert commute['route_summary'].endswith('by biking (estimated)')
+    assert commute['duration_minutes'] == EstimateProvider().route(WORK, HOME, 'biking').duration_minutes
+
+def test_identical_lookups_coalesce(app):
+    """Test concurrent lookups of the same trip share one provider call"""
+    provider = SlowProvider()
+    use_provider(app, provider)
+    
+    routes = routing.route_many(WORK, [(i, *HOME) for i in range(10)])
+    
+    assert provider.calls == 1
+    assert all(route.summary == 'slow' for route in routes.values())
+    assert routing.stats()['coalesced'] == 9
+
+def test_provider_concurrency_limit(app):
+    """Test distinct lookups run in parallel but never beyond the provider limit"""
+    provider = SlowProvider(max_concurrency=3)
+    use_provider(app, provider)
+    
+    started = time.perf_counter()
+    routing.route_many(WORK, [(i, HOME[0] + i * 0.01, HOME[1]) for i in range(9)])
+    
+    assert provider.calls == 9
+    assert provider.peak == 3
+    assert time.perf_counter() - started < 9 * provider.delay
+
+def test_failed_provider_falls_back_to_estimate(app):
+    """Test a failing provider degrades to the offline estimate"""
+    use_provider(app, SlowProvider(delay=0, fail=True))
+    
+    route = routing.route(WORK, HOME)
+    
+    assert route.summary.endswith('(estimated)')
+    assert routing.stats()['fallbacks'] == 1
+
+def test_osrm_response_parsed(monkeypatch):
+    """Test the OSRM client converts meters/seconds and keeps the geometry"""
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+        
+        def json(self):
+            return {'code': 'Ok', 'routes': [{
+                'distance': 16093.44, 'duration': 1230, 'geometry': '_p~iF~ps|U_ulLnnqC',
+                'legs': [{'summary': 'Bay Bridge'}]
+            }]}
+    
+    provider = OsrmProvider('http://osrm.local')
+    requested = []
+    monkeypatch.setattr(provider.session, 'get', lambda url, **kwargs: requested.append(url) or FakeResponse())
+    
+    route = provider.route(WORK, HOME, 'driving')
+    
+    assert requested == [f'http://osrm.local/route/v1/driving/{WORK[1]},{WORK[0]};{HOME[1]},{HOME[0]}']
+    assert route.distance_miles == 10.0
+    assert route.duration_minutes == 21
+    assert route.summary == 'Bay Bridge'
+    assert route.waypoints == [[38.5, -120.2], [40.7, -120.95]]
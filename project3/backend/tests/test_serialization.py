@@ -0,0 +1,59 @@
+from datetime import date, datetime
+from app import db
+from app.models.commute import Commute
+from app.models.housing import Housing
+from app.utils.json_provider import OrjsonProvider
+from app.utils.serialization import _temporal_fields, rows_to_dicts, select_fields
+import itertools
+
+def test_rows_match_to_dict(app, make_housing):
+    """Row tuple serialization produces the same payload as to_dict()"""
+    housing = make_housing(available_date=date(2024, 5, 1), amenities=['gym'], images=['a.jpg'])
+    
+    rows = select_fields(Housing.query, Housing).all()
+    
+    assert rows_to_dicts(rows, Housing) == [housing.to_dict()]
+
+def test_commute_rows_match_to_dict(app, user, make_housing):
+    """Commute rows serialize like Commute.to_dict()"""
+    commute = Commute(user_id=user.id, housing_id=make_housing().id, distance_miles=3.2,
+                      duration_minutes=7, route_type='driving', calculated_at=datetime(2024, 5, 1, 8, 30))
+    db.session.add(commute)
+    db.session.commit()
+    
+    assert rows_to_dicts(select_fields(Commute.query, Commute).all(), Commute) == [commute.to_dict()]
+
+def test_extra_columns_readable_but_not_serialized(app, make_housing):
+    """Extra key columns are selected for lookups but left out of the payload"""
+    housing = make_housing()
+    
+    rows = select_fields(Housing.query, Housing, ['title'], extra=('id', 'price')).all()
+    
+    assert rows[0].id == housing.id and rows[0].price == housing.price
+    assert rows_to_dicts(rows, Housing, ['title']) == [{'title': housing.title}]
+
+def test_field_orders_share_one_cache_entry(app, make_housing):
+    """Every requested field order reuses the model's cached date/time columns"""
+    housing = make_housing(available_date=date(2024, 5, 1))
+    _temporal_fields.cache_clear()
+    
+    for fields in itertools.permutations(['title', 'available_date', 'created_at']):
+        rows = select_fields(Housing.query, Housing, fields).all()
+        assert rows_to_dicts(rows, Housing, fields)[0]['available_date'] == housing.to_dict()['available_date']
+    
+    assert _temporal_fields.cache_info().currsize == 1
+
+def test_orjson_provider_installed(app, client, auth_headers):
+    """Responses are encoded by the orjson provider when it is available"""
+    assert isinstance(app.json, OrjsonProvider)
+    
+    response = client.get('/api/auth/profile', headers=auth_headers)
+    
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['username'] == 'commuter'
+
+def test_orjson_provider_matches_stdlib_conversions(app):
+    """Types orjson cannot encode natively go through Flask's default hook"""
+    value = {'when': datetime(2024, 5, 1, 8, 30), 1: 'non-str key'}
+    
+    assert app.json.loads(app.json.dumps(value)) == {'when': 'Wed, 01 May 2024 08:30:00 GMT', '1': 'non-str key'}
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import runpy
+from app import create_app, db
+from app.utils.db import engine_options
+from sqlalchemy import text
+import pytest
+
+GUNICORN_CONFIG = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py')
+
+def test_engine_options_size_pool_per_worker():
+    """Test server databases get a pre-pinged pool and SQLite keeps its default"""
+    config = {'DB_POOL_SIZE': 8, 'DB_MAX_OVERFLOW': 2, 'DB_POOL_TIMEOUT': 10, 'DB_POOL_RECYCLE': 1800}
+    
+    options = engine_options(dict(config, SQLALCHEMY_DATABASE_URI='postgresql://localhost/worktohome'))
+    
+    assert options['pool_size'] == 8 and options['max_overflow'] == 2 and options['pool_pre_ping']
+    assert engine_options(dict(config, SQLALCHEMY_DATABASE_URI='sqlite:///worktohome.db')) == {}
+
+def test_sqlite_file_database_uses_wal(tmp_path):
+    """Test SQLite connections are switched to WAL with a busy timeout"""
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'dev.db'}"})
+    
+    with app.app_context():
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+        db.session.remove()
+
+def test_gunicorn_config(monkeypatch):
+    """Test the serving profile preloads the app and derives workers from the environment"""
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    monkeypatch.setattr(os, 'environ', dict(os.environ))  # The config sets defaults in os.environ
+    os.environ.pop('CACHE_TYPE', None)
+    
+    config = runpy.run_path(GUNICORN_CONFIG)
+    
+    assert config['workers'] == 3 and config['worker_class'] == 'gthread' and config['threads'] == 4
+    assert config['preload_app'] and callable(config['post_fork'])
+    assert os.environ['CACHE_TYPE'] == 'redis'  # Several workers need a shared invalidation counter
+
+def test_gunicorn_single_worker_keeps_local_cache(monkeypatch):
+    """Test one worker leaves the in-process cache default alone"""
+    monkeypatch.setenv('WEB_CONCURRENCY', '1')
+    monkeypatch.setattr(os, 'environ', dict(os.environ))  # The config sets defaults in os.environ
+    os.environ.pop('CACHE_TYPE', None)
+    
+    runpy.run_path(GUNICORN_CONFIG)
+    
+    assert 'CACHE_TYPE' not in os.environ
+
+def test_gunicorn_defaults_to_one_worker_per_core(monkeypatch):
+    """Test the default worker count follows the cores and reports its connection ceiling"""
+    for name in ('WEB_CONCURRENCY', 'GUNICORN_THREADS', 'DB_POOL_SIZE', 'DB_MAX_OVERFLOW'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(os, 'environ', dict(os.environ))
+    
+    config = runpy.run_path(GUNICORN_CONFIG)
+    
+    assert config['workers'] == multiprocessing.cpu_count()
+    assert config['db_connections'] == config['workers'] * (4 + 2)
+
+def test_gunicorn_refuses_too_many_connections(monkeypatch):
+    """Test startup fails when the workers could exceed DB_MAX_CONNECTIONS"""
+    monkeypatch.setenv('WEB_CONCURRENCY', '16')
+    monkeypatch.setenv('DB_POOL_SIZE', '4')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '2')
+    monkeypatch.setenv('DB_MAX_CONNECTIONS', '90')
+    monkeypatch.setattr(os, 'environ', dict(os.environ))
+    
+    with pytest.raises(RuntimeError, match='96 database connections'):
+        runpy.run_path(GUNICORN_CONFIG)
+    
+    monkeypatch.setenv('DB_MAX_CONNECTIONS', '100')
+    assert runpy.run_path(GUNICORN_CONFIG)['db_connections'] == 96